@@ -0,0 +1,104 @@
+"""
+Import time benchmark of oxigenlib
+----------------------------------
+
+Measure in fresh interpreters the time needed to import the package for different uses, and check that the
+pure encode path (``oxigenlib.frames``) does not load pydantic, psygnal nor pyserial.
+The script exits with an error if a heavy dependency leaks into the light paths or if the light paths get slower
+than ``--max-ms``, so it can guard against regressions::
+
+    python benchmarks/bench_import.py --output import.json
+    python benchmarks/bench_import.py --output new.json --compare import.json --max-ms 30
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+# name -> (statements measured, light path that must not load heavy dependencies)
+SCENARIOS = {
+    "import_package": ("import oxigenlib", True),
+    "pure_encode": (
+        "import oxigenlib\n"
+        "from oxigenlib.enums import Command, PitLaneCount, PitLaneTrigger, PowerMeanValue\n"
+        "from oxigenlib.frames import command_frame\n"
+        "command_frame(3, Command.SET_MAX_SPEED, 200, 255, PitLaneTrigger.LEAVE, PitLaneCount.NO, "
+        "PowerMeanValue.PWM, 0)",
+        True
+    ),
+    "package_names": ("import oxigenlib\noxigenlib.RaceState\noxigenlib.RaceTimer", True),
+    "singletons": ("import oxigenlib\noxigenlib.events\noxigenlib.dongle", False),
+    "full_api": ("import oxigenlib\nfrom oxigenlib import *\nset_race_state", False),
+}
+HEAVY_MODULES = ("pydantic", "psygnal", "serial")
+
+PROBE = """
+import sys
+from time import perf_counter_ns
+sys.path.insert(0, {src!r})
+start = perf_counter_ns()
+{statements}
+elapsed = perf_counter_ns() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def measure(statements: str, repeat: int) -> tuple[float, list[str]]:
+    """return the best time in ms over ``repeat`` fresh interpreters and the heavy modules loaded"""
+    best = None
+    heavy = []
+    for _ in range(repeat):
+        code = PROBE.format(src=SRC, statements=statements, heavy=HEAVY_MODULES)
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        elapsed, loaded = output.split()[0], output.split()[1:]
+        heavy = loaded[0].split(",") if loaded else []
+        elapsed_ms = int(elapsed) / 10**6
+        best = elapsed_ms if best is None else min(best, elapsed_ms)
+    return best, heavy
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="oxigenlib import time benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per scenario, the best one is kept")
+    parser.add_argument("--max-ms", type=float, default=50.0, help="maximum import time of the light paths")
+    parser.add_argument("--output", default="bench_import.json", help="JSON result file")
+    parser.add_argument("--compare", help="previous JSON result file to compare with")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    previous = json.loads(Path(args.compare).read_text())["results"] if args.compare else {}
+    failures = []
+    for name, (statements, light) in SCENARIOS.items():
+        elapsed_ms, heavy = measure(statements, args.repeat)
+        report["results"][name] = {"ms": round(elapsed_ms, 2), "heavy_modules": heavy}
+        line = f"  {name:<20} {elapsed_ms:>10.2f} ms  {' '.join(heavy) or '-'}"
+        old = previous.get(name)
+        if old:
+            line += f"  x{old['ms'] / elapsed_ms:.2f} vs previous"
+        print(line)
+        if light and heavy:
+            failures.append(f"{name} loads {', '.join(heavy)}")
+        if light and elapsed_ms > args.max_ms:
+            failures.append(f"{name} takes {elapsed_ms:.2f} ms, more than {args.max_ms} ms")
+
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Benchmark of the RX/TX hot paths of oxigenlib
+---------------------------------------------
+
+Measure the cost per frame of each stage of the receiving path, the psygnal dispatch cost
+and the cost of each transmit encoder. No hardware is needed: the input is a synthetic stream of
+20 cars or a file of raw bytes received from the dongle (``--input``).
+
+Results are written as JSON, a previous result file can be passed with ``--compare``::
+
+    python benchmarks/bench_pipeline.py --output bench.json
+    python benchmarks/bench_pipeline.py --output new.json --compare bench.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter_ns
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import oxigenlib as o2
+from oxigenlib import constants, fastpath
+from oxigenlib.carcontroller import decode_dongle_pkg
+from oxigenlib.config import O2Command, Command
+from oxigenlib.dongle import Dongle
+from oxigenlib.dongle_rx import read_dongle_pkg, read_dongle_pkgs, DongleRxFramer, DongleRxDuplicateFilter, \
+    RX_FRAME_LENGTH
+from oxigenlib.dongle_tx import encode_race_status, encode_command, encode_firmware_version_request, \
+    encode_free_race, FrameEncoder
+from oxigenlib.events import Events
+from oxigenlib.racers import Racers, oxigen_racers
+from oxigenlib.simulator import encode_rx_frame
+
+
+# firmware byte: device flag / sub release / main release, the dongle reports car and controller in turns
+CAR_FIRMWARE = constants.DEVICE_FW_MASK | (1 << 5) | 3
+CONTROLLER_FIRMWARE = (2 << 5) | 3
+
+
+def synthetic_stream(num_frames: int, num_cars: int = 20, seed: int = 1) -> bytes:
+    """
+    race messages of ``num_cars`` cars reporting in turns at 10ms, with laps, pit lanes, deslots and button presses.
+    The state of a car only changes on these events, between them the frames differ by the power and the timer
+    """
+    rng = random.Random(seed)
+    laps = [0] * (num_cars + 1)
+    lap_times = [0.0] * (num_cars + 1)
+    in_pit_lane = [False] * (num_cars + 1)
+    on_track = [True] * (num_cars + 1)
+    buttons = [0] * (num_cars + 1)
+    frames = bytearray()
+    for index in range(num_frames):
+        car_id = index % num_cars + 1
+        timer_cs = index
+        # about a lap every 7 s per car
+        if rng.random() < num_cars / 700:
+            laps[car_id] += 1
+            lap_times[car_id] = rng.uniform(5, 9)
+            if rng.random() < 0.05:
+                in_pit_lane[car_id] = not in_pit_lane[car_id]
+        if rng.random() < 0.002:
+            on_track[car_id] = not on_track[car_id]
+        buttons[car_id] = constants.BTN_UP_MASK if rng.random() < 0.005 else 0
+        status = constants.CAR_ONLINE_MASK | (constants.CAR_IN_PIT_LANE_MASK if in_pit_lane[car_id] else 0)
+        power = (constants.CAR_ON_TRACK_MASK | rng.randint(20, 127)) if on_track[car_id] else 0
+        firmware = CAR_FIRMWARE if index // num_cars % 2 else CONTROLLER_FIRMWARE
+        frames += encode_rx_frame(status, car_id, lap_times[car_id], laps[car_id], power, firmware,
+                                  buttons[car_id], timer_cs)
+    return bytes(frames)
+
+
+def measure(func, items, repeat: int) -> float:
+    """return the best time per item in nanoseconds over ``repeat`` runs"""
+    best = None
+    for _ in range(repeat):
+        start = perf_counter_ns()
+        for item in items:
+            func(item)
+        elapsed = (perf_counter_ns() - start) / len(items)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_bulk(func, argument, count: int, repeat: int) -> float:
+    """return the best time per item in nanoseconds of a function processing ``count`` items per call"""
+    best = None
+    for _ in range(repeat):
+        start = perf_counter_ns()
+        func(argument)
+        elapsed = (perf_counter_ns() - start) / count
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_rx(stream: bytes, repeat: int, subscribers: list[int]) -> dict:
+    results = {}
+    chunks = [stream[i:i + RX_FRAME_LENGTH] for i in range(0, len(stream), RX_FRAME_LENGTH)]
+    num_frames = len(chunks)
+
+    results["read_dongle_pkg"] = measure(read_dongle_pkg, chunks, repeat)
+    results["read_dongle_pkgs"] = measure_bulk(read_dongle_pkgs, stream, num_frames, repeat)
+    results["framer_feed"] = measure_bulk(lambda data: DongleRxFramer().feed(data), stream, num_frames, repeat)
+    results["duplicate_filter"] = measure_bulk(lambda data: DongleRxDuplicateFilter().filter(data), stream,
+                                               num_frames, repeat)
+
+    frames = [read_dongle_pkg(chunk) for chunk in chunks]
+    results["decode_dongle_pkg"] = measure(decode_dongle_pkg, frames, repeat)
+
+    def racers_update(data_list):
+        racers = Racers(players={})
+        for data in data_list:
+            racers.update(data)
+    results["racers_update"] = measure_bulk(racers_update, frames, num_frames, repeat)
+
+    for count in subscribers:
+        bus = Events()
+        for _ in range(count):
+            bus.dongle_new_data_available_event.connect(lambda data: None)
+        results[f"psygnal_dispatch_{count}_subscribers"] = measure(bus.dongle_new_data_available_event.emit,
+                                                                  frames, repeat)
+
+    # end to end: framing, decoding, events and Racers update via the module singletons
+    def end_to_end(data):
+        oxigen_racers.players.clear()
+        oxigen_racers._track_call_ids.clear()
+        oxigen_racers._off_track_ids.clear()
+        Dongle()._ingest(data)
+    results["end_to_end"] = measure_bulk(end_to_end, stream, num_frames, repeat)
+
+    def end_to_end_duplicate_filter(data):
+        oxigen_racers.players.clear()
+        oxigen_racers._track_call_ids.clear()
+        oxigen_racers._off_track_ids.clear()
+        dongle = Dongle()
+        dongle.enable_duplicate_filter()
+        dongle._ingest(data)
+    results["end_to_end_duplicate_filter"] = measure_bulk(end_to_end_duplicate_filter, stream, num_frames, repeat)
+    return results
+
+
+def run_tx(repeat: int, count: int) -> dict:
+    results = {}
+    system = o2.set_start_config(255, o2.PitLaneTrigger.LEAVE, o2.PitLaneCount.NO, o2.PowerMeanValue.PWM)
+    timer = o2.RaceTimer()
+    timer.start()
+    race, cfg = system.race_state, system.config
+    global_cmd = O2Command(id=0, command=Command.SET_PIT_LANE_SPEED, command_arg=100)
+    car_cmd = O2Command(id=3, command=Command.SET_MAX_SPEED, command_arg=200)
+    encoder = FrameEncoder(system)
+    items = range(count)
+
+    results["encode_race_status"] = measure(lambda _: encode_race_status(race, cfg, timer), items, repeat)
+    results["encode_command_global"] = measure(lambda _: encode_command(race, cfg, global_cmd, timer), items, repeat)
+    results["encode_command_car"] = measure(lambda _: encode_command(race, cfg, car_cmd, timer), items, repeat)
+    results["encode_firmware_version_request"] = measure(lambda _: encode_firmware_version_request(), items, repeat)
+    results["encode_free_race"] = measure(lambda _: encode_free_race(), items, repeat)
+    results["frame_encoder_race_status"] = measure(lambda _: encoder.encode_race_status(timer), items, repeat)
+    results["frame_encoder_command_global"] = measure(lambda _: encoder.encode_command(global_cmd, timer),
+                                                      items, repeat)
+    results["frame_encoder_command_car"] = measure(lambda _: encoder.encode_command(car_cmd, timer), items, repeat)
+    return results
+
+
+def format_results(results: dict) -> dict:
+    return {
+        name: {"ns_per_op": round(ns, 1), "ops_per_s": round(10**9 / ns, 1) if ns else None}
+        for name, ns in results.items()
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="oxigenlib RX/TX benchmark")
+    parser.add_argument("--frames", type=int, default=20000, help="number of synthetic frames")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per stage, the best one is kept")
+    parser.add_argument("--input", help="file with raw bytes received from the dongle, replaces the synthetic stream")
+    parser.add_argument("--subscribers", type=int, nargs="*", default=[0, 1, 10], help="psygnal subscribers counts")
+    parser.add_argument("--output", default="bench_output.json", help="JSON result file")
+    parser.add_argument("--compare", help="previous JSON result file to compare with")
+    args = parser.parse_args()
+
+    if args.input:
+        stream = Path(args.input).read_bytes()
+        stream = DongleRxFramer().feed(stream)
+    else:
+        stream = synthetic_stream(args.frames)
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "oxigenlib": o2.VERSION,
+            "frames": len(stream) // RX_FRAME_LENGTH,
+            "input": args.input or "synthetic",
+        },
+        "results": {},
+    }
+    for mode, enabled in (("validated", False), ("fast_path", True)):
+        fastpath.set_fast_path(enabled)
+        report["results"][mode] = format_results(run_rx(stream, args.repeat, args.subscribers))
+    fastpath.set_fast_path(False)
+    report["results"]["tx"] = format_results(run_tx(args.repeat, args.frames))
+
+    Path(args.output).write_text(json.dumps(report, indent=2))
+
+    previous = json.loads(Path(args.compare).read_text())["results"] if args.compare else {}
+    for group, stages in report["results"].items():
+        print(f"[{group}]")
+        for name, values in stages.items():
+            line = f"  {name:<40} {values['ns_per_op']:>12.1f} ns/op {values['ops_per_s']:>14.1f} op/s"
+            old = previous.get(group, {}).get(name)
+            if old:
+                line += f"  x{old['ns_per_op'] / values['ns_per_op']:.2f} vs previous"
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,10 +4,8 @@ Example for oxigenlib with smartrace
 
 import argparse
 
-from time import sleep
-from websockets.sync.client import connect
-
 import oxigenlib as o2
+from oxigenlib.smartrace import SmartRaceBridge
 
 
 CONTINUE_LOOP = True
@@ -81,74 +79,23 @@ timer = o2.RaceTimer()
 timer.start()
 
 
-SMARTRACE_SERVER = (args.smartrace, args.port)
-SMARTRACE_SOCKET = None
-
-def init_smartrace():
-    global SMARTRACE_SOCKET
-
-    server_address = f"ws://{SMARTRACE_SERVER[0]}:{SMARTRACE_SERVER[1]}"
-
-    try:
-        SMARTRACE_SOCKET = connect(server_address)
-
-        SMARTRACE_SOCKET.send('{"type":"api_version"}')
-        for _ in range(3):
-            SMARTRACE_SOCKET.recv()
-            sleep(1/20)
-        SMARTRACE_SOCKET.send('{"type": "controller_set", "data": {"controller_id": "Z"}}')
-        sleep(1/20)
-        print("Smartrace connected")
-        return True
-    except:
-        print("Smartrace connection broken")
-        SMARTRACE_SOCKET = None
-        return False
-
-def ws_message_create(lap_time):
-    # see check_isr_data
-    # lap_time[0] is either FL (finish line), PE (pit enter), PL (pit leave)
-    # lap_time[1] is the card id: 1,2 or 3
-    # lap_time[2] is the timestamp in ms / NOTE: oxigen provides timestamps in cs not ms!!!
-    if lap_time[0] == 'FL':
-        return '{"type":"analog_lap","data":{"timestamp":' + str(lap_time[2]*10) + ',"controller_id":' + str(
-            lap_time[1]) + '}}'
-    if lap_time[0] == 'PE':
-        return '{"type":"analog_pit_enter","data":{"controller_id":' + str(lap_time[1]) + '}}'
-    if lap_time[0] == 'PL':
-        return '{"type":"analog_pit_leave","data":{"controller_id":' + str(lap_time[1]) + '}}'
-    return ''
-
-def send_smartrace_fl(car_id, time):
-    if SMARTRACE_SOCKET is not None:
-        msg = ws_message_create(('FL', car_id, time))
-        SMARTRACE_SOCKET.send(msg)
-
-def send_smartrace_pit(car_id, time, pit_enter = True):
-    if SMARTRACE_SOCKET is not None:
-        if pit_enter:
-            msg = ws_message_create(('PE', car_id, time))
-            SMARTRACE_SOCKET.send(msg)
-        else:
-            msg = ws_message_create(('PL', car_id, time))
-            SMARTRACE_SOCKET.send(msg)
+# laps and pit lane events are forwarded to SmartRace by a background thread,
+# a slow SmartRace connection does not delay the dongle
+smartrace = SmartRaceBridge(args.smartrace, args.port)
 
 
 # catch the events
 @o2.events.new_lap_event.connect
 def lap(car_id, lap_count, timestamp, laptime, info_flag):
     print(f"ID{car_id}: new lap ({lap_count}) at {timestamp}cs")
-    send_smartrace_fl(car_id, timestamp)
 
 @o2.events.pit_lane_enter_event.connect
 def pit_enter(car_id, timestamp):
     print(f"ID{car_id}: pit enter at {timestamp}cs")
-    send_smartrace_pit(car_id, timestamp, pit_enter=True)
 
 @o2.events.pit_lane_leave_event.connect
 def pit_leave(car_id, timestamp):
     print(f"ID{car_id}: pit leave at {timestamp}cs")
-    send_smartrace_pit(car_id, timestamp, pit_enter=False)
 
 @o2.events.all_cars_on_track_event.connect
 def all_cars_on_track(value, car_list):
@@ -179,14 +126,13 @@ if args.pit_speed:
 print("Oxigen configuration completed")
 
 print("Starting Smartrace websocket client...")
-if init_smartrace():
-    while CONTINUE_LOOP:
-        try:
-            o2.dongle.check_data_waiting()
-            # TODO: break loop if connection lost
-            # use websockets.exceptions.ConnectionClosed
-        except KeyboardInterrupt:
-            CONTINUE_LOOP = False
-            SMARTRACE_SOCKET.close()
-
-print('Exiting :(')
\ No newline at end of file
+smartrace.start()
+while CONTINUE_LOOP:
+    try:
+        o2.dongle.check_data_waiting()
+    except KeyboardInterrupt:
+        CONTINUE_LOOP = False
+
+print(smartrace.stats())
+smartrace.stop()
+print('Exiting :(')
@@ -2,15 +2,68 @@
 OxigenLib
 ---------
 TODO: add description
+
+The names of the package are loaded on first use, so that ``import oxigenlib`` stays fast for short-lived tools.
+Accessing ``events``, ``dongle`` or one of the functions talking to the dongle creates the library singletons,
+the modules owning them wire ``Racers`` to the dongle when imported.
 """
+import importlib
+import sys
+from types import ModuleType
+
 VERSION = "0.1"
 
-from .config import RaceState, Command, PitLaneTrigger, PitLaneCount, PowerMeanValue
-from .config import OxigenSystem
-from .events import oxigen_events as events
-from .dongle import oxigen_dongle as dongle
-from .racetimer import RaceTimer
-from .racers import *
-from .utils import *
+# name -> (module, attribute)
+_LAZY = {
+    'RaceState': ('.enums', 'RaceState'),
+    'Command': ('.enums', 'Command'),
+    'PitLaneTrigger': ('.enums', 'PitLaneTrigger'),
+    'PitLaneCount': ('.enums', 'PitLaneCount'),
+    'PowerMeanValue': ('.enums', 'PowerMeanValue'),
+    'OxigenSystem': ('.config', 'OxigenSystem'),
+    'RaceTimer': ('.racetimer', 'RaceTimer'),
+    'set_fast_path': ('.fastpath', 'set_fast_path'),
+    'fast_path_enabled': ('.fastpath', 'fast_path_enabled'),
+    'events': ('.events', 'oxigen_events'),
+    'dongle': ('.dongle', 'oxigen_dongle'),
+    'OxigenSession': ('.session', 'OxigenSession'),
+    'default_session': ('.session', 'default_session'),
+    'get_player_data': ('.racers', 'get_player_data'),
+    'set_start_config': ('.utils', 'set_start_config'),
+    'set_system_max_speed': ('.utils', 'set_system_max_speed'),
+    'set_race_state': ('.utils', 'set_race_state'),
+    'set_pit_stop_speed_limit': ('.utils', 'set_pit_stop_speed_limit'),
+    'set_car_max_speed': ('.utils', 'set_car_max_speed'),
+    'set_car_min_speed': ('.utils', 'set_car_min_speed'),
+    'set_car_max_brake': ('.utils', 'set_car_max_brake'),
+}
+
+__all__ = ['VERSION', *_LAZY]
+# package names shadowing the submodule of the same name
+_SINGLETONS = ('events', 'dongle')
+
+
+class _Package(ModuleType):
+    def __setattr__(self, name, value):
+        # the import system binds each imported submodule on the package:
+        # keep events and dongle for the singletons, loaded by __getattr__
+        if name in _SINGLETONS and isinstance(value, ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def __getattr__(name: str):
+    try:
+        module_name, attribute = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), attribute)
+    globals()[name] = value
+    return value
 
 
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
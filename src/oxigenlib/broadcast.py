@@ -0,0 +1,193 @@
+"""
+Broadcast Module
+----------------
+File: ``broadcast.py``
+
+asyncio websocket server pushing the live race state to many dashboards at once.
+
+A client receives a full snapshot of the players when it connects, then the race events as they are raised
+and, ``rate_hz`` times per second, a delta with only the fields of the cars that changed.
+All messages are JSON objects with a ``type`` key::
+
+    {"type": "snapshot", "cars": {"3": {"id": 3, "lap_count": 12, ...}, ...}}
+    {"type": "delta", "cars": {"3": {"power_mean_value": 6.3, "timestamp_msg_cs": 81234}}}
+    {"type": "event", "name": "new_lap_event", "args": [3, 13, 81200, 7.82, false]}
+
+Every client has its own bounded send queue, a slow client never delays the other clients nor the reads of the dongle.
+A client falling too far behind has its queue replaced by a new snapshot::
+
+    server = RaceStateServer(port=8765)
+    await server.start()
+    ...
+    await server.stop()
+"""
+import asyncio
+import json
+from typing import Optional
+
+import websockets
+
+from .events import Events, oxigen_events
+
+__all__ = ['RaceStateServer']
+
+# events pushed to the clients as they are raised
+_BROADCAST_EVENTS = (
+    'new_lap_event',
+    'pit_lane_enter_event',
+    'pit_lane_leave_event',
+    'track_call_event',
+    'all_cars_on_track_event',
+    'position_change_event',
+    'dongle_connected_event',
+)
+
+
+class _Client:
+    """send queue of a connected dashboard"""
+    def __init__(self, websocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.resyncs = 0
+
+
+class RaceStateServer:
+    """
+    Websocket server broadcasting players and race events
+
+    :param host: interface to listen on
+    :type host: str
+    :param port: TCP port
+    :type port: int
+    :param racers: players published by the server, ``oxigen_racers`` by default
+    :type racers: Racers
+    :param bus: events bus whose race events are published, the events of the library by default
+    :type bus: Events
+    :param rate_hz: deltas per second
+    :type rate_hz: float
+    :param queue_size: maximum number of messages waiting for a client before it gets a new snapshot
+    :type queue_size: int
+    """
+    def __init__(self, host: str = "0.0.0.0", port: int = 8765, racers=None, bus: Events = oxigen_events,
+                 rate_hz: float = 10.0, queue_size: int = 256):
+        if racers is None:
+            from .racers import oxigen_racers as racers
+        self.host = host
+        self.port = port
+        self._racers = racers
+        self._bus = bus
+        self._interval = 1 / rate_hz
+        self._queue_size = queue_size
+        self._clients: set[_Client] = set()
+        self._state: dict[str, dict] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._slots = {}
+
+    @property
+    def clients(self) -> int:
+        """number of connected clients"""
+        return len(self._clients)
+
+    async def start(self) -> None:
+        """start listening and publishing"""
+        if self._server is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._state = self._current_state()
+        for name in _BROADCAST_EVENTS:
+            slot = self._slots[name] = self._event_slot(name)
+            getattr(self._bus, name).connect(slot)
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self._ticker = asyncio.create_task(self._tick())
+
+    async def stop(self) -> None:
+        """disconnect all clients and stop the server"""
+        if self._server is None:
+            return
+        for name, slot in self._slots.items():
+            getattr(self._bus, name).disconnect(slot, missing_ok=True)
+        self._slots.clear()
+        self._ticker.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def _current_state(self) -> dict[str, dict]:
+        # the dict copy is atomic, the players may be updated by another thread
+        players = dict(self._racers.players)
+        return {str(car_id): player.model_dump() for car_id, player in players.items()}
+
+    def _snapshot(self) -> str:
+        return json.dumps({"type": "snapshot", "cars": self._state})
+
+    def _event_slot(self, name: str):
+        def slot(*args):
+            message = json.dumps({"type": "event", "name": name, "args": args})
+            # the events may be raised by the thread reading the dongle
+            try:
+                self._loop.call_soon_threadsafe(self._broadcast, message)
+            except RuntimeError:
+                # event loop already closed
+                pass
+        return slot
+
+    def _broadcast(self, message: str) -> None:
+        for client in self._clients:
+            try:
+                client.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # too far behind: skip the backlog and start again from the current state
+                client.resyncs += 1
+                while not client.queue.empty():
+                    client.queue.get_nowait()
+                client.queue.put_nowait(self._snapshot())
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            state = self._current_state()
+            previous = self._state
+            delta = {}
+            for car_id, fields in state.items():
+                old = previous.get(car_id)
+                if old is None:
+                    delta[car_id] = fields
+                    continue
+                changed = {name: value for name, value in fields.items() if old.get(name) != value}
+                if changed:
+                    delta[car_id] = changed
+            self._state = state
+            if delta and self._clients:
+                self._broadcast(json.dumps({"type": "delta", "cars": delta}))
+
+    async def _handler(self, websocket, path: str = "") -> None:
+        client = _Client(websocket, self._queue_size)
+        client.queue.put_nowait(self._snapshot())
+        self._clients.add(client)
+        sender = asyncio.create_task(self._send_loop(client))
+        try:
+            # incoming messages are ignored, reading keeps the connection state up to date
+            async for _ in websocket:
+                pass
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(client)
+            sender.cancel()
+
+    @staticmethod
+    async def _send_loop(client: _Client) -> None:
+        try:
+            while True:
+                await client.websocket.send(await client.queue.get())
+        except websockets.ConnectionClosed:
+            pass
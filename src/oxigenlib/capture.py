@@ -0,0 +1,158 @@
+"""
+Capture Module
+--------------
+File: ``capture.py``
+
+Record the raw bytes exchanged with the dongle and replay them later through the same decoding path.
+
+The log is an append-only binary file: a header followed by one record per chunk of bytes,
+each record being ``monotonic_ns`` timestamp (int64) / direction (uint8) / length (uint16) / payload.
+Recording happens in a background thread, the read loop only queues the chunks::
+
+    o2.dongle.start_recording("race.oxcap")
+    ...
+    o2.dongle.stop_recording()
+
+    # later, offline: same decoding, Racers and events as during the race
+    SerialReplayer("race.oxcap").replay(speed=10)
+"""
+from queue import SimpleQueue
+from struct import Struct
+from threading import Thread
+from time import monotonic_ns, sleep
+from typing import BinaryIO, Callable, Iterator, Optional
+
+__all__ = ['RX', 'TX', 'CaptureFormatError', 'SerialRecorder', 'SerialReplayer', 'read_records']
+
+# direction of a record
+RX = 0
+TX = 1
+
+_HEADER = b'OXCAP\x00\x01\x00'
+_RECORD = Struct('<qBH')
+# maximum payload of a record, longer chunks are split
+_MAX_CHUNK = 0xFFFF
+
+
+class CaptureFormatError(Exception):
+    pass
+
+
+class SerialRecorder:
+    """
+    Append-only recorder of the serial traffic, the file is written by a background thread
+
+    :param path: log file, created or extended
+    :type path: str
+    """
+    def __init__(self, path: str):
+        self._file: BinaryIO = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_HEADER)
+        self._queue: SimpleQueue = SimpleQueue()
+        self._thread = Thread(target=self._write_loop, name="oxigen-recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, direction: int, data: bytes) -> None:
+        """queue a chunk of bytes, timestamped now. Never blocks"""
+        if data:
+            self._queue.put((monotonic_ns(), direction, bytes(data)))
+
+    def record_rx(self, data: bytes) -> None:
+        """queue a chunk of received bytes"""
+        self.record(RX, data)
+
+    def record_tx(self, data: bytes) -> None:
+        """queue a chunk of transmitted bytes"""
+        self.record(TX, data)
+
+    def close(self) -> None:
+        """write the queued chunks and close the file"""
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _write_loop(self) -> None:
+        file = self._file
+        queue = self._queue
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+            timestamp_ns, direction, data = item
+            for start in range(0, len(data), _MAX_CHUNK):
+                chunk = data[start:start + _MAX_CHUNK]
+                file.write(_RECORD.pack(timestamp_ns, direction, len(chunk)))
+                file.write(chunk)
+            if queue.empty():
+                file.flush()
+
+
+def read_records(path: str) -> Iterator[tuple[int, int, bytes]]:
+    """
+    iterate over the records of a log file
+
+    :param path: log file
+    :type path: str
+
+    :return: iterator of (timestamp [ns], direction, data)
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(_HEADER)) != _HEADER:
+            raise CaptureFormatError(f"{path} is not an oxigenlib capture")
+        while True:
+            header = file.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                # end of file, or record truncated by a crash
+                return
+            timestamp_ns, direction, length = _RECORD.unpack(header)
+            data = file.read(length)
+            if len(data) < length:
+                return
+            yield timestamp_ns, direction, data
+
+
+class SerialReplayer:
+    """
+    Feed a log file back through the decoding path of a dongle, raising the usual events
+
+    :param path: log file
+    :type path: str
+    """
+    def __init__(self, path: str):
+        self._path = path
+
+    def replay(self, dongle=None, speed: Optional[float] = 1.0,
+               on_tx: Optional[Callable[[int, bytes], None]] = None) -> int:
+        """
+        replay the received bytes
+
+        :param dongle: Dongle instance whose decoding path is used, by default a new disconnected Dongle
+            raising the events of the library
+        :type dongle: Dongle
+        :param speed: replay speed factor, 1 for real time, None or 0 for as fast as possible
+        :type speed: float
+        :param on_tx: optional callback receiving timestamp [ns] and bytes of the recorded transmissions
+        :type on_tx: Callable
+
+        :return: number of replayed received bytes
+        """
+        if dongle is None:
+            from .dongle import Dongle
+            dongle = Dongle()
+        replayed = 0
+        first_ns = None
+        start_ns = monotonic_ns()
+        for timestamp_ns, direction, data in read_records(self._path):
+            if first_ns is None:
+                first_ns = timestamp_ns
+            if speed:
+                wait_ns = (timestamp_ns - first_ns) / speed - (monotonic_ns() - start_ns)
+                if wait_ns > 0:
+                    sleep(wait_ns / 10**9)
+            if direction == RX:
+                dongle._ingest(data)
+                replayed += len(data)
+            elif on_tx is not None:
+                on_tx(timestamp_ns, data)
+        return replayed
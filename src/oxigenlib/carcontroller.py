@@ -5,12 +5,15 @@ File: ``carcontroller.py``
 
 This module provides a convenience class CarController to transfer the input data from the dongle to other users.
 """
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 from . import constants as o2
+from . import fastpath
 from .dongle_rx import DongleRxData
 
-__all__ = ['CarController', 'decode_dongle_pkg', 'create_new_player']
+__all__ = ['CarController', 'CarControllerFast', 'decode_dongle_pkg', 'create_new_player']
 
 class CarController(BaseModel):
     """
@@ -84,22 +87,132 @@ class CarController(BaseModel):
     timestamp_msg_cs: int = Field(default_factory=int, ge=0)
 
 
-def decode_dongle_pkg(data: DongleRxData) -> CarController:
+class CarControllerFast(fastpath.FastModel):
+    """
+    Validation free counterpart of CarController, used when the fast path is enabled.
+    Fields are passed positionally in the same order of CarController, ``to_model()`` returns a CarController.
+    """
+    __slots__ = ('car_reset', 'car_controller_link', 'car_in_pit_lane', 'id', 'last_lap_time_s', 'lap_count',
+                 'power_mean_value', 'car_on_track', 'car_firmware', 'controller_firmware',
+                 'controller_batt_low', 'track_call_check', 'lap_time_info', 'arrow_up_btn', 'arrow_down_btn',
+                 'round_btn', 'timestamp_msg_cs')
+    _model = CarController
+
+    def __init__(self, car_reset: bool, car_controller_link: bool, car_in_pit_lane: bool, id: int,
+                 last_lap_time_s: float, lap_count: int, power_mean_value: float, car_on_track: bool,
+                 car_firmware: str, controller_firmware: str, controller_batt_low: bool, track_call_check: bool,
+                 lap_time_info: bool, arrow_up_btn: bool, arrow_down_btn: bool, round_btn: bool,
+                 timestamp_msg_cs: int):
+        self.car_reset = car_reset
+        self.car_controller_link = car_controller_link
+        self.car_in_pit_lane = car_in_pit_lane
+        self.id = id
+        self.last_lap_time_s = last_lap_time_s
+        self.lap_count = lap_count
+        self.power_mean_value = power_mean_value
+        self.car_on_track = car_on_track
+        self.car_firmware = car_firmware
+        self.controller_firmware = controller_firmware
+        self.controller_batt_low = controller_batt_low
+        self.track_call_check = track_call_check
+        self.lap_time_info = lap_time_info
+        self.arrow_up_btn = arrow_up_btn
+        self.arrow_down_btn = arrow_down_btn
+        self.round_btn = round_btn
+        self.timestamp_msg_cs = timestamp_msg_cs
+
+
+# firmware of a device not reported yet
+UNKNOWN_FIRMWARE = "unknown"
+
+
+def _status_flags(status: int) -> tuple[bool, bool, bool]:
+    return ((status & o2.CAR_RESET_MASK) == o2.CAR_RESET_MASK,
+            (status & o2.CAR_ONLINE_MASK) == o2.CAR_ONLINE_MASK,
+            (status & o2.CAR_IN_PIT_LANE_MASK) == o2.CAR_IN_PIT_LANE_MASK)
+
+
+def _power_values(power: int) -> tuple[float, bool]:
+    return ((power & o2.POWER_MEAN_VALUE_MASK) / 127 * 10,
+            (power & o2.CAR_ON_TRACK_MASK) == o2.CAR_ON_TRACK_MASK)
+
+
+def _buttons_flags(buttons: int) -> tuple[bool, bool, bool, bool, bool, bool]:
+    return ((buttons & o2.BATT_LOW_MASK) == o2.BATT_LOW_MASK,
+            (buttons & o2.TRACK_CALL_MASK) == o2.TRACK_CALL_MASK,
+            (buttons & o2.LAP_INFO_MASK) == o2.LAP_INFO_MASK,
+            (buttons & o2.BTN_UP_MASK) == o2.BTN_UP_MASK,
+            (buttons & o2.BTN_DOWN_MASK) == o2.BTN_DOWN_MASK,
+            (buttons & o2.BTN_ROUND_MASK) == o2.BTN_ROUND_MASK)
+
+
+def _firmware_version(firmware: int) -> tuple[bool, str]:
+    # the device bit is assumed set for the car and clear for the controller,
+    # each message reports the firmware of one of the two
+    main_release = firmware & o2.MAIN_SW_RELEASE_MASK
+    sub_release = (firmware & o2.SUB_SW_RELEASE_MASK) >> 5
+    return (firmware & o2.DEVICE_FW_MASK) == o2.DEVICE_FW_MASK, f"{main_release}.{sub_release}"
+
+
+# decoded value of every possible byte, a frame is decoded with one lookup per byte
+STATUS_TABLE = tuple(_status_flags(byte) for byte in range(256))
+POWER_TABLE = tuple(_power_values(byte) for byte in range(256))
+BUTTONS_TABLE = tuple(_buttons_flags(byte) for byte in range(256))
+FIRMWARE_TABLE = tuple(_firmware_version(byte) for byte in range(256))
+
+
+def decode_dongle_pkg(data: DongleRxData, previous: Optional[CarController] = None) -> CarController:
     """
     Convert dongle package into readable an structured CarController class
 
     :param data: class containing the received bytes from the dongle
     :type data: DongleRxData
+    :param previous: latest data of the same car. Each package reports the firmware of either the car or
+        the controller, the other one is taken from here
+    :type previous: CarController
 
-    :return: content of dongle transmission converted in easy format into class CarController
+    :return: content of dongle transmission converted in easy format into class CarController,
+        or CarControllerFast if the fast path is enabled
     :rtype: CarController
     """
+    car_reset, car_controller_link, car_in_pit_lane = STATUS_TABLE[data.status]
+    power_mean_value, car_on_track = POWER_TABLE[data.power]
+    controller_batt_low, track_call_check, lap_time_info, arrow_up_btn, arrow_down_btn, round_btn = \
+        BUTTONS_TABLE[data.buttons]
+    car_device, firmware = FIRMWARE_TABLE[data.firmware]
+    if car_device:
+        car_firmware = firmware
+        controller_firmware = previous.controller_firmware if previous is not None else UNKNOWN_FIRMWARE
+    else:
+        car_firmware = previous.car_firmware if previous is not None else UNKNOWN_FIRMWARE
+        controller_firmware = firmware
+
+    if fastpath._fast_path:
+        return CarControllerFast(
+            car_reset,
+            car_controller_link,
+            car_in_pit_lane,
+            data.id,
+            data.last_lap_time_s,
+            data.lap_count,
+            power_mean_value,
+            car_on_track,
+            car_firmware,
+            controller_firmware,
+            controller_batt_low,
+            track_call_check,
+            lap_time_info,
+            arrow_up_btn,
+            arrow_down_btn,
+            round_btn,
+            data.timestamp_msg_cs
+        )
 
     return CarController(
         # from status byte
-        car_reset =(data.status & o2.CAR_RESET_MASK) == o2.CAR_RESET_MASK,
-        car_controller_link = (data.status & o2.CAR_ONLINE_MASK) == o2.CAR_ONLINE_MASK,
-        car_in_pit_lane  = (data.status & o2.CAR_IN_PIT_LANE_MASK) == o2.CAR_IN_PIT_LANE_MASK,
+        car_reset = car_reset,
+        car_controller_link = car_controller_link,
+        car_in_pit_lane = car_in_pit_lane,
         # from id byte
         id = data.id,
         # from last_lap_time_* bytes
@@ -107,18 +220,18 @@ def decode_dongle_pkg(data: DongleRxData) -> CarController:
         # from lap_count_* bytes
         lap_count = data.lap_count,
         # from power_byte byte
-        power_mean_value = (data.power & o2.POWER_MEAN_VALUE_MASK) / 127 * 10,
-        car_on_track = (data.power & o2.CAR_ON_TRACK_MASK) == o2.CAR_ON_TRACK_MASK,
+        power_mean_value = power_mean_value,
+        car_on_track = car_on_track,
         # from firmware byte
-        car_firmware = "unknown", # TODO
-        controller_firmware = "unknown", # TODO
+        car_firmware = car_firmware,
+        controller_firmware = controller_firmware,
         # from buttons byte
-        controller_batt_low = (data.buttons & o2.BATT_LOW_MASK) == o2.BATT_LOW_MASK,
-        track_call_check = (data.buttons & o2.TRACK_CALL_MASK) == o2.TRACK_CALL_MASK,
-        lap_time_info = (data.buttons & o2.LAP_INFO_MASK) == o2.LAP_INFO_MASK,
-        arrow_up_btn = (data.buttons & o2.BTN_UP_MASK) == o2.BTN_UP_MASK,
-        arrow_down_btn = (data.buttons & o2.BTN_DOWN_MASK) == o2.BTN_DOWN_MASK,
-        round_btn = (data.buttons & o2.BTN_ROUND_MASK) == o2.BTN_ROUND_MASK,
+        controller_batt_low = controller_batt_low,
+        track_call_check = track_call_check,
+        lap_time_info = lap_time_info,
+        arrow_up_btn = arrow_up_btn,
+        arrow_down_btn = arrow_down_btn,
+        round_btn = round_btn,
         # from timer_* & lap_time_delay bytes
         timestamp_msg_cs = data.timestamp_msg_cs
     )
@@ -151,8 +264,8 @@ def create_new_player(car_id: int) -> CarController:
         power_mean_value = 0,
         car_on_track = True,
         # from firmware byte
-        car_firmware = "unknown", # TODO
-        controller_firmware = "unknown", # TODO
+        car_firmware = UNKNOWN_FIRMWARE,
+        controller_firmware = UNKNOWN_FIRMWARE,
         # from buttons byte
         controller_batt_low = False,
         track_call_check = False,
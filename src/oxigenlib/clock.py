@@ -0,0 +1,171 @@
+"""
+Clock Module
+------------
+File: ``clock.py``
+
+Relate the time of the dongle to the host clock.
+
+The timestamps of the dongle are 24 bits counters of centiseconds and wrap after about 46.6 hours.
+``DongleClock`` unwraps them into a monotonic race time and follows offset and drift of the dongle time against
+``time.monotonic_ns`` with an exponentially weighted linear regression, updated in O(1) per frame.
+Any timestamp can then be converted to host time, for example to align lap events with a video recording::
+
+    clock = DongleClock()
+    clock.attach()
+    ...
+    @o2.events.new_lap_event.connect
+    def lap(car_id, lap_count, timestamp, laptime, info_flag):
+        host_ns = clock.to_host_ns(clock.unwrap(timestamp))
+
+The host time of a frame is taken when its event is raised, the estimated offset includes the mean
+transfer delay from the dongle.
+"""
+from time import monotonic_ns
+from typing import Optional
+
+from . import constants as o2
+from .dongle_rx import DongleRxData
+from .events import Events, oxigen_events
+
+__all__ = ['DongleClock']
+
+_HALF_WRAP_CS = o2.TIMER_WRAP_CS // 2
+# nominal duration of a centisecond on the host clock
+_NS_PER_CS = 10**7
+
+
+class DongleClock:
+    """
+    Unwrapped dongle time and its mapping to the host monotonic clock
+
+    :param window: number of frames over which offset and drift are averaged
+    :type window: int
+    :param outlier_ms: frames deviating more than this from the estimated host time are ignored [ms],
+        timestamps of lap frames are moved back by the lap time delay and would bias the estimate
+    :type outlier_ms: float
+    :param max_outliers: consecutive ignored frames after which the estimate restarts, for a reset dongle timer
+    :type max_outliers: int
+    """
+    def __init__(self, window: int = 1000, outlier_ms: float = 500.0, max_outliers: int = 50):
+        self._alpha_min = 1 / window
+        self._outlier_ns = outlier_ms * 10**6
+        self._max_outliers = max_outliers
+        self._bus: Optional[Events] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """forget the unwrapping reference and the estimated offset and drift"""
+        self._last_cs: Optional[int] = None
+        self._samples = 0
+        self._outliers = 0
+        # regression of host time [ns] on race time [cs], relative to the first sample
+        self._x0 = 0
+        self._y0 = 0
+        self._mean_x = 0.0
+        self._mean_y = 0.0
+        self._var_x = 0.0
+        self._cov_xy = 0.0
+
+    @property
+    def samples(self) -> int:
+        """number of frames used by the estimate"""
+        return self._samples
+
+    @property
+    def race_time_cs(self) -> Optional[int]:
+        """unwrapped timestamp of the latest frame [cs]"""
+        return self._last_cs
+
+    def unwrap(self, timestamp_cs: int) -> int:
+        """
+        return the unwrapped race time of a 24 bits dongle timestamp [cs]
+
+        The timestamp is placed within half a wrap period (about 23 hours) of the latest observed frame,
+        so older timestamps such as lap crossings are unwrapped correctly as well.
+        """
+        last = self._last_cs
+        if last is None:
+            return timestamp_cs
+        return last + (timestamp_cs - last + _HALF_WRAP_CS) % o2.TIMER_WRAP_CS - _HALF_WRAP_CS
+
+    def observe(self, timestamp_cs: int, host_ns: Optional[int] = None) -> int:
+        """
+        add a dongle timestamp received at ``host_ns``, now by default
+
+        :param timestamp_cs: 24 bits timestamp of the dongle [cs]
+        :type timestamp_cs: int
+        :param host_ns: ``time.monotonic_ns`` when the timestamp was received
+        :type host_ns: int
+
+        :return: unwrapped race time [cs]
+        """
+        if host_ns is None:
+            host_ns = monotonic_ns()
+        race_cs = self.unwrap(timestamp_cs)
+        if self._samples == 0:
+            self._x0 = race_cs
+            self._y0 = host_ns
+        elif self._samples > 1 and abs(host_ns - self.to_host_ns(race_cs)) > self._outlier_ns:
+            self._outliers += 1
+            if self._outliers < self._max_outliers:
+                return race_cs
+            # the dongle timer jumped: restart from this frame
+            self.reset()
+            return self.observe(timestamp_cs, host_ns)
+        self._outliers = 0
+        self._last_cs = race_cs if self._last_cs is None else max(self._last_cs, race_cs)
+        self._samples += 1
+        # exponentially weighted means and covariances, plain averages while filling the window
+        alpha = max(1 / self._samples, self._alpha_min)
+        dx = race_cs - self._x0 - self._mean_x
+        dy = host_ns - self._y0 - self._mean_y
+        self._mean_x += alpha * dx
+        self._mean_y += alpha * dy
+        self._var_x = (1 - alpha) * (self._var_x + alpha * dx * dx)
+        self._cov_xy = (1 - alpha) * (self._cov_xy + alpha * dx * dy)
+        return race_cs
+
+    @property
+    def ns_per_cs(self) -> float:
+        """estimated duration of a dongle centisecond on the host clock [ns]"""
+        if self._var_x <= 0:
+            return float(_NS_PER_CS)
+        return self._cov_xy / self._var_x
+
+    @property
+    def drift_ppm(self) -> float:
+        """estimated drift of the dongle clock against the host clock [ppm], positive if the dongle is slower"""
+        return (self.ns_per_cs / _NS_PER_CS - 1) * 10**6
+
+    @property
+    def offset_ns(self) -> Optional[int]:
+        """estimated host time of race time 0 [ns]"""
+        return self.to_host_ns(0)
+
+    def to_host_ns(self, race_cs: int) -> Optional[int]:
+        """return the host ``monotonic_ns`` corresponding to an unwrapped race time, None before the first frame"""
+        if not self._samples:
+            return None
+        return self._y0 + round(self._mean_y + self.ns_per_cs * (race_cs - self._x0 - self._mean_x))
+
+    def to_race_cs(self, host_ns: int) -> Optional[float]:
+        """return the unwrapped race time corresponding to a host ``monotonic_ns``, None before the first frame"""
+        if not self._samples:
+            return None
+        return self._x0 + self._mean_x + (host_ns - self._y0 - self._mean_y) / self.ns_per_cs
+
+    def update(self, data: DongleRxData) -> None:
+        """slot for ``dongle_new_data_available_event``"""
+        self.observe(data.timestamp_msg_cs)
+
+    def attach(self, bus: Events = oxigen_events) -> None:
+        """start following the frames received on the events bus"""
+        self.detach()
+        bus.dongle_new_data_available_event.connect(self.update)
+        self._bus = bus
+
+    def detach(self) -> None:
+        """stop following the frames"""
+        if self._bus is not None:
+            self._bus.dongle_new_data_available_event.disconnect(self.update, missing_ok=True)
+            self._bus = None
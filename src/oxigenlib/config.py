@@ -3,48 +3,15 @@ config.py
 ---------
 collection of classes necessary to configure the system and enumeration types for confortable selection of the options
 """
-from enum import Enum
-from pydantic import BaseModel, Field
-from .constants import STATUS_PIT_LANE_LAP_TRIGGER_MASK, STATUS_PIT_LANE_LAP_COUNT_MASK, POWER_TRIGGER_VALUE_MASK
+from typing import Any
+from pydantic import BaseModel, Field, PrivateAttr
+from .enums import RaceState, Command, PitLaneCount, PitLaneTrigger, PowerMeanValue
 
 
 __all__ = ['O2Config', 'O2RaceStatus', 'O2Command', 'OxigenSystem',
            'RaceState', 'Command', 'PitLaneCount', 'PitLaneTrigger', 'PowerMeanValue']
 
 
-class RaceState(Enum):
-    STOPPED = 0x01
-    RUNNING = 0x03
-    PAUSED = 0x04
-    FLAGGED_LC_ON = 0x05
-    FLAGGED_LC_OFF = 0x15
-
-
-class Command(Enum):
-    NO_ACTION = 0b00000000
-    SET_PIT_LANE_SPEED = 0b00000001
-    SET_MAX_SPEED = 0b00000010
-    SET_MIN_SPEED = 0b00000011
-    SET_RF_TX_LEV = 0b00000100
-    SET_MAX_BRAKE = 0b00000101
-    SET_MIN_LAP_TME = 0b00000111
-
-
-class PitLaneTrigger(Enum):
-    ENTER = 0x00
-    LEAVE = STATUS_PIT_LANE_LAP_TRIGGER_MASK
-
-
-class PitLaneCount(Enum):
-    YES = 0x00
-    NO = STATUS_PIT_LANE_LAP_COUNT_MASK
-
-
-class PowerMeanValue(Enum):
-    TRIGGER = 0
-    PWM = POWER_TRIGGER_VALUE_MASK
-
-
 class O2Config(BaseModel):
     pit_lane_trigger: PitLaneTrigger
     pit_lane_count: PitLaneCount
@@ -76,3 +43,5 @@ class OxigenSystem(BaseModel):
     """
     race_state: O2RaceStatus
     config: O2Config
+    # cached dongle_tx.FrameEncoder, see get_frame_encoder
+    _frame_encoder: Any = PrivateAttr(default=None)
@@ -21,6 +21,9 @@ POWER_TRIGGER_VALUE_MASK = 0x80  # b'1000 0000'
 CAR_RESET_MASK = 0x01  # b'0000 0001'
 CAR_ONLINE_MASK = 0x02  # b'0000 0010'
 CAR_IN_PIT_LANE_MASK = 0x10  # b'0001 0000'
+CAR_STATUS_RESERVED_MASK = 0xE0  # b'1110 0000'
+# id byte
+MAX_CAR_ID = 20
 # power byte
 POWER_MEAN_VALUE_MASK = 0x7F  # b'0111 1111'
 CAR_ON_TRACK_MASK = 0x80  # b'1000 0000'
@@ -37,3 +40,5 @@ BTN_DOWN_MASK = 0x40 # b'0100 0000'
 BTN_ROUND_MASK = 0x80  # b'1000 0000'
 
 
+# timer bytes
+TIMER_WRAP_CS = 0x1000000  # 24 bits counter of centiseconds, wraps after about 46.6 hours
@@ -5,17 +5,59 @@ File: ``dongle.py``
 
 class and instance to communicate with the dongle
 """
+from threading import Thread
+from typing import Iterable, Iterator, Optional
+
 import serial
 
-from .dongle_rx import read_dongle_pkg, read_dongle_firmware
+from .dongle_rx import read_dongle_pkg, read_dongle_pkgs, read_dongle_firmware, RX_FRAME_LENGTH, DongleRxFramer
+from .dongle_rx import DongleRxBatch, DongleRxDuplicateFilter, DongleRxPower, SIGNIFICANT_FIELDS
 from .dongle_tx import encode_firmware_version_request, encode_free_race
-from .events import oxigen_events as events
+from .capture import SerialRecorder
+from .dongle_reader import FrameQueue, OverflowPolicy, ReaderStats
+from .events import Events, oxigen_events as events
+from .tx_scheduler import TxScheduler, TxPriority, TxPriorityStats
+
+def _in_stream_order(frames: Iterable, power_updates: list[tuple[int, DongleRxPower]]) -> Iterator:
+    """merge the decoded frames and the power changes of the dropped frames back into the order of the stream"""
+    updates = iter(power_updates)
+    update = next(updates, None)
+    for position, data in enumerate(frames):
+        while update is not None and update[0] <= position:
+            yield update[1]
+            update = next(updates, None)
+        yield data
+    while update is not None:
+        yield update[1]
+        update = next(updates, None)
+
 
 class Dongle:
-    def __init__(self):
+    """
+    Communication with one dongle
+
+    :param bus: events bus on which the received data and the connection state are raised,
+        the events of the library by default
+    :type bus: Events
+    """
+    def __init__(self, bus: Events = events):
+        self._events = bus
         self._port = ""
         self._dongle = None
         self._connected = False
+        self._framer = DongleRxFramer()
+        self._reader: Optional[Thread] = None
+        self._reader_queue: Optional[FrameQueue] = None
+        self._reader_skipped_bytes = 0
+        self._reader_failed = False
+        self._duplicate_filter: Optional[DongleRxDuplicateFilter] = None
+        self._tx_scheduler: Optional[TxScheduler] = None
+        self._recorder: Optional[SerialRecorder] = None
+
+    @property
+    def skipped_bytes(self) -> int:
+        """number of bytes discarded so far to resynchronize the stream of frames"""
+        return self._framer.skipped_bytes
 
     def connect(self, port: str) -> None:
         if self._connected:
@@ -23,54 +65,303 @@ class Dongle:
             return
         try:
             self._dongle = serial.Serial(port)
+            self._port = port
             self._connected = True
             # send firmware request
             data = encode_firmware_version_request()
-            self.send(data)
+            self._write(data)
             # read reply
             #data = read_dongle_firmware(self._dongle.read(5))
             _ = read_dongle_firmware(self._dongle.read(5))
+            self._framer.reset()
+            if self._duplicate_filter is not None:
+                self._duplicate_filter.reset()
             # TODO check that firmware is OK with this library
             # send free race so that the controller start notify themselves
             data = encode_free_race()
-            self.send(data)
+            self._write(data)
             # inform that connection was successful
-            events.dongle_connected_event.emit(True)
+            self._events.dongle_connected_event.emit(True)
 
         except serial.SerialException:
             print(f"Unable to open communication with the dongle on {port}. Try again")
-            events.dongle_connected_event.emit(False)
+            self._events.dongle_connected_event.emit(False)
 
 
     def send(self, bytes_data: bytes) -> None:
         if self._connected:
-            self._dongle.write(bytes_data)
+            if self._tx_scheduler is not None:
+                self._tx_scheduler.submit(bytes_data)
+                self._tx_scheduler.pump(self._write)
+            else:
+                self._write(bytes_data)
         else:
-            events.dongle_connected_event.emit(False)
+            self._events.dongle_connected_event.emit(False)
+
+    def enable_tx_scheduler(self, rate_hz: float = 50.0) -> None:
+        """
+        Queue the transmitted messages by priority (race state, global commands, car commands)
+        and pace the writes to the dongle. Queued messages are written while reading the dongle,
+        either by ``check_data_waiting`` or by the background reader.
+
+        :param rate_hz: maximum number of messages per second written to the dongle
+        :type rate_hz: float
+
+        :return: None
+        """
+        self._tx_scheduler = TxScheduler(rate_hz)
+
+    def disable_tx_scheduler(self) -> None:
+        """write the messages immediately again, pending messages are written straight away"""
+        scheduler = self._tx_scheduler
+        self._tx_scheduler = None
+        if scheduler is not None and self._connected:
+            scheduler.drain(self._write)
+
+    @property
+    def tx_stats(self) -> dict[TxPriority, TxPriorityStats]:
+        """transmission counters and queue latency of the scheduler for each priority class"""
+        if self._tx_scheduler is None:
+            return {}
+        return self._tx_scheduler.stats()
+
+    def _pump_tx(self) -> None:
+        if self._tx_scheduler is not None:
+            self._tx_scheduler.pump(self._write)
+
+    def _write(self, bytes_data: bytes) -> None:
+        if self._recorder is not None:
+            self._recorder.record_tx(bytes_data)
+        self._dongle.write(bytes_data)
+
+    def enable_duplicate_filter(self, fields: Iterable[str] = SIGNIFICANT_FIELDS) -> None:
+        """
+        Drop the frames that do not change any significant field of their car before decoding them.
+        Between laps most frames only differ by the timer and the power: they are neither decoded nor
+        dispatched, so ``Racers`` and the other slots only see the frames carrying news.
+        When ``power`` is not significant, dropped frames changing the power raise ``dongle_power_event``.
+
+        :param fields: fields of ``DongleRxData`` compared with the previous frame of the car, plus ``on_track``
+            for the top bit of the power byte
+        :type fields: Iterable[str]
+
+        :return: None
+        """
+        self._duplicate_filter = DongleRxDuplicateFilter(fields)
+
+    def disable_duplicate_filter(self) -> None:
+        """decode and dispatch every frame again"""
+        self._duplicate_filter = None
+
+    @property
+    def suppressed_frames(self) -> int:
+        """number of frames dropped by the duplicate filter"""
+        if self._duplicate_filter is None:
+            return 0
+        return self._duplicate_filter.suppressed_frames
+
+    def _filter_duplicates(self, frames: bytes, skipped: bool) -> tuple[bytes, list]:
+        duplicate_filter = self._duplicate_filter
+        if duplicate_filter is None:
+            return frames, []
+        if skipped:
+            # the previous frames may be corrupted
+            duplicate_filter.reset()
+        return duplicate_filter.filter(frames)
+
+    def start_recording(self, path: str) -> None:
+        """
+        Record every chunk of bytes received from and transmitted to the dongle in a capture file.
+        The file is written by a background thread and can be replayed with ``capture.SerialReplayer``
+
+        :param path: capture file, created or extended
+        :type path: str
+
+        :return: None
+        """
+        if self._recorder is None:
+            self._recorder = SerialRecorder(path)
+
+    def stop_recording(self) -> None:
+        """stop recording and close the capture file"""
+        recorder = self._recorder
+        self._recorder = None
+        if recorder is not None:
+            recorder.close()
 
     def read(self) -> None:
         if self._connected:
             """Read a chunk of 13 bytes"""
-            data = read_dongle_pkg(self._dongle.read(13))
-            events.dongle_new_data_available_event.emit(data)
+            raw_data = self._dongle.read(RX_FRAME_LENGTH)
+            if self._recorder is not None:
+                self._recorder.record_rx(raw_data)
+            data = read_dongle_pkg(raw_data)
+            self._events.dongle_new_data_available_event.emit(data)
+            self._events.flush()
+        else:
+            self._events.dongle_connected_event.emit(False)
+
+    def read_all(self, num_bytes: int) -> None:
+        """Read ``num_bytes`` and decode in one pass all the complete packages received so far"""
+        if self._connected:
+            self._ingest(self._dongle.read(num_bytes))
         else:
-            events.dongle_connected_event.emit(False)
+            self._events.dongle_connected_event.emit(False)
 
+    def _ingest(self, raw_data: bytes) -> None:
+        """frame, decode and dispatch a chunk of raw bytes received from the dongle"""
+        if self._recorder is not None:
+            self._recorder.record_rx(raw_data)
+        skipped_bytes = self._framer.skipped_bytes
+        frames = self._framer.feed(raw_data)
+        skipped = self._framer.skipped_bytes != skipped_bytes
+        if skipped:
+            # misaligned bytes were dropped to resynchronize the stream
+            self._events.dongle_flush_cache.emit()
+        frames, power_updates = self._filter_duplicates(frames, skipped)
+        if frames:
+            self._dispatch(read_dongle_pkgs(frames), power_updates)
+        else:
+            for _, update in power_updates:
+                self._events.dongle_power_event.emit(*update)
+        # end of the read cycle
+        self._events.flush()
 
-    def _flush(self, num_bytes: int) -> None:
-        self._dongle.read(num_bytes)
+    def _dispatch(self, batch: DongleRxBatch, power_updates: list[tuple[int, DongleRxPower]] = ()) -> None:
+        """raise the events for a batch of decoded packages and the power changes dropped in between"""
+        self._events.dongle_new_batch_available_event.emit(batch)
+        if not power_updates:
+            for data in batch:
+                self._events.dongle_new_data_available_event.emit(data)
+            return
+        for data in _in_stream_order(batch, power_updates):
+            if isinstance(data, DongleRxPower):
+                self._events.dongle_power_event.emit(*data)
+            else:
+                self._events.dongle_new_data_available_event.emit(data)
+
+    def start_reader(self, maxsize: int = 1024, policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST) -> None:
+        """
+        Start a background thread reading and decoding the data from the dongle.
+        The events are raised only when the consumer thread calls ``dispatch_pending``
+        (or ``check_data_waiting``), so slow slots do not delay the serial reads.
+
+        :param maxsize: maximum number of frames waiting for dispatch
+        :type maxsize: int
+        :param policy: behaviour when the queue is full
+        :type policy: OverflowPolicy
+
+        :return: None
+        """
+        if not self._connected or self._reader is not None:
+            return
+        self._reader_queue = FrameQueue(maxsize, policy, self._forget_dropped)
+        self._reader_skipped_bytes = self._framer.skipped_bytes
+        self._reader_failed = False
+        # a read timeout lets the thread notice a stop request
+        self._dongle.timeout = 0.1
+        self._reader = Thread(target=self._read_loop, name=f"oxigen-reader-{self._port}", daemon=True)
+        self._reader.start()
+
+    def stop_reader(self) -> None:
+        """stop the background thread, frames still waiting are dropped"""
+        if self._reader is None:
+            return
+        reader = self._reader
+        self._reader = None
+        self._reader_queue.close()
+        reader.join()
+        if self._reader_failed:
+            # the port is gone, it cannot be configured anymore
+            self._disconnected()
+        else:
+            self._dongle.timeout = None
+
+    def _disconnected(self) -> None:
+        """the background reader lost the dongle: report it, then release the port"""
+        self._reader_failed = False
+        self._connected = False
+        self._events.dongle_connected_event.emit(False)
+        try:
+            self._dongle.close()
+        except (serial.SerialException, OSError):
+            pass
+
+    def _forget_dropped(self, car_id: int) -> None:
+        # the duplicate filter saw the dropped frame, the next frame of the car carries the same state
+        if self._duplicate_filter is not None:
+            self._duplicate_filter.forget(car_id)
+
+    def _read_loop(self) -> None:
+        queue = self._reader_queue
+        while self._reader is not None:
+            try:
+                self._pump_tx()
+                raw_data = self._dongle.read(self._dongle.in_waiting or 1)
+            except (serial.SerialException, OSError):
+                self._reader_failed = True
+                queue.close()
+                return
+            if self._recorder is not None:
+                self._recorder.record_rx(raw_data)
+            skipped_bytes = self._framer.skipped_bytes
+            frames = self._framer.feed(raw_data)
+            frames, power_updates = self._filter_duplicates(frames, self._framer.skipped_bytes != skipped_bytes)
+            # power changes share the queue with the frames to keep the order of the stream
+            for data in _in_stream_order(read_dongle_pkgs(frames) if frames else (), power_updates):
+                queue.put(data)
+
+    def dispatch_pending(self, timeout: Optional[float] = None) -> int:
+        """
+        Raise the events for all frames collected by the background reader. To be called by the consumer thread.
+
+        :param timeout: seconds to wait for new frames, None waits forever, 0 does not wait
+        :type timeout: float
+
+        :return: number of dispatched frames
+        """
+        if self._reader_queue is None:
+            return 0
+        frames = self._reader_queue.get_all(timeout)
+        if self._framer.skipped_bytes != self._reader_skipped_bytes:
+            self._reader_skipped_bytes = self._framer.skipped_bytes
+            self._events.dongle_flush_cache.emit()
+        for data in frames:
+            if isinstance(data, DongleRxPower):
+                self._events.dongle_power_event.emit(*data)
+            else:
+                self._events.dongle_new_data_available_event.emit(data)
+        self._events.flush()
+        if self._reader_failed:
+            self.stop_reader()
+        return len(frames)
+
+    @property
+    def reader_stats(self) -> ReaderStats:
+        """counters of the background reader queue"""
+        queue = self._reader_queue
+        if queue is None:
+            return ReaderStats(depth=0, high_water=0, dropped=0, coalesced=0,
+                               skipped_bytes=self._framer.skipped_bytes)
+        return ReaderStats(
+            depth=len(queue),
+            high_water=queue.high_water,
+            dropped=queue.dropped,
+            coalesced=queue.coalesced,
+            skipped_bytes=self._framer.skipped_bytes
+        )
 
     def check_data_waiting(self) -> None:
+        if self._reader is not None:
+            # background reader running: only dispatch, waiting briefly for new frames
+            self.dispatch_pending(timeout=0.1)
+            return
         if self._connected:
+            self._pump_tx()
             bytes_in_pipeline = self._dongle.inWaiting()
-            # check if waiting pipeline matches the expectation
-            if (bytes_in_pipeline % 13) == 0:
-                # read in chunks of 13 bytes
-                self.read()
-            else:
-                # something went wrong -> flush the content of the pipeline
-                self._flush(bytes_in_pipeline)
-                events.dongle_flush_cache.emit()
+            # drain the whole backlog, partial packages are completed at the next call
+            # wait for one package if the pipeline is empty
+            self.read_all(bytes_in_pipeline or RX_FRAME_LENGTH)
 
 oxigen_dongle = Dongle()
 
@@ -79,3 +370,7 @@ oxigen_dongle = Dongle()
 def _send(bytes_data: bytes) -> None:
     # forward signal to the class instance
     oxigen_dongle.send(bytes_data)
+
+
+# the singleton racers follow the frames of the singleton dongle
+from . import racers as _racers  # noqa: E402,F401
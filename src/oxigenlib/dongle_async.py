@@ -0,0 +1,254 @@
+"""
+Async Dongle Module
+-------------------
+File: ``dongle_async.py``
+
+asyncio transport to communicate with the dongle, an alternative to polling ``Dongle.check_data_waiting``.
+The serial port is registered with the running event loop and the received bytes are decoded as soon as they arrive.
+The usual events are raised, so ``Racers`` and all the connected slots keep working::
+
+    dongle = AsyncDongle()
+    await dongle.connect("/dev/ttyACM0")
+    async for frame in dongle:
+        print(frame.id, frame.lap_count)
+"""
+import asyncio
+from typing import Optional
+
+import serial
+
+from .dongle import Dongle, _send as _singleton_send
+from .dongle_rx import DongleRxBatch, DongleRxData, DongleRxPower, read_dongle_firmware
+from .dongle_tx import encode_firmware_version_request, encode_free_race
+from .events import Events, oxigen_events
+
+__all__ = ['AsyncDongle']
+
+# length of the firmware reply of the dongle
+_FIRMWARE_REPLY_LENGTH = 5
+
+
+class AsyncDongle(Dongle):
+    """
+    Dongle driven by the asyncio event loop.
+
+    On POSIX systems the serial file descriptor is watched by the loop, elsewhere the port is polled
+    every ``poll_interval`` seconds. Decoded frames are made available through ``async for``,
+    the oldest frames are dropped if nobody consumes them and more than ``queue_size`` are waiting.
+
+    :param queue_size: maximum number of frames kept for ``async for`` consumers
+    :type queue_size: int
+    :param poll_interval: polling period in seconds, used only if the port cannot be watched by the loop
+    :type poll_interval: float
+    :param bus: events bus of the dongle, the events of the library by default
+    :type bus: Events
+    """
+    def __init__(self, queue_size: int = 1024, poll_interval: float = 0.005, bus: Events = oxigen_events):
+        super().__init__(bus)
+        self._queue_size = queue_size
+        self._poll_interval = poll_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._frames: Optional[asyncio.Queue] = None
+        self._fileno: Optional[int] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._reply = bytearray()
+        self._reply_future: Optional[asyncio.Future] = None
+        self._tx_buffer = bytearray()
+        self._tx_drained: Optional[asyncio.Future] = None
+        self._tx_handle: Optional[asyncio.TimerHandle] = None
+
+    async def connect(self, port: str) -> None:
+        """open the serial port without blocking the loop and run the dongle handshake"""
+        if self._connected:
+            print(f"Dongle on port {self._port} is already connected. Try disconnecting first")
+            return
+        self._loop = asyncio.get_running_loop()
+        try:
+            # opening the port may take a while, keep it out of the loop
+            self._dongle = await self._loop.run_in_executor(
+                None, lambda: serial.Serial(port, timeout=0, write_timeout=0)
+            )
+        except serial.SerialException:
+            print(f"Unable to open communication with the dongle on {port}. Try again")
+            self._events.dongle_connected_event.emit(False)
+            return
+
+        self._port = port
+        self._connected = True
+        self._frames = asyncio.Queue(self._queue_size)
+        self._framer.reset()
+        if self._duplicate_filter is not None:
+            self._duplicate_filter.reset()
+        self._start_reading()
+        # send firmware request and wait for the reply
+        self._reply_future = self._loop.create_future()
+        await self._send_now(encode_firmware_version_request())
+        _ = read_dongle_firmware(await self._reply_future)
+        # TODO check that firmware is OK with this library
+        # send free race so that the controller start notify themselves
+        await self._send_now(encode_free_race())
+        # the commands of the bus are written by this dongle only, not also by the singleton one
+        self._events.transmit_command_event.disconnect(_singleton_send, missing_ok=True)
+        self._events.transmit_command_event.connect(self._on_transmit)
+        # inform that connection was successful
+        self._events.dongle_connected_event.emit(True)
+
+    async def disconnect(self) -> None:
+        """stop watching the port, close it and end all ``async for`` loops"""
+        if not self._connected:
+            return
+        self._close()
+        await asyncio.sleep(0)
+
+    async def send(self, bytes_data: bytes) -> None:
+        """
+        write data to the dongle, return once the data was handed to the serial port.
+        With the TX scheduler enabled, return as soon as the data is queued
+        """
+        if not self._connected:
+            self._events.dongle_connected_event.emit(False)
+            return
+        if self._tx_scheduler is not None:
+            self._on_transmit(bytes_data)
+            return
+        await self._send_now(bytes_data)
+
+    async def _send_now(self, bytes_data: bytes) -> None:
+        self._write(bytes_data)
+        if self._tx_buffer:
+            if self._tx_drained is None:
+                self._tx_drained = self._loop.create_future()
+            await asyncio.shield(self._tx_drained)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> DongleRxData:
+        if self._frames is None:
+            raise StopAsyncIteration
+        data = await self._frames.get()
+        if data is None:
+            raise StopAsyncIteration
+        return data
+
+    def _start_reading(self) -> None:
+        try:
+            self._fileno = self._dongle.fileno()
+            self._loop.add_reader(self._fileno, self._on_readable)
+        except (AttributeError, NotImplementedError):
+            # no file descriptor available (ex. Windows): fallback to polling
+            self._fileno = None
+            self._poll_task = self._loop.create_task(self._poll())
+
+    async def _poll(self) -> None:
+        while self._connected:
+            self._on_readable()
+            if self._tx_buffer:
+                self._on_writable()
+            await asyncio.sleep(self._poll_interval)
+
+    def _on_readable(self) -> None:
+        try:
+            data = self._dongle.read(self._dongle.in_waiting or 1)
+        except (serial.SerialException, OSError):
+            self._close()
+            self._events.dongle_connected_event.emit(False)
+            return
+        if not data:
+            return
+        if self._reply_future is not None:
+            # handshake in progress: the firmware reply precedes the race messages
+            self._reply += data
+            if len(self._reply) < _FIRMWARE_REPLY_LENGTH:
+                return
+            data = bytes(self._reply[_FIRMWARE_REPLY_LENGTH:])
+            self._reply_future.set_result(bytes(self._reply[:_FIRMWARE_REPLY_LENGTH]))
+            self._reply_future = None
+            self._reply.clear()
+        if data:
+            self._ingest(data)
+
+    def _on_transmit(self, bytes_data: bytes) -> None:
+        if self._tx_scheduler is None:
+            self._write(bytes_data)
+            return
+        self._tx_scheduler.submit(bytes_data)
+        self._schedule_tx()
+
+    def _schedule_tx(self) -> None:
+        """wake up the loop when the scheduler allows the next write"""
+        if self._tx_handle is not None or self._tx_scheduler is None:
+            return
+        delay = self._tx_scheduler.next_due_in()
+        if delay is not None:
+            self._tx_handle = self._loop.call_later(delay, self._run_tx)
+
+    def _run_tx(self) -> None:
+        self._tx_handle = None
+        if self._connected and self._tx_scheduler is not None:
+            self._tx_scheduler.pump(self._write)
+            self._schedule_tx()
+
+    def _write(self, bytes_data: bytes) -> None:
+        """queue data for transmission and write as much as the port accepts right now"""
+        if not self._connected:
+            return
+        if self._recorder is not None:
+            self._recorder.record_tx(bytes_data)
+        self._tx_buffer += bytes_data
+        self._on_writable()
+
+    def _on_writable(self) -> None:
+        try:
+            written = self._dongle.write(self._tx_buffer)
+        except (serial.SerialException, OSError):
+            self._close()
+            self._events.dongle_connected_event.emit(False)
+            return
+        del self._tx_buffer[:written or 0]
+        if self._tx_buffer:
+            if self._fileno is not None:
+                self._loop.add_writer(self._fileno, self._on_writable)
+            return
+        if self._fileno is not None:
+            self._loop.remove_writer(self._fileno)
+        if self._tx_drained is not None:
+            self._tx_drained.set_result(None)
+            self._tx_drained = None
+
+    def _dispatch(self, batch: DongleRxBatch, power_updates: list[tuple[int, DongleRxPower]] = ()) -> None:
+        super()._dispatch(batch, power_updates)
+        frames = self._frames
+        for data in batch:
+            if frames.full():
+                # nobody is consuming fast enough, keep the most recent frames
+                frames.get_nowait()
+            frames.put_nowait(data)
+
+    def _close(self) -> None:
+        self._events.transmit_command_event.disconnect(self._on_transmit, missing_ok=True)
+        if self._events is oxigen_events:
+            # give the commands of the library events back to the singleton dongle
+            oxigen_events.transmit_command_event.connect(_singleton_send, unique=True)
+        if self._tx_handle is not None:
+            self._tx_handle.cancel()
+            self._tx_handle = None
+        if self._fileno is not None:
+            self._loop.remove_reader(self._fileno)
+            self._loop.remove_writer(self._fileno)
+            self._fileno = None
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        for future in (self._reply_future, self._tx_drained):
+            if future is not None and not future.done():
+                future.set_exception(serial.SerialException("dongle disconnected"))
+        self._reply_future = None
+        self._tx_drained = None
+        self._tx_buffer.clear()
+        self._connected = False
+        self._dongle.close()
+        if self._frames.full():
+            self._frames.get_nowait()
+        # wake up the consumers, the sentinel ends the iteration
+        self._frames.put_nowait(None)
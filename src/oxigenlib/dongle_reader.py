@@ -0,0 +1,143 @@
+"""
+Dongle Reader Module
+--------------------
+File: ``dongle_reader.py``
+
+Bounded queue between the background reader thread of the dongle and the thread dispatching the events.
+The queue also carries the power changes of the frames dropped by the duplicate filter, in stream order.
+When the consumer cannot keep up, the ``OverflowPolicy`` decides what happens to new frames. The duplicate filter
+only passes the frames changing the state of a car: the queue reports the frames it drops so that the filter lets
+the next frame of the car through.
+"""
+from collections import deque
+from enum import Enum
+from threading import Condition
+from typing import Callable, Optional, Union
+
+from pydantic import BaseModel
+
+from .dongle_rx import DongleRxData, DongleRxPower
+
+__all__ = ['OverflowPolicy', 'ReaderStats', 'FrameQueue']
+
+
+class OverflowPolicy(Enum):
+    # drop the oldest queued frame to make room for the new one
+    DROP_OLDEST = 0
+    # replace the most recent queued frame of the same car (a power change replaces a power change),
+    # drop the oldest if the car has none queued, or the new power change itself
+    COALESCE = 1
+    # stop reading from the serial port until the consumer makes room
+    BLOCK = 2
+
+
+class ReaderStats(BaseModel):
+    """
+    Counters of the background reader
+
+    :param depth: frames currently waiting in the queue
+    :type depth: int
+    :param high_water: maximum depth reached by the queue
+    :type high_water: int
+    :param dropped: frames lost because the queue was full
+    :type dropped: int
+    :param coalesced: frames merged with a newer frame of the same car
+    :type coalesced: int
+    :param skipped_bytes: bytes discarded to resynchronize the stream
+    :type skipped_bytes: int
+    """
+    depth: int
+    high_water: int
+    dropped: int
+    coalesced: int
+    skipped_bytes: int
+
+
+class FrameQueue:
+    """
+    Thread safe bounded queue of decoded frames
+
+    :param maxsize: maximum number of frames waiting for dispatch
+    :type maxsize: int
+    :param policy: behaviour when a frame arrives and the queue is full
+    :type policy: OverflowPolicy
+    :param on_drop: called with the car id of every frame or power change dropped, from the thread adding frames
+    :type on_drop: Callable[[int], None]
+    """
+    def __init__(self, maxsize: int = 1024, policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 on_drop: Optional[Callable[[int], None]] = None):
+        self._frames: deque = deque()
+        self._maxsize = maxsize
+        self._policy = policy
+        self._on_drop = on_drop
+        self._condition = Condition()
+        self._closed = False
+        self.high_water = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put(self, data: Union[DongleRxData, DongleRxPower]) -> None:
+        """add a frame applying the overflow policy, with ``BLOCK`` wait until there is room"""
+        frames = self._frames
+        with self._condition:
+            if len(frames) >= self._maxsize:
+                if self._policy is OverflowPolicy.BLOCK:
+                    self._condition.wait_for(lambda: len(frames) < self._maxsize or self._closed)
+                    if self._closed:
+                        return
+                elif self._policy is OverflowPolicy.COALESCE and self._coalesce(data):
+                    return
+                elif self._policy is OverflowPolicy.COALESCE and isinstance(data, DongleRxPower):
+                    # a power change never pushes a frame out
+                    self._drop(data)
+                    return
+                else:
+                    self._drop(frames.popleft())
+            frames.append(data)
+            if len(frames) > self.high_water:
+                self.high_water = len(frames)
+            self._condition.notify_all()
+
+    def _drop(self, data: Union[DongleRxData, DongleRxPower]) -> None:
+        self.dropped += 1
+        if self._on_drop is not None:
+            self._on_drop(data.id)
+
+    def _coalesce(self, data: Union[DongleRxData, DongleRxPower]) -> bool:
+        frames = self._frames
+        car_id = data.id
+        power = isinstance(data, DongleRxPower)
+        for index in range(len(frames) - 1, -1, -1):
+            queued = frames[index]
+            if queued.id == car_id and isinstance(queued, DongleRxPower) is power:
+                frames[index] = data
+                self.coalesced += 1
+                return True
+        return False
+
+    def get_all(self, timeout: Optional[float] = None) -> list[DongleRxData]:
+        """
+        remove and return all waiting frames
+
+        :param timeout: seconds to wait for at least one frame, None waits forever, 0 does not wait
+        :type timeout: float
+
+        :return: list of frames in arrival order, empty if the timeout expired
+        """
+        frames = self._frames
+        with self._condition:
+            if not frames and timeout != 0:
+                self._condition.wait_for(lambda: frames or self._closed, timeout)
+            drained = list(frames)
+            frames.clear()
+            self._condition.notify_all()
+        return drained
+
+    def close(self) -> None:
+        """wake up all waiting threads"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -3,8 +3,21 @@ dongle_rx.py
 ------------
 Decode and expose messages from the dongle
 """
+from array import array
+from operator import sub
+from sys import byteorder
 from pydantic import BaseModel
 from struct import unpack
+from typing import NamedTuple, Optional
+
+from . import fastpath
+from .constants import CAR_ON_TRACK_MASK, CAR_STATUS_RESERVED_MASK, DEVICE_FW_MASK, MAX_CAR_ID, \
+    POWER_MEAN_VALUE_MASK, TIMER_WRAP_CS
+
+_LITTLE_ENDIAN = byteorder == 'little'
+
+# length of a standard race state message from the dongle
+RX_FRAME_LENGTH = 13
 
 class BytesLengthError(Exception):
     pass
@@ -20,15 +33,48 @@ class DongleRxData(BaseModel):
     timestamp_msg_cs: int
 
 
+class DongleRxDataFast(fastpath.FastModel):
+    """
+    Validation free counterpart of DongleRxData, used when the fast path is enabled.
+    Fields are passed positionally in the same order of DongleRxData.
+    """
+    __slots__ = ('status', 'id', 'last_lap_time_s', 'lap_count', 'power', 'firmware', 'buttons',
+                 'timestamp_msg_cs')
+    _model = DongleRxData
+
+    def __init__(self, status: int, id: int, last_lap_time_s: float, lap_count: int, power: int,
+                 firmware: int, buttons: int, timestamp_msg_cs: int):
+        self.status = status
+        self.id = id
+        self.last_lap_time_s = last_lap_time_s
+        self.lap_count = lap_count
+        self.power = power
+        self.firmware = firmware
+        self.buttons = buttons
+        self.timestamp_msg_cs = timestamp_msg_cs
+
+
 def read_dongle_pkg(byte_package: bytes) -> DongleRxData:
     """ Decode 13bytes long messages (standard race state messages)
     from the dongle"""
-    if len(byte_package) != 13:
+    if len(byte_package) != RX_FRAME_LENGTH:
         raise BytesLengthError
     status_byte, id_byte, last_lap_time_h, last_lap_time_l, lap_time_delay, lap_count_l, lap_count_h, \
          power_byte, firmware_byte, buttons_byte, timer_h, timer_m, timer_l = \
          unpack('13B', byte_package)
 
+    if fastpath._fast_path:
+        return DongleRxDataFast(
+            status_byte,
+            id_byte,
+            (last_lap_time_h * 256 + last_lap_time_l)/99.25,
+            lap_count_h*256 + lap_count_l,
+            power_byte,
+            firmware_byte,
+            buttons_byte,
+            timer_h * 65536 + timer_m * 256 + timer_l - lap_time_delay
+        )
+
     return DongleRxData(
         status = status_byte,
         id = id_byte,
@@ -41,6 +87,404 @@ def read_dongle_pkg(byte_package: bytes) -> DongleRxData:
     )
 
 
+class DongleRxBatch:
+    """
+    Struct-of-arrays container for a burst of standard race state messages.
+    Each attribute is an ``array`` holding one column, the i-th element of every column
+    belongs to the i-th frame of the burst.
+
+    :var status: status bytes (``array('B')``)
+    :var id: car ids (``array('B')``)
+    :var last_lap_time_s: last lap times in seconds (``array('d')``)
+    :var lap_count: lap counters (``array('H')``)
+    :var power: power bytes (``array('B')``)
+    :var firmware: firmware bytes (``array('B')``)
+    :var buttons: buttons bytes (``array('B')``)
+    :var timestamp_msg_cs: message timestamps in centiseconds (``array('q')``)
+    """
+    __slots__ = ('status', 'id', 'last_lap_time_s', 'lap_count', 'power', 'firmware', 'buttons',
+                 'timestamp_msg_cs')
+
+    def __init__(self, status: array, id: array, last_lap_time_s: array, lap_count: array,
+                 power: array, firmware: array, buttons: array, timestamp_msg_cs: array):
+        self.status = status
+        self.id = id
+        self.last_lap_time_s = last_lap_time_s
+        self.lap_count = lap_count
+        self.power = power
+        self.firmware = firmware
+        self.buttons = buttons
+        self.timestamp_msg_cs = timestamp_msg_cs
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __getitem__(self, index: int) -> DongleRxData:
+        """return the frame at position ``index`` as a DongleRxData class"""
+        if fastpath._fast_path:
+            return DongleRxDataFast(
+                self.status[index],
+                self.id[index],
+                self.last_lap_time_s[index],
+                self.lap_count[index],
+                self.power[index],
+                self.firmware[index],
+                self.buttons[index],
+                self.timestamp_msg_cs[index]
+            )
+        return DongleRxData(
+            status = self.status[index],
+            id = self.id[index],
+            last_lap_time_s = self.last_lap_time_s[index],
+            lap_count = self.lap_count[index],
+            power = self.power[index],
+            firmware = self.firmware[index],
+            buttons = self.buttons[index],
+            timestamp_msg_cs = self.timestamp_msg_cs[index]
+        )
+
+    def __iter__(self):
+        if fastpath._fast_path:
+            # build the frames straight from the columns, skipping the per index dispatch
+            return map(DongleRxDataFast, self.status, self.id, self.last_lap_time_s, self.lap_count,
+                       self.power, self.firmware, self.buttons, self.timestamp_msg_cs)
+        return (self[index] for index in range(len(self)))
+
+
+def read_dongle_pkgs(byte_buffer: bytes) -> DongleRxBatch:
+    """ Decode a buffer made of N consecutive 13bytes long messages (standard race state messages)
+    from the dongle in a single pass. The result is returned column-wise"""
+    if len(byte_buffer) % RX_FRAME_LENGTH:
+        raise BytesLengthError
+    data = bytes(byte_buffer)
+    # strided slicing splits the buffer in one column per byte of the message
+    last_lap_time_h = data[2::RX_FRAME_LENGTH]
+    last_lap_time_l = data[3::RX_FRAME_LENGTH]
+    lap_time_delay = data[4::RX_FRAME_LENGTH]
+    lap_count_l = data[5::RX_FRAME_LENGTH]
+    lap_count_h = data[6::RX_FRAME_LENGTH]
+    timer_h = data[10::RX_FRAME_LENGTH]
+    timer_m = data[11::RX_FRAME_LENGTH]
+    timer_l = data[12::RX_FRAME_LENGTH]
+
+    return DongleRxBatch(
+        status = array('B', data[0::RX_FRAME_LENGTH]),
+        id = array('B', data[1::RX_FRAME_LENGTH]),
+        last_lap_time_s = array('d', [(h * 256 + l) / 99.25 for h, l in zip(last_lap_time_h, last_lap_time_l)]),
+        lap_count = array('H', [h * 256 + l for h, l in zip(lap_count_h, lap_count_l)]),
+        power = array('B', data[7::RX_FRAME_LENGTH]),
+        firmware = array('B', data[8::RX_FRAME_LENGTH]),
+        buttons = array('B', data[9::RX_FRAME_LENGTH]),
+        timestamp_msg_cs = array('q', [h * 65536 + m * 256 + l - d
+                                       for h, m, l, d in zip(timer_h, timer_m, timer_l, lap_time_delay)])
+    )
+
+
+def _is_frame_start(buffer: bytearray, pos: int) -> bool:
+    """check the protocol invariants of a frame starting at ``pos``: valid car id and reserved status bits clear"""
+    return buffer[pos + 1] <= MAX_CAR_ID and not (buffer[pos] & CAR_STATUS_RESERVED_MASK)
+
+
+def _frame_timer(buffer: bytearray, pos: int) -> int:
+    """raw 24 bits dongle timer of the frame starting at ``pos``"""
+    return buffer[pos + 10] << 16 | buffer[pos + 11] << 8 | buffer[pos + 12]
+
+
+def _timer_column(buffer: bytearray, pos: int, end: int) -> array:
+    """raw dongle timers of the aligned frames between ``pos`` and ``end``, unpacked in one pass"""
+    count = (end - pos) // RX_FRAME_LENGTH
+    # spread the three timer bytes of each frame into big endian 32 bits integers
+    packed = bytearray(4 * count)
+    packed[1::4] = buffer[pos + 10:end:RX_FRAME_LENGTH]
+    packed[2::4] = buffer[pos + 11:end:RX_FRAME_LENGTH]
+    packed[3::4] = buffer[pos + 12:end:RX_FRAME_LENGTH]
+    timers = array('I', packed)
+    if _LITTLE_ENDIAN:
+        timers.byteswap()
+    return timers
+
+
+class DongleRxFramer:
+    """
+    Incremental framer for the stream of standard race state messages.
+
+    Received bytes are appended to a persistent buffer, partial frames are kept until the next read.
+    A frame is valid if it keeps the protocol invariants (car id 0-20, reserved status bits clear) and if its
+    dongle timer follows the one of the previous frame by at most ``max_timer_step_cs``. The timer check catches
+    a stream shifted by one byte, which keeps the other invariants.
+    The framer looks for a frame boundary at start, after ``reset`` and after an invalid frame: it skips bytes up to
+    the next position where ``resync_frames`` consecutive frames are valid and their timer advances. Views of the
+    stream shifted onto constant fields (lap time, lap count) keep a constant timer and are never accepted.
+    If several of the 13 possible offsets pass, the one whose timer is the closest to the last valid frame wins,
+    without a known timer the decision is delayed by one frame. The run must span a tick of the dongle timer,
+    ``resync_frames`` must be larger than the frames sent in a centisecond.
+    A single corrupted byte costs a few frames instead of the whole backlog. A pause of the dongle longer than
+    ``max_timer_step_cs`` costs two frames.
+
+    :param resync_frames: consecutive valid frames needed to accept a new frame boundary
+    :type resync_frames: int
+    :param max_timer_step_cs: maximum timer increase between two consecutive frames [cs]
+    :type max_timer_step_cs: int
+
+    :var skipped_bytes: total number of bytes discarded to resynchronize the stream
+    """
+    def __init__(self, resync_frames: int = 12, max_timer_step_cs: int = 100):
+        self._buffer = bytearray()
+        self._resync_frames = resync_frames
+        self._max_timer_step = max_timer_step_cs
+        self._synced = False
+        self._last_timer: Optional[int] = None
+        self.skipped_bytes = 0
+
+    def _follows(self, previous: Optional[int], timer: int) -> bool:
+        return previous is None or (timer - previous) % TIMER_WRAP_CS <= self._max_timer_step
+
+    def _accept_all(self, buffer: bytearray, pos: int, aligned_end: int) -> bool:
+        """check all aligned frames at once, the common case of a clean stream"""
+        if max(buffer[pos + 1:aligned_end:RX_FRAME_LENGTH]) > MAX_CAR_ID or \
+                any(status & CAR_STATUS_RESERVED_MASK for status in buffer[pos:aligned_end:RX_FRAME_LENGTH]):
+            return False
+        previous = self._last_timer
+        max_step = self._max_timer_step
+        timers = _timer_column(buffer, pos, aligned_end)
+        if previous is not None and (timers[0] - previous) % TIMER_WRAP_CS > max_step:
+            return False
+        if len(timers) > 1:
+            steps = list(map(sub, timers[1:], timers))
+            # negative steps are either a timer wrap or a misaligned view
+            if max(steps) > max_step or (min(steps) < 0 and
+                                         any(step % TIMER_WRAP_CS > max_step for step in steps)):
+                return False
+        self._last_timer = timers[-1]
+        return True
+
+    def _accept(self, buffer: bytearray, pos: int) -> bool:
+        if not _is_frame_start(buffer, pos):
+            return False
+        timer = _frame_timer(buffer, pos)
+        if not self._follows(self._last_timer, timer):
+            return False
+        self._last_timer = timer
+        return True
+
+    def _run_advance(self, buffer: bytearray, pos: int) -> int:
+        """timer advance over ``resync_frames`` frames starting at ``pos``, 0 if any of them is invalid"""
+        if not _is_frame_start(buffer, pos):
+            return 0
+        first = previous = _frame_timer(buffer, pos)
+        for start in range(pos + RX_FRAME_LENGTH, pos + RX_FRAME_LENGTH * self._resync_frames, RX_FRAME_LENGTH):
+            if not _is_frame_start(buffer, start):
+                return 0
+            timer = _frame_timer(buffer, start)
+            if not self._follows(previous, timer):
+                return 0
+            previous = timer
+        return (previous - first) % TIMER_WRAP_CS
+
+    def _distance(self, timer: int) -> int:
+        """distance of ``timer`` from the last valid frame, in either direction [cs]"""
+        step = (timer - self._last_timer) % TIMER_WRAP_CS
+        return min(step, TIMER_WRAP_CS - step)
+
+    def _resync(self, buffer: bytearray, pos: int, end: int) -> int:
+        """
+        skip bytes up to the next frame boundary, the offset is chosen among the 13 possible ones: views of the
+        stream shifted by a few bytes may also look valid for a while
+        """
+        # all the 13 possible offsets must be checked
+        needed = RX_FRAME_LENGTH * (self._resync_frames + 1) - 1
+        while end - pos >= needed:
+            # the timer of a view shifted onto constant fields does not advance
+            candidates = [candidate for candidate in range(pos, pos + RX_FRAME_LENGTH)
+                          if self._run_advance(buffer, candidate)]
+            best = None
+            if self._last_timer is not None and candidates:
+                distance, best = min((self._distance(_frame_timer(buffer, candidate)), candidate)
+                                     for candidate in candidates)
+                if distance > self._max_timer_step:
+                    # the dongle paused, the last timer was corrupted or the frame is: the offsets are compared
+                    # again from the next frame on, by themselves
+                    best = None
+                    self._last_timer = None
+            elif len(candidates) == 1:
+                best = candidates[0]
+            if best is None:
+                pos += RX_FRAME_LENGTH
+                self.skipped_bytes += RX_FRAME_LENGTH
+                continue
+            self.skipped_bytes += best - pos
+            self._synced = True
+            self._last_timer = None
+            return best
+        return pos
+
+    def feed(self, data: bytes) -> bytes:
+        """
+        add received bytes to the stream and return all complete frames found so far
+
+        :param data: bytes read from the dongle
+        :type data: bytes
+
+        :return: N consecutive 13bytes long frames, ready for ``read_dongle_pkgs``
+        :rtype: bytes
+        """
+        buffer = self._buffer
+        buffer += data
+        end = len(buffer)
+        pos = 0
+        frames = bytearray()
+        while end - pos >= RX_FRAME_LENGTH:
+            if not self._synced:
+                pos = self._resync(buffer, pos, end)
+                if not self._synced:
+                    # wait for more data to confirm a frame boundary
+                    break
+            aligned_end = pos + (end - pos) // RX_FRAME_LENGTH * RX_FRAME_LENGTH
+            # fast path: accept all aligned frames at once if they are all valid
+            if self._accept_all(buffer, pos, aligned_end):
+                frames += buffer[pos:aligned_end]
+                pos = aligned_end
+                break
+            # slow path: walk frame by frame up to the invalid one, then look for the next frame boundary
+            while aligned_end - pos >= RX_FRAME_LENGTH and self._accept(buffer, pos):
+                frames += buffer[pos:pos + RX_FRAME_LENGTH]
+                pos += RX_FRAME_LENGTH
+            if end - pos >= RX_FRAME_LENGTH:
+                self._synced = False
+                pos += 1
+                self.skipped_bytes += 1
+        # bytearray keeps an offset to its start, dropping consumed bytes does not move the tail
+        del buffer[:pos]
+        return bytes(frames)
+
+    def pending(self) -> int:
+        """return the number of bytes of an incomplete frame waiting for the next read"""
+        return len(self._buffer)
+
+    def reset(self) -> None:
+        """drop any incomplete frame, to be used after (re)connecting to the dongle"""
+        self._buffer.clear()
+        self._synced = False
+        self._last_timer = None
+
+
+# field of DongleRxData -> (byte offset in the frame, bits) compared by DongleRxDuplicateFilter,
+# ``on_track`` is the top bit of the power byte
+RX_FRAME_FIELDS = {
+    'status': ((0, 0xFF),),
+    'last_lap_time_s': ((2, 0xFF), (3, 0xFF), (4, 0xFF)),
+    'lap_count': ((5, 0xFF), (6, 0xFF)),
+    'power': ((7, POWER_MEAN_VALUE_MASK),),
+    'on_track': ((7, CAR_ON_TRACK_MASK),),
+    'firmware': ((8, 0xFF),),
+    'buttons': ((9, 0xFF),),
+    'timestamp_msg_cs': ((10, 0xFF), (11, 0xFF), (12, 0xFF)),
+}
+# fields checked by default: everything but the power mean value and the timer
+SIGNIFICANT_FIELDS = ('status', 'last_lap_time_s', 'lap_count', 'on_track', 'firmware', 'buttons')
+
+
+class DongleRxPower(NamedTuple):
+    """power change of a frame dropped by ``DongleRxDuplicateFilter``, arguments of ``dongle_power_event``"""
+    id: int
+    power: int
+    timestamp_msg_cs: int
+
+
+class DongleRxDuplicateFilter:
+    """
+    Drop the frames that do not change any significant field of their car.
+
+    Each frame is compared with the previous frame kept for the same car, on the bits of the ``fields``
+    only (see ``RX_FRAME_FIELDS``). Frames repeating the known state are neither decoded nor dispatched.
+    The firmware byte alternates between the car and the controller: it is compared with the previous
+    report of the same device.
+
+    :param fields: names of the significant fields
+    :type fields: Iterable[str]
+
+    :var suppressed_frames: total number of frames dropped
+    """
+    def __init__(self, fields=SIGNIFICANT_FIELDS):
+        fields = tuple(fields)
+        unknown = set(fields) - RX_FRAME_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"unknown frame fields {sorted(unknown)}")
+        self.fields = fields
+        mask = 0
+        for name in fields:
+            if name == 'firmware':
+                continue
+            for offset, bits in RX_FRAME_FIELDS[name]:
+                mask |= bits << (8 * (RX_FRAME_LENGTH - 1 - offset))
+        self._mask = mask
+        self._firmware = 'firmware' in fields
+        self._power = 'power' not in fields
+        self.suppressed_frames = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """forget the previous frames, the next frame of every car goes through"""
+        # indexed by car id, firmware by car id * 2 + device bit
+        self._previous = [None] * (MAX_CAR_ID + 1)
+        self._previous_firmware = [None] * (2 * MAX_CAR_ID + 2)
+        self._previous_power = [None] * (MAX_CAR_ID + 1)
+
+    def forget(self, car_id: int) -> None:
+        """forget the previous frames of one car, its next frame goes through"""
+        self._previous[car_id] = None
+        self._previous_firmware[car_id * 2] = None
+        self._previous_firmware[car_id * 2 + 1] = None
+        self._previous_power[car_id] = None
+
+    def filter(self, frames: bytes) -> tuple[bytes, list[tuple[int, DongleRxPower]]]:
+        """
+        split aligned frames into significant frames and power updates
+
+        :param frames: N consecutive 13bytes long frames, as returned by ``DongleRxFramer.feed``
+        :type frames: bytes
+
+        :return: significant frames ready for ``read_dongle_pkgs`` / power changes of the dropped frames, only when
+            ``power`` is not a significant field, each with the number of significant frames preceding it in the stream
+        """
+        mask = self._mask
+        previous = self._previous
+        previous_firmware = self._previous_firmware
+        previous_power = self._previous_power
+        check_firmware = self._firmware
+        check_power = self._power
+        from_bytes = int.from_bytes
+        kept = bytearray()
+        power_updates = []
+        suppressed = 0
+        kept_frames = 0
+        # strided slicing gives the columns used for every frame in one pass
+        for offset, car_id, power, firmware in zip(range(0, len(frames), RX_FRAME_LENGTH),
+                                                   frames[1::RX_FRAME_LENGTH], frames[7::RX_FRAME_LENGTH],
+                                                   frames[8::RX_FRAME_LENGTH]):
+            frame = frames[offset:offset + RX_FRAME_LENGTH]
+            state = from_bytes(frame, 'big') & mask
+            changed = state != previous[car_id]
+            if check_firmware:
+                device = car_id * 2 + (1 if firmware & DEVICE_FW_MASK else 0)
+                if firmware != previous_firmware[device]:
+                    previous_firmware[device] = firmware
+                    changed = True
+            if changed:
+                previous[car_id] = state
+                previous_power[car_id] = power
+                kept += frame
+                kept_frames += 1
+                continue
+            suppressed += 1
+            if check_power and power != previous_power[car_id]:
+                previous_power[car_id] = power
+                power_updates.append((kept_frames, DongleRxPower(
+                    car_id, power, (frame[10] << 16 | frame[11] << 8 | frame[12]) - frame[4])))
+        self.suppressed_frames += suppressed
+        return bytes(kept), power_updates
+
+
 class DongleRxFirmware(BaseModel):
     fw_major: int
     fw_minor: int
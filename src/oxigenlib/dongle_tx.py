@@ -3,12 +3,11 @@ dongle_tx.py
 ------------
 Decode and send messages from the dongle
 """
-from struct import pack
-
 #from . import config
 #from . import constants as o2
 from .racetimer import RaceTimer
-from .config import O2Config, O2RaceStatus, O2Command, Command
+from .config import O2Config, O2RaceStatus, O2Command, Command, OxigenSystem
+from .frames import FIRMWARE_VERSION_REQUEST, FREE_RACE, race_status_frame, command_frame
 
 # TODO: protocols?!
 #__all__ = ['encode_race_status', 'encode_command']
@@ -25,46 +24,9 @@ def encode_race_status(race: O2RaceStatus, cfg: O2Config, ts: RaceTimer) -> byte
             Returns:
                     bytes: byte array ready to be sent to the dongle
     """
-    # TODO: coupling! how to access value better?
-    byte0 = race.race_status.value | cfg.pit_lane_count.value | cfg.pit_lane_trigger.value
-    byte1 = race.max_speed
-    byte2 = 0x00 # controller ID
-    byte3 = 0x00 # global command
-    byte4 = 0x00 # command argument
-    byte5 = 0x80 # car command / no command
-    byte6 = 0x00 # command argument
-    byte7 = cfg.power_mean_value.value
-
-    # race start
-    return pack('11B', byte0, byte1, byte2, byte3, byte4, byte5, byte6, byte7, *ts.value_cs_bytes())
-
-
-def _encode_global_command(race: O2RaceStatus, cfg: O2Config, cmd: O2Command, ts: RaceTimer) -> bytes:
-    byte0 = 0x06 | cfg.pit_lane_count.value | cfg.pit_lane_trigger.value
-    byte1 = race.max_speed
-    byte2 = 0x00  # controller ID
-    byte3 = cmd.command.value # global command
-    byte4 = cmd.command_arg  # command argument
-    byte5 = 0x80 | Command.NO_ACTION.value  # car command / no action
-    byte6 = 0x00  # command argument
-    byte7 = cfg.power_mean_value.value
-
-    # race start
-    return pack('11B', byte0, byte1, byte2, byte3, byte4, byte5, byte6, byte7, *ts.value_cs_bytes())
-
-
-def _encode_car_command(race: O2RaceStatus, cfg: O2Config, cmd: O2Command, ts: RaceTimer) -> bytes:
-    byte0 = 0x06 | cfg.pit_lane_count.value | cfg.pit_lane_trigger.value
-    byte1 = race.max_speed
-    byte2 = cmd.id  # controller ID
-    byte3 = Command.NO_ACTION.value  # global command / no action
-    byte4 = 0x00 # command argument
-    byte5 = 0x80 | cmd.command.value  # car command
-    byte6 = cmd.command_arg  # command argument
-    byte7 = cfg.power_mean_value.value
-
-    # race start
-    return pack('11B', byte0, byte1, byte2, byte3, byte4, byte5, byte6, byte7, *ts.value_cs_bytes())
+    return race_status_frame(race.race_status, race.max_speed, cfg.pit_lane_trigger, cfg.pit_lane_count,
+                             cfg.power_mean_value, ts.value_cs())
+
 
 def encode_command(race: O2RaceStatus, cfg: O2Config, cmd: O2Command, ts: RaceTimer) -> bytes:
     """
@@ -79,19 +41,102 @@ def encode_command(race: O2RaceStatus, cfg: O2Config, cmd: O2Command, ts: RaceTi
             Returns:
                     bytes: byte array ready to be sent to the dongle
     """
-    if cmd.id == 0:  # global command
-        return _encode_global_command(race, cfg, cmd, ts)
-    else:  # car specific command
-        return _encode_car_command(race, cfg, cmd, ts)
+    return command_frame(cmd.id, cmd.command, cmd.command_arg, race.max_speed, cfg.pit_lane_trigger,
+                         cfg.pit_lane_count, cfg.power_mean_value, ts.value_cs())
 
 def encode_firmware_version_request() -> bytes:
     """
     return the byte array to transmit to the dongle to request its firmware version
     """
-    return pack('11B', 0x06, 0x06, 0x06, 0x06, 0x00, 0x00, 0x00, 0x01, 0x00, 0x00, 0x00)
+    return FIRMWARE_VERSION_REQUEST
 
 def encode_free_race() -> bytes:
     """
     return the byte array to transmit to the dongle to initiate a free race session
     """
-    return pack('11B', 0x0F, 0xFF, 0x00, 0x00, 0x00, 0x80, 0x00, 0x80, 0x00, 0x00, 0x00)
+    return FREE_RACE
+
+
+class FrameEncoder:
+    """
+    Encoder bound to an ``OxigenSystem``, producing the same bytes of ``encode_race_status`` and ``encode_command``.
+
+    The messages are kept as templates, rebuilt only when the race state or the configuration of the system
+    change. Each call copies a template and patches the command and the 3 timer bytes in the copy:
+    the encoder can be shared between threads.
+
+    :param system: system whose race state and configuration are encoded
+    :type system: OxigenSystem
+    """
+    def __init__(self, system: OxigenSystem):
+        self._system = system
+        # race status, global command and car command templates, replaced as a whole
+        self._templates = (bytes(11), bytes(11), bytes(11))
+        # values the templates were built with
+        self._key = None
+
+    def _sync(self) -> tuple[bytes, bytes, bytes]:
+        """return the templates, rebuilt if race state or configuration changed"""
+        race = self._system.race_state
+        cfg = self._system.config
+        key = (race.race_status, race.max_speed, cfg.pit_lane_count, cfg.pit_lane_trigger, cfg.power_mean_value)
+        if key == self._key:
+            return self._templates
+        # the templates come from ``frames``, the command fields are patched by ``encode_command``
+        options = (race.max_speed, cfg.pit_lane_trigger, cfg.pit_lane_count, cfg.power_mean_value, 0)
+        templates = (race_status_frame(race.race_status, *options),
+                     command_frame(0, Command.NO_ACTION, 0x00, *options),
+                     command_frame(1, Command.NO_ACTION, 0x00, *options))
+        # templates before key: a thread seeing the new key finds the new templates
+        self._templates = templates
+        self._key = key
+        return templates
+
+    @staticmethod
+    def _set_timer(msg: bytearray, ts: RaceTimer) -> None:
+        # oxigen protocol count time as 24bits int
+        time = ts.value_cs()
+        msg[8] = (time >> 16) & 0xFF
+        msg[9] = (time >> 8) & 0xFF
+        msg[10] = time & 0xFF
+
+    def encode_race_status(self, ts: RaceTimer) -> bytes:
+        """return the bytes of ``encode_race_status`` for the bound system"""
+        msg = bytearray(self._sync()[0])
+        self._set_timer(msg, ts)
+        return bytes(msg)
+
+    def encode_command(self, cmd: O2Command, ts: RaceTimer) -> bytes:
+        """return the bytes of ``encode_command`` for the bound system"""
+        car_id = cmd.id
+        if not 0 <= car_id <= 20:
+            raise ValueError(f"car id {car_id} out of range 0-20")
+        templates = self._sync()
+        if car_id == 0:  # global command
+            msg = bytearray(templates[1])
+            msg[3] = cmd.command._value_
+            msg[4] = cmd.command_arg
+        else:  # car specific command
+            msg = bytearray(templates[2])
+            msg[2] = car_id
+            msg[5] = 0x80 | cmd.command._value_
+            msg[6] = cmd.command_arg
+        self._set_timer(msg, ts)
+        return bytes(msg)
+
+
+def get_frame_encoder(system: OxigenSystem) -> FrameEncoder:
+    """
+    return the encoder bound to ``system``, created at the first call and then reused
+
+    :param system: system whose messages are encoded
+    :type system: OxigenSystem
+
+    :return: encoder of the system
+    :rtype: FrameEncoder
+    """
+    encoder = system._frame_encoder
+    if encoder is None:
+        encoder = FrameEncoder(system)
+        system._frame_encoder = encoder
+    return encoder
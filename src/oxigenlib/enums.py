@@ -0,0 +1,46 @@
+"""
+Enums Module
+------------
+File: ``enums.py``
+
+enumeration types for confortable selection of the options, free of third party dependencies.
+They are also available from ``config`` and from the oxigenlib name space.
+"""
+from enum import Enum
+
+from .constants import STATUS_PIT_LANE_LAP_TRIGGER_MASK, STATUS_PIT_LANE_LAP_COUNT_MASK, POWER_TRIGGER_VALUE_MASK
+
+__all__ = ['RaceState', 'Command', 'PitLaneCount', 'PitLaneTrigger', 'PowerMeanValue']
+
+
+class RaceState(Enum):
+    STOPPED = 0x01
+    RUNNING = 0x03
+    PAUSED = 0x04
+    FLAGGED_LC_ON = 0x05
+    FLAGGED_LC_OFF = 0x15
+
+
+class Command(Enum):
+    NO_ACTION = 0b00000000
+    SET_PIT_LANE_SPEED = 0b00000001
+    SET_MAX_SPEED = 0b00000010
+    SET_MIN_SPEED = 0b00000011
+    SET_RF_TX_LEV = 0b00000100
+    SET_MAX_BRAKE = 0b00000101
+    SET_MIN_LAP_TME = 0b00000111
+
+
+class PitLaneTrigger(Enum):
+    ENTER = 0x00
+    LEAVE = STATUS_PIT_LANE_LAP_TRIGGER_MASK
+
+
+class PitLaneCount(Enum):
+    YES = 0x00
+    NO = STATUS_PIT_LANE_LAP_COUNT_MASK
+
+
+class PowerMeanValue(Enum):
+    TRIGGER = 0
+    PWM = POWER_TRIGGER_VALUE_MASK
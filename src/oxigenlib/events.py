@@ -14,9 +14,22 @@ Connection slot to event signals requires the connect decorator::
         print(f"ID{car_id}: new lap ({lap_count}) at {timestamp}cs")
         send_smartrace_fl(car_id, timestamp * 10)
 """
+from time import monotonic
+from typing import Callable, Hashable, Iterable, Optional
+
 from psygnal import Signal
 
-from .dongle_rx import DongleRxData
+from .dongle_rx import DongleRxData, DongleRxBatch
+
+# events collected by default in the batches
+BATCHED_EVENTS = (
+    'new_lap_event',
+    'pit_lane_enter_event',
+    'pit_lane_leave_event',
+    'track_call_event',
+    'all_cars_on_track_event',
+    'position_change_event',
+)
 
 
 class Events:
@@ -25,18 +38,26 @@ class Events:
 
     List of available events
 
-    :var dongle_flush_cache: ``type: Signal()`` in case of misalignment in payload bytes, it can be used to flush the dongle cache
+    :var dongle_flush_cache: ``type: Signal()`` raised in case of misalignment in payload bytes, when bytes were skipped to resynchronize the stream
     :var new_lap_event: ``type: Signal(int, int, int, float, bool)`` raised when new lap event occur -> id / car_laps_count / timestamp [centiseconds] / laptime [seconds] / info_flag
     :var pit_lane_enter_event: ``type: Signal(int, int)`` raised when a car enter the pit lane -> car id / timestamp [centiseconds]
     :var pit_lane_leave_event: ``type: Signal(int, int)`` raised when a car leaves the pit lane -> car id / timestamp [centiseconds]
-    :var track_call_event: ``type: Signal(bool, list)`` track button was pressed -> flag true-false / list of car ids with track call pressed
-    :var all_cars_on_track_event: ``type: Signal(bool, list)`` flag raised when at least one car deslotted or when all cars are back on track -> flag true-false / list of car ids off-track
+    :var track_call_event: ``type: Signal(bool, list, list)`` raised when the track call state changes -> flag true-false / list of car ids with track call pressed / list of car ids that changed state
+    :var position_change_event: ``type: Signal(list, list)`` raised by ``Standings`` when the order of the race changes -> list of car ids ordered by position / list of car ids that changed position
+    :var power_aggregate_event: ``type: Signal(object)`` raised by ``PowerAggregator`` at the end of a power window or lap -> PowerAggregate
+    :var all_cars_on_track_event: ``type: Signal(bool, list, list)`` raised when a car deslots or gets back on track -> flag all cars on track true-false / list of car ids off-track / list of car ids that changed state
 
     The following events are also available but internally used. Only for advance users
 
     :var dongle_connected_event: ``type: Signal(bool_connecting_result)`` raised after a connect attempt, return the result of the connection attempt
     :var transmit_command_event: ``type: Signal(bytes_data_payload)`` data ready to be sent to the dongle, payload attached
     :var dongle_new_data_available_event: ``type: Signal(DongleRxData)`` data package received from the dongle, the payload is already converted into a DongleRxData class
+    :var dongle_new_batch_available_event: ``type: Signal(DongleRxBatch)`` all data packages read from the dongle in one pass, the payload is a column-wise DongleRxBatch class
+    :var dongle_power_event: ``type: Signal(int, int, int)`` frame dropped by the duplicate filter of the dongle that only changed the power -> car id / power byte / timestamp [centiseconds]
+
+    Batched delivery, see ``enable_batching``
+
+    :var event_batch_event: ``type: Signal(list)`` all events raised during one or more read cycles -> list of (event name, arguments tuple)
     """
 
     # dongle events
@@ -45,7 +66,11 @@ class Events:
     transmit_command_event = Signal(bytes)
     # new data arrived from the dongle
     dongle_new_data_available_event = Signal(DongleRxData)
-    # dongle wrong cache length - need flush
+    # all data drained from the dongle in one read cycle
+    dongle_new_batch_available_event = Signal(DongleRxBatch)
+    # power only change of a frame dropped as duplicate : id / power byte / timestamp
+    dongle_power_event = Signal(int, int, int)
+    # dongle misaligned payload - bytes skipped to resync
     dongle_flush_cache = Signal()
 
     # module events
@@ -54,8 +79,137 @@ class Events:
     # pit enter-leave : event id / timestamp
     pit_lane_enter_event = Signal(int, int)
     pit_lane_leave_event = Signal(int, int)
-    # global event
-    track_call_event = Signal(bool, list)
-    all_cars_on_track_event = Signal(bool, list)
+    # standings : ordered ids / ids that changed position
+    position_change_event = Signal(list, list)
+    # power aggregator : PowerAggregate record
+    power_aggregate_event = Signal(object)
+    # global event, raised only on change : flag / ids in state / changed ids
+    track_call_event = Signal(bool, list, list)
+    all_cars_on_track_event = Signal(bool, list, list)
+
+    # batched delivery : list of (event name, arguments)
+    event_batch_event = Signal(list)
+
+    def __init__(self):
+        self._batch: list[tuple[str, tuple]] = []
+        self._batch_slots: dict[str, Callable] = {}
+        self._batch_interval = 0.0
+        self._last_batch = 0.0
+        self._throttles: dict[Callable, _Throttle] = {}
+
+    def enable_batching(self, names: Iterable[str] = BATCHED_EVENTS, rate_hz: Optional[float] = None) -> None:
+        """
+        Collect the events raised during a read cycle of the dongle and deliver them together
+        with ``event_batch_event``. The slots connected to the single events keep receiving them.
+
+        :param names: names of the collected events
+        :type names: Iterable[str]
+        :param rate_hz: maximum number of batches per second, the events of several read cycles are merged
+            in one batch. By default one batch per read cycle
+        :type rate_hz: float
+
+        :return: None
+        """
+        self.disable_batching()
+        for name in names:
+            slot = self._batch_slots[name] = self._collector(name)
+            getattr(self, name).connect(slot)
+        self._batch_interval = 1 / rate_hz if rate_hz else 0.0
+
+    def disable_batching(self) -> None:
+        """stop collecting events, the events collected so far are delivered"""
+        self.flush(force=True)
+        for name, slot in self._batch_slots.items():
+            getattr(self, name).disconnect(slot, missing_ok=True)
+        self._batch_slots.clear()
+
+    def _collector(self, name: str) -> Callable:
+        append = self._batch.append
+
+        def collect(*args):
+            append((name, args))
+        return collect
+
+    def connect_throttled(self, name: str, slot: Callable, rate_hz: float,
+                          key: Optional[Callable[..., Hashable]] = None) -> None:
+        """
+        Connect a slot receiving an event at most ``rate_hz`` times per second.
+        Events arriving faster are not delivered, except the latest one which is delivered once the interval elapsed.
+
+        :param name: name of the event, for example ``dongle_new_data_available_event``
+        :type name: str
+        :param slot: callable receiving the arguments of the event
+        :type slot: Callable
+        :param rate_hz: maximum number of calls per second, for each key
+        :type rate_hz: float
+        :param key: callable receiving the arguments of the event and returning the key of an independent limit,
+            for example ``lambda data: data.id`` limits each car separately
+        :type key: Callable
+
+        :return: None
+        """
+        self.disconnect_throttled(slot)
+        throttle = self._throttles[slot] = _Throttle(name, slot, 1 / rate_hz, key)
+        getattr(self, name).connect(throttle)
+
+    def disconnect_throttled(self, slot: Callable) -> None:
+        """disconnect a slot connected with ``connect_throttled``, the pending events are dropped"""
+        throttle = self._throttles.pop(slot, None)
+        if throttle is not None:
+            getattr(self, throttle.name).disconnect(throttle, missing_ok=True)
+
+    def flush(self, force: bool = False) -> None:
+        """
+        End of a read cycle: deliver the collected batch and the pending throttled events that are due.
+        Called by the dongle after each read cycle.
+
+        :param force: deliver the batch even if the batch rate limit was not reached
+        :type force: bool
+
+        :return: None
+        """
+        if self._throttles:
+            now = monotonic()
+            for throttle in list(self._throttles.values()):
+                throttle.flush(now)
+        batch = self._batch
+        if batch:
+            if self._batch_interval and not force:
+                now = monotonic()
+                if now - self._last_batch < self._batch_interval:
+                    return
+                self._last_batch = now
+            events = batch.copy()
+            batch.clear()
+            self.event_batch_event.emit(events)
+
+
+class _Throttle:
+    """slot wrapper limiting the calls of a slot, keeping the latest skipped event of each key"""
+    def __init__(self, name: str, slot: Callable, interval: float, key: Optional[Callable[..., Hashable]]):
+        self.name = name
+        self.slot = slot
+        self.interval = interval
+        self.key = key
+        self.last_call: dict[Hashable, float] = {}
+        self.pending: dict[Hashable, tuple] = {}
+
+    def __call__(self, *args) -> None:
+        key = self.key(*args) if self.key is not None else None
+        now = monotonic()
+        if now - self.last_call.get(key, -self.interval) >= self.interval:
+            self.last_call[key] = now
+            self.pending.pop(key, None)
+            self.slot(*args)
+        else:
+            self.pending[key] = args
+
+    def flush(self, now: float) -> None:
+        for key, args in list(self.pending.items()):
+            if now - self.last_call[key] >= self.interval:
+                del self.pending[key]
+                self.last_call[key] = now
+                self.slot(*args)
+
 
 oxigen_events = Events()
@@ -0,0 +1,62 @@
+"""
+Fastpath Module
+---------------
+File: ``fastpath.py``
+
+Library wide switch between validated (pydantic) and fast (validation free) data classes on the receiving path.
+
+By default every received frame is converted into pydantic models (``DongleRxData`` and ``CarController``).
+Enabling the fast path replaces them with lightweight ``__slots__`` classes exposing the same attributes,
+the conversion to the pydantic model is left to the API edges via ``to_model()``::
+
+    import oxigenlib as o2
+    o2.set_fast_path(True)
+"""
+
+__all__ = ['set_fast_path', 'fast_path_enabled']
+
+_fast_path = False
+
+
+def set_fast_path(enabled: bool) -> None:
+    """
+    Select the data classes used on the receiving path.
+
+    :param enabled: True to skip runtime validation on each received frame
+    :type enabled: bool
+
+    :return: None
+    """
+    global _fast_path
+    _fast_path = enabled
+
+
+def fast_path_enabled() -> bool:
+    """return True if the validation free data classes are in use"""
+    return _fast_path
+
+
+class FastModel:
+    """
+    Base class of the validation free data classes. Subclasses list their fields in ``__slots__``
+    and set ``_model`` to the equivalent pydantic class.
+    """
+    __slots__ = ()
+    _model = None
+
+    def to_model(self):
+        """return the equivalent validated pydantic model"""
+        return self._model(**self.model_dump())
+
+    def model_dump(self) -> dict:
+        """return the fields as a dictionary, like the pydantic counterpart"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FastModel) or isinstance(other, self._model):
+            return self.model_dump() == other.model_dump()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
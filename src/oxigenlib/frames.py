@@ -0,0 +1,101 @@
+"""
+Frames Module
+-------------
+File: ``frames.py``
+
+Encoding of the messages to the dongle using only the standard library, for short-lived tools that must start fast.
+Importing this module does not load pydantic, psygnal nor pyserial. The byte layout is defined only here, ``dongle_tx``
+builds its messages with the same functions::
+
+    from oxigenlib.enums import Command, PitLaneCount, PitLaneTrigger, PowerMeanValue
+    from oxigenlib.frames import command_frame
+
+    data = command_frame(3, Command.SET_MAX_SPEED, 200, max_speed=255, pit_lane_trigger=PitLaneTrigger.LEAVE,
+                         pit_lane_count=PitLaneCount.NO, power_mean_value=PowerMeanValue.PWM, timer_cs=0)
+
+Options can be given as members of the enums of ``enums`` or as their integer values.
+"""
+from enum import Enum
+from typing import Union
+
+from .enums import Command, RaceState, PitLaneCount, PitLaneTrigger, PowerMeanValue
+
+__all__ = ['race_status_frame', 'command_frame', 'FIRMWARE_VERSION_REQUEST', 'FREE_RACE']
+
+# request of the firmware version of the dongle
+FIRMWARE_VERSION_REQUEST = bytes((0x06, 0x06, 0x06, 0x06, 0x00, 0x00, 0x00, 0x01, 0x00, 0x00, 0x00))
+# start of a free race session, the controllers start notifying themselves
+FREE_RACE = bytes((0x0F, 0xFF, 0x00, 0x00, 0x00, 0x80, 0x00, 0x80, 0x00, 0x00, 0x00))
+
+
+def _value(option: Union[Enum, int]) -> int:
+    return option.value if isinstance(option, Enum) else option
+
+
+def _frame(byte0: int, max_speed: int, car_id: int, global_command: int, global_arg: int, car_command: int,
+           car_arg: int, power_mean_value: int, timer_cs: int) -> bytes:
+    # oxigen protocol count time as 24bits int
+    return bytes((byte0, max_speed, car_id, global_command, global_arg, car_command, car_arg, power_mean_value,
+                  (timer_cs >> 16) & 0xFF, (timer_cs >> 8) & 0xFF, timer_cs & 0xFF))
+
+
+def race_status_frame(race_status: Union[RaceState, int], max_speed: int,
+                      pit_lane_trigger: Union[PitLaneTrigger, int], pit_lane_count: Union[PitLaneCount, int],
+                      power_mean_value: Union[PowerMeanValue, int], timer_cs: int) -> bytes:
+    """
+    return the bytes setting the race status, same as ``dongle_tx.encode_race_status``
+
+    :param race_status: desired race state
+    :type race_status: RaceState
+    :param max_speed: maximum speed allowed on the track, between 0 and 255
+    :type max_speed: int
+    :param pit_lane_trigger: pit lane event triggering the lap count
+    :type pit_lane_trigger: PitLaneTrigger
+    :param pit_lane_count: whether the pit lane also counts laps
+    :type pit_lane_count: PitLaneCount
+    :param power_mean_value: value reported as power
+    :type power_mean_value: PowerMeanValue
+    :param timer_cs: race timer [cs]
+    :type timer_cs: int
+
+    :return: 11 bytes ready to be sent to the dongle
+    """
+    byte0 = _value(race_status) | _value(pit_lane_count) | _value(pit_lane_trigger)
+    return _frame(byte0, max_speed, 0x00, 0x00, 0x00, 0x80, 0x00, _value(power_mean_value), timer_cs)
+
+
+def command_frame(car_id: int, command: Union[Command, int], command_arg: int, max_speed: int,
+                  pit_lane_trigger: Union[PitLaneTrigger, int], pit_lane_count: Union[PitLaneCount, int],
+                  power_mean_value: Union[PowerMeanValue, int], timer_cs: int) -> bytes:
+    """
+    return the bytes of a command, same as ``dongle_tx.encode_command``
+
+    :param car_id: car receiving the command, 0 for all cars
+    :type car_id: int
+    :param command: command to apply
+    :type command: Command
+    :param command_arg: argument of the command, between 0 and 255
+    :type command_arg: int
+    :param max_speed: maximum speed allowed on the track, between 0 and 255
+    :type max_speed: int
+    :param pit_lane_trigger: pit lane event triggering the lap count
+    :type pit_lane_trigger: PitLaneTrigger
+    :param pit_lane_count: whether the pit lane also counts laps
+    :type pit_lane_count: PitLaneCount
+    :param power_mean_value: value reported as power
+    :type power_mean_value: PowerMeanValue
+    :param timer_cs: race timer [cs]
+    :type timer_cs: int
+
+    :return: 11 bytes ready to be sent to the dongle
+    """
+    if not 0 <= car_id <= 20:
+        raise ValueError(f"car id {car_id} out of range 0-20")
+    byte0 = 0x06 | _value(pit_lane_count) | _value(pit_lane_trigger)
+    power = _value(power_mean_value)
+    if car_id == 0:  # global command
+        return _frame(byte0, max_speed, 0x00, _value(command), command_arg, 0x80 | Command.NO_ACTION.value, 0x00,
+                      power, timer_cs)
+    # car specific command
+    return _frame(byte0, max_speed, car_id, Command.NO_ACTION.value, 0x00, 0x80 | _value(command), command_arg,
+                  power, timer_cs)
@@ -0,0 +1,203 @@
+"""
+Lap Statistics Module
+---------------------
+File: ``lapstats.py``
+
+Streaming per-car lap statistics fed by ``new_lap_event``.
+
+Every value is updated in O(1) per lap and can be read at any time without scanning past laps:
+best and last lap, running mean and variance (Welford), rolling mean over the last N laps and
+approximate percentiles (P-square estimator, 5 markers per percentile)::
+
+    stats = LapStatistics(window=5, quantiles=(0.5, 0.9))
+    stats.attach()
+    ...
+    print(stats[3].best, stats[3].mean, stats[3].rolling_mean, stats[3].percentile(0.9))
+"""
+from bisect import insort
+from collections import deque
+from math import sqrt
+from typing import Iterable, Optional
+
+from .events import Events, oxigen_events
+
+__all__ = ['LapStatistics', 'CarLapStats']
+
+
+class _P2Quantile:
+    """P-square estimator of a quantile (Jain & Chlamtac, 1985), constant memory"""
+    __slots__ = ('p', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: list[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float) -> None:
+        heights = self.heights
+        if len(heights) < 5:
+            insort(heights, x)
+            return
+        positions = self.positions
+        # find the cell of x, extending the extremes if needed
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= heights[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        # adjust the three middle markers
+        for i in (1, 2, 3):
+            d = self.desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q = self.heights
+        n = self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        heights = self.heights
+        if not heights:
+            return None
+        if len(heights) < 5 or self.positions[4] == 5:
+            # not enough samples for the estimator: exact value
+            return heights[round(self.p * (len(heights) - 1))]
+        return heights[2]
+
+
+class CarLapStats:
+    """
+    Statistics of the laps of one car
+
+    :param window: number of laps of the rolling mean
+    :type window: int
+    :param quantiles: percentiles estimated, as fractions between 0 and 1
+    :type quantiles: Iterable[float]
+
+    :var count: number of laps
+    :var best: best lap time [s]
+    :var last: last lap time [s]
+    :var mean: average lap time [s]
+    """
+    def __init__(self, window: int = 5, quantiles: Iterable[float] = (0.5, 0.9)):
+        self.count = 0
+        self.best: Optional[float] = None
+        self.last: Optional[float] = None
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._window: deque = deque(maxlen=window)
+        self._window_sum = 0.0
+        self._quantiles = {q: _P2Quantile(q) for q in quantiles}
+
+    def add(self, lap_time: float) -> None:
+        """add a lap time [s]"""
+        self.count += 1
+        self.last = lap_time
+        if self.best is None or lap_time < self.best:
+            self.best = lap_time
+        # Welford running mean and variance
+        delta = lap_time - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (lap_time - self.mean)
+        # rolling window: subtract the lap leaving the window
+        window = self._window
+        if len(window) == window.maxlen:
+            self._window_sum -= window[0]
+        window.append(lap_time)
+        self._window_sum += lap_time
+        for estimator in self._quantiles.values():
+            estimator.add(lap_time)
+
+    @property
+    def variance(self) -> float:
+        """sample variance of the lap times [s^2]"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        """sample standard deviation of the lap times [s]"""
+        return sqrt(self.variance)
+
+    @property
+    def consistency(self) -> float:
+        """coefficient of variation of the lap times, 0 means perfectly consistent laps"""
+        return self.stdev / self.mean if self.mean else 0.0
+
+    @property
+    def rolling_mean(self) -> Optional[float]:
+        """average of the last ``window`` laps [s]"""
+        return self._window_sum / len(self._window) if self._window else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """approximate percentile ``q`` of the lap times [s], ``q`` must be one of the configured quantiles"""
+        return self._quantiles[q].value()
+
+
+class LapStatistics:
+    """
+    Lap statistics of all cars, updated on ``new_lap_event``
+
+    :param window: number of laps of the rolling mean
+    :type window: int
+    :param quantiles: percentiles estimated, as fractions between 0 and 1
+    :type quantiles: Iterable[float]
+    """
+    def __init__(self, window: int = 5, quantiles: Iterable[float] = (0.5, 0.9)):
+        self._window = window
+        self._quantiles = tuple(quantiles)
+        self._cars: dict[int, CarLapStats] = {}
+        self._bus: Optional[Events] = None
+
+    def __getitem__(self, car_id: int) -> CarLapStats:
+        car = self._cars.get(car_id)
+        if car is None:
+            car = self._cars[car_id] = CarLapStats(self._window, self._quantiles)
+        return car
+
+    def __contains__(self, car_id: int) -> bool:
+        return car_id in self._cars
+
+    def car_ids(self) -> list[int]:
+        """return the ids of the cars with at least one lap"""
+        return list(self._cars)
+
+    def on_new_lap(self, car_id: int, lap_count: int, timestamp: int, lap_time: float, info_flag: bool) -> None:
+        """slot for ``new_lap_event``, laps without a lap time are ignored"""
+        if lap_time > 0:
+            self[car_id].add(lap_time)
+
+    def reset(self) -> None:
+        """forget all laps"""
+        self._cars.clear()
+
+    def attach(self, bus: Events = oxigen_events) -> None:
+        """start collecting the laps raised on the events bus"""
+        self.detach()
+        bus.new_lap_event.connect(self.on_new_lap)
+        self._bus = bus
+
+    def detach(self) -> None:
+        """stop collecting laps"""
+        if self._bus is not None:
+            self._bus.new_lap_event.disconnect(self.on_new_lap, missing_ok=True)
+            self._bus = None
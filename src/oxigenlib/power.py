@@ -0,0 +1,227 @@
+"""
+Power Module
+------------
+File: ``power.py``
+
+Windowed aggregates of the power mean value reported by every frame.
+
+Dashboards of fuel consumption or driver input rarely need the raw frame rate. ``PowerAggregator`` keeps per car
+running accumulators in constant memory and raises ``power_aggregate_event`` with a ``PowerAggregate`` record at
+the end of every time window (aligned on the dongle timer) and of every lap::
+
+    aggregator = PowerAggregator(window_ms=100)
+    aggregator.attach()
+
+    @o2.events.power_aggregate_event.connect
+    def power(record):
+        if record.kind is AggregateKind.LAP:
+            print(record.car_id, record.mean, record.integral)
+
+The power is held between two frames, so mean and integral are weighted by time. The power changes raised by the
+duplicate filter of the dongle (``dongle_power_event``) are aggregated as well.
+"""
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+from . import constants as o2
+from .dongle_rx import DongleRxData
+from .events import Events, oxigen_events
+
+__all__ = ['PowerAggregator', 'PowerAggregate', 'AggregateKind']
+
+_HALF_WRAP_CS = o2.TIMER_WRAP_CS // 2
+
+
+class AggregateKind(Enum):
+    # fixed time window
+    WINDOW = 0
+    # from a lap line crossing to the next one
+    LAP = 1
+
+
+class PowerAggregate(BaseModel):
+    """
+    Power of one car over an interval
+
+    :param car_id: car id
+    :type car_id: int
+    :param kind: time window or lap
+    :type kind: AggregateKind
+    :param lap_count: laps completed at the start of the interval
+    :type lap_count: int
+    :param start_cs: dongle timestamp of the start of the interval [cs]
+    :type start_cs: int
+    :param end_cs: dongle timestamp of the end of the interval [cs]
+    :type end_cs: int
+    :param samples: frames received during the interval
+    :type samples: int
+    :param minimum: minimum power mean value, between 0 and 10
+    :type minimum: float
+    :param maximum: maximum power mean value, between 0 and 10
+    :type maximum: float
+    :param mean: time weighted average of the power mean value
+    :type mean: float
+    :param integral: power mean value integrated over the interval [s]
+    :type integral: float
+    """
+    car_id: int
+    kind: AggregateKind
+    lap_count: int
+    start_cs: int
+    end_cs: int
+    samples: int
+    minimum: float
+    maximum: float
+    mean: float
+    integral: float
+
+
+def _elapsed_cs(start: int, end: int) -> int:
+    # the dongle timer wraps, slightly older timestamps count as no time elapsed
+    elapsed = (end - start) % o2.TIMER_WRAP_CS
+    return 0 if elapsed > _HALF_WRAP_CS else elapsed
+
+
+class _Accumulator:
+    """
+    running min / max / integral of a held value, constant memory. ``samples`` is 1 when opened by a frame,
+    0 when opened at a boundary with the held value
+    """
+    __slots__ = ('start', 'last', 'value', 'samples', 'minimum', 'maximum', 'integral_cs')
+
+    def __init__(self, start: int, value: float, samples: int = 0):
+        self.start = start
+        self.last = start
+        self.value = value
+        self.samples = samples
+        self.minimum = value
+        self.maximum = value
+        self.integral_cs = 0.0
+
+    def add(self, timestamp: int, value: float) -> None:
+        self.integral_cs += self.value * _elapsed_cs(self.last, timestamp)
+        self.last = timestamp
+        self.value = value
+        self.samples += 1
+        if value < self.minimum:
+            self.minimum = value
+        elif value > self.maximum:
+            self.maximum = value
+
+    def close(self, car_id: int, kind: AggregateKind, lap_count: int, end: int) -> PowerAggregate:
+        integral_cs = self.integral_cs + self.value * _elapsed_cs(self.last, end)
+        duration_cs = _elapsed_cs(self.start, end)
+        return PowerAggregate(
+            car_id=car_id,
+            kind=kind,
+            lap_count=lap_count,
+            start_cs=self.start,
+            end_cs=end,
+            samples=self.samples,
+            minimum=self.minimum,
+            maximum=self.maximum,
+            mean=integral_cs / duration_cs if duration_cs else self.value,
+            integral=integral_cs / 100
+        )
+
+
+class _CarPower:
+    __slots__ = ('lap_count', 'window', 'window_end', 'lap')
+
+    def __init__(self, lap_count: int, window: Optional[_Accumulator], window_end: int, lap: _Accumulator):
+        self.lap_count = lap_count
+        self.window = window
+        self.window_end = window_end
+        self.lap = lap
+
+
+class PowerAggregator:
+    """
+    Per car power aggregates, raised by ``power_aggregate_event``
+
+    :param window_ms: duration of the time windows [ms], rounded to the cs of the dongle timer, None for lap
+        aggregates only. A window without frames is merged with the previous one
+    :type window_ms: float
+    :param laps: raise an aggregate for every lap, the windows are also cut at the lap line
+    :type laps: bool
+    """
+    def __init__(self, window_ms: Optional[float] = 100.0, laps: bool = True):
+        self._window_cs = max(1, round(window_ms / 10)) if window_ms is not None else None
+        self._laps = laps
+        self._cars: dict[int, _CarPower] = {}
+        self._events = oxigen_events
+        self._bus: Optional[Events] = None
+
+    def _window_end(self, timestamp: int) -> int:
+        return timestamp - timestamp % self._window_cs + self._window_cs
+
+    def update(self, data: DongleRxData) -> None:
+        """add a frame received from the dongle"""
+        self._add(data.id, data.power, data.timestamp_msg_cs, data.lap_count)
+
+    def update_power(self, car_id: int, power: int, timestamp_cs: int) -> None:
+        """slot for ``dongle_power_event``, add a power change of a frame dropped by the duplicate filter"""
+        car = self._cars.get(car_id)
+        if car is not None:
+            self._add(car_id, power, timestamp_cs, car.lap_count)
+
+    def _add(self, car_id: int, power: int, timestamp: int, lap_count: int) -> None:
+        value = (power & o2.POWER_MEAN_VALUE_MASK) / 127 * 10
+        car = self._cars.get(car_id)
+        if car is None:
+            window = _Accumulator(timestamp, value, 1) if self._window_cs else None
+            window_end = self._window_end(timestamp) if self._window_cs else 0
+            self._cars[car_id] = _CarPower(lap_count, window, window_end, _Accumulator(timestamp, value, 1))
+            return
+        window = car.window
+        if window is not None and _elapsed_cs(window.start, timestamp) >= _elapsed_cs(window.start, car.window_end):
+            # close at the last boundary before the frame, windows without frames are merged
+            boundary = timestamp - timestamp % self._window_cs
+            self._events.power_aggregate_event.emit(window.close(car_id, AggregateKind.WINDOW, car.lap_count, boundary))
+            window = car.window = _Accumulator(boundary, window.value)
+            car.window_end = boundary + self._window_cs
+        if window is not None:
+            window.add(timestamp, value)
+        car.lap.add(timestamp, value)
+
+    def on_new_lap(self, car_id: int, lap_count: int, timestamp: int, lap_time: float = 0.0,
+                   info_flag: bool = False) -> None:
+        """slot for ``new_lap_event``: close the lap and the running window, then restart them"""
+        car = self._cars.get(car_id)
+        if car is None:
+            return
+        window = car.window
+        if window is not None:
+            if _elapsed_cs(window.start, timestamp):
+                self._events.power_aggregate_event.emit(
+                    window.close(car_id, AggregateKind.WINDOW, car.lap_count, timestamp))
+            car.window = _Accumulator(timestamp, window.value)
+            car.window_end = self._window_end(timestamp)
+        lap = car.lap
+        if self._laps:
+            self._events.power_aggregate_event.emit(lap.close(car_id, AggregateKind.LAP, car.lap_count, timestamp))
+        car.lap = _Accumulator(timestamp, lap.value)
+        car.lap_count = lap_count
+
+    def reset(self) -> None:
+        """forget all running aggregates"""
+        self._cars.clear()
+
+    def attach(self, bus: Events = oxigen_events) -> None:
+        """start aggregating the frames of the events bus, ``power_aggregate_event`` is raised on the same bus"""
+        self.detach()
+        bus.dongle_new_data_available_event.connect(self.update)
+        bus.dongle_power_event.connect(self.update_power)
+        bus.new_lap_event.connect(self.on_new_lap)
+        self._bus = bus
+        self._events = bus
+
+    def detach(self) -> None:
+        """stop aggregating"""
+        if self._bus is not None:
+            self._bus.dongle_new_data_available_event.disconnect(self.update, missing_ok=True)
+            self._bus.dongle_power_event.disconnect(self.update_power, missing_ok=True)
+            self._bus.new_lap_event.disconnect(self.on_new_lap, missing_ok=True)
+            self._bus = None
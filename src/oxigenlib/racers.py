@@ -8,11 +8,12 @@ This module exposes an instance of class ``Racers`` as ``oxigen_racers``.
 
 """
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, field_serializer
 
 from .carcontroller import CarController, decode_dongle_pkg, create_new_player
 from .dongle_rx import DongleRxData
-from .events import oxigen_events as events
+from .fastpath import FastModel
+from .events import Events, oxigen_events as events
 
 
 __all__ = ['get_player_data']
@@ -30,6 +31,22 @@ class Racers(BaseModel):
 
     """
     players: dict[int, CarController]
+    # ids of the cars currently reporting track call / off track, kept up to date frame by frame
+    _track_call_ids: set[int] = PrivateAttr(default_factory=set)
+    _off_track_ids: set[int] = PrivateAttr(default_factory=set)
+    # events bus on which lap, pit lane and track events are raised
+    _events: Events = PrivateAttr(default_factory=lambda: events)
+
+    def __init__(self, bus: Optional[Events] = None, **data):
+        super().__init__(**data)
+        if bus is not None:
+            self._events = bus
+
+    @field_serializer('players')
+    def _serialize_players(self, players: dict[int, CarController]) -> dict[int, CarController]:
+        # API edge: the fast path stores validation free players, dump them as the pydantic model
+        return {car_id: player.to_model() if isinstance(player, FastModel) else player
+                for car_id, player in players.items()}
 
     def update(self, data: DongleRxData) -> None:
         """
@@ -40,19 +57,19 @@ class Racers(BaseModel):
 
         :return: None
         """
-        # decode DongleRxData
-        new_car_data = decode_dongle_pkg(data)
         # extract id
-        car_id = new_car_data.id
-        # compare differences
-
+        car_id = data.id
         # check if player exists:
         if car_id not in self.players.keys():
             self.players[car_id] = create_new_player(car_id)
 
+        # decode DongleRxData, the firmware not reported by this package is carried forward
+        new_car_data = decode_dongle_pkg(data, self.players[car_id])
+        # compare differences
+
         # check new lap
         if self.players[car_id].lap_count < new_car_data.lap_count:
-            events.new_lap_event.emit(
+            self._events.new_lap_event.emit(
                 car_id,
                 new_car_data.lap_count,
                 new_car_data.timestamp_msg_cs,
@@ -62,39 +79,72 @@ class Racers(BaseModel):
         # check pit lanes
         if self.players[car_id].car_in_pit_lane != new_car_data.car_in_pit_lane:
             if new_car_data.car_in_pit_lane:
-                events.pit_lane_enter_event.emit(car_id, new_car_data.timestamp_msg_cs)
+                self._events.pit_lane_enter_event.emit(car_id, new_car_data.timestamp_msg_cs)
             else:
-                events.pit_lane_leave_event.emit(car_id, new_car_data.timestamp_msg_cs)
+                self._events.pit_lane_leave_event.emit(car_id, new_car_data.timestamp_msg_cs)
 
 
         # store new ca data in players list
         self.players[car_id] = new_car_data
-        self.global_events_check()
+        self._car_events_check(new_car_data)
+
+    def _car_events_check(self, car: CarController) -> None:
+        """
+        update the global event state with the data of a single car, raise the events only on a change
+
+        :param car: latest data of the car
+        :type car: CarController
+
+        :return: None
+        """
+        car_id = car.id
+        # check for track call
+        track_call_ids = self._track_call_ids
+        if car.track_call_check != (car_id in track_call_ids):
+            if car.track_call_check:
+                track_call_ids.add(car_id)
+            else:
+                track_call_ids.remove(car_id)
+            self._events.track_call_event.emit(len(track_call_ids) > 0, sorted(track_call_ids), [car_id])
+
+        # check if all cars are on track
+        off_track_ids = self._off_track_ids
+        if car.car_on_track == (car_id in off_track_ids):
+            if car.car_on_track:
+                off_track_ids.remove(car_id)
+            else:
+                off_track_ids.add(car_id)
+            self._events.all_cars_on_track_event.emit(len(off_track_ids) == 0, sorted(off_track_ids), [car_id])
 
     def global_events_check(self) -> None:
         """
-        verify changes in global event and raise one if the case
+        rebuild the global event state from all players and raise the events that changed
 
         :return: None
         """
         # check for track call
-        check_data = [(car.id, car.track_call_check, car.car_on_track) for car in self.players.values()]
-        track_call_with_id = [car[0] for car in check_data if car[1]]
-        if len(track_call_with_id):
-            events.track_call_event.emit(True, track_call_with_id)
-        else:
-            events.track_call_event.emit(False, [])
+        track_call_ids = {car.id for car in self.players.values() if car.track_call_check}
+        changed_ids = track_call_ids ^ self._track_call_ids
+        if changed_ids:
+            self._track_call_ids = track_call_ids
+            self._events.track_call_event.emit(len(track_call_ids) > 0, sorted(track_call_ids), sorted(changed_ids))
 
         # check if all cars are on track
-        car_not_on_track_with_id = [car[0] for car in check_data if not car[2]]
-        if len(car_not_on_track_with_id):
-            events.all_cars_on_track_event.emit(False, car_not_on_track_with_id)
-        else:
-            events.all_cars_on_track_event.emit(True, [])
+        off_track_ids = {car.id for car in self.players.values() if not car.car_on_track}
+        changed_ids = off_track_ids ^ self._off_track_ids
+        if changed_ids:
+            self._off_track_ids = off_track_ids
+            self._events.all_cars_on_track_event.emit(
+                len(off_track_ids) == 0, sorted(off_track_ids), sorted(changed_ids)
+            )
 
     def get_player_data(self, player_id) -> Optional[CarController]:
         if player_id in self.players.keys():
-            return self.players[player_id]
+            player = self.players[player_id]
+            # API edge: always hand out a validated model, also when the fast path is enabled
+            if isinstance(player, FastModel):
+                return player.to_model()
+            return player
         else:
             return None
 
@@ -115,4 +165,4 @@ def get_player_data(car_id: int) -> Optional[CarController]:
 
     :return: None if no data is available or a ``CarController`` instance
     """
-    oxigen_racers.get_player_data(car_id)
\ No newline at end of file
+    return oxigen_racers.get_player_data(car_id)
\ No newline at end of file
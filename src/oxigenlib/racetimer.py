@@ -7,7 +7,6 @@ Simple Timer for providing a time reference in the messages to the dongle
 TODO: extend using a Protocol to allow use of external provided timers
 """
 from time import monotonic_ns
-from struct import pack
 
 __all__ = ['RaceTimer']
 
@@ -62,8 +61,6 @@ class RaceTimer:
     def value_cs_bytes(self) -> list[int]:
         """return the timer counter in [cs] base as a 4 bytes list, used for the transmission to the dongle"""
         time = self.value_cs()
-        # convert to 4 bytes with pack and straight to int with list
-        bytes_list = list(pack('>i', time))
         # return only 3 bytes as oxigen protocol count time as 24bits int
-        # skip the hoghest one
-        return bytes_list[1:]
+        # skip the hoghest one: the value wraps every TIMER_WRAP_CS, clock.DongleClock unwraps it
+        return [(time >> 16) & 0xFF, (time >> 8) & 0xFF, time & 0xFF]
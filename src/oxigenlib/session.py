@@ -0,0 +1,92 @@
+"""
+Session Module
+--------------
+File: ``session.py``
+
+One session bundles everything needed to drive one track: a ``Dongle``, its ``Racers``, its own ``Events`` bus
+and a ``RaceTimer``. Sessions do not share any state, so one process can run several tracks side by side::
+
+    track_a = OxigenSession()
+    track_b = OxigenSession()
+    track_a.events.new_lap_event.connect(on_lap_track_a)
+    track_a.dongle.connect("/dev/ttyACM0")
+    track_b.dongle.connect("/dev/ttyACM1")
+    o2.set_race_state(o2.RaceState.RUNNING, system_a, track_a.timer, bus=track_a.events)
+
+The singletons of the library (``oxigenlib.events``, ``oxigenlib.dongle`` and ``oxigen_racers``)
+form the default session, ``default_session``.
+"""
+from typing import Optional
+
+from .dongle import Dongle, oxigen_dongle
+from .dongle_async import AsyncDongle
+from .events import Events, oxigen_events
+from .racers import Racers, oxigen_racers
+from .racetimer import RaceTimer
+
+__all__ = ['OxigenSession', 'default_session']
+
+
+class OxigenSession:
+    """
+    Dongle, players, events bus and timer of one track
+
+    :param dongle: dongle of the session, a new ``Dongle`` on the session bus by default.
+        A given dongle must raise its events on ``events``
+    :type dongle: Dongle
+    :param events: events bus of the session, a new one by default
+    :type events: Events
+    :param racers: players of the session, a new ``Racers`` on the session bus by default
+    :type racers: Racers
+    :param timer: timer of the session, a new ``RaceTimer`` by default
+    :type timer: RaceTimer
+    """
+    def __init__(self, dongle: Optional[Dongle] = None, events: Optional[Events] = None,
+                 racers: Optional[Racers] = None, timer: Optional[RaceTimer] = None):
+        self.events = events if events is not None else Events()
+        self.dongle = dongle if dongle is not None else Dongle(self.events)
+        self.racers = racers if racers is not None else Racers(players={}, bus=self.events)
+        self.timer = timer if timer is not None else RaceTimer()
+        self._wired = False
+        self.wire()
+
+    def wire(self) -> None:
+        """forward the commands of the bus to the dongle and the received data to the players"""
+        if self._wired:
+            return
+        # the asyncio dongle subscribes itself to the commands once connected
+        if not isinstance(self.dongle, AsyncDongle):
+            self.events.transmit_command_event.connect(self.dongle.send)
+        self.events.dongle_new_data_available_event.connect(self.racers.update)
+        self._wired = True
+
+    def unwire(self) -> None:
+        """
+        stop forwarding commands and received data, the bus keeps its other subscribers.
+        The default session is wired by the modules of the library and cannot be unwired
+        """
+        if not self._wired:
+            return
+        self.events.transmit_command_event.disconnect(self.dongle.send, missing_ok=True)
+        self.events.dongle_new_data_available_event.disconnect(self.racers.update, missing_ok=True)
+        self._wired = False
+
+    def close(self) -> None:
+        """stop the background reader and the recording of the dongle and unwire the session"""
+        self.dongle.stop_reader()
+        self.dongle.stop_recording()
+        self.unwire()
+
+
+def _default_session() -> OxigenSession:
+    # the singletons are already wired together when their modules are imported
+    session = OxigenSession.__new__(OxigenSession)
+    session.events = oxigen_events
+    session.dongle = oxigen_dongle
+    session.racers = oxigen_racers
+    session.timer = RaceTimer()
+    session._wired = True
+    return session
+
+
+default_session = _default_session()
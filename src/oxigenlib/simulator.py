@@ -0,0 +1,327 @@
+"""
+Simulator Module
+----------------
+File: ``simulator.py``
+
+Software stand-in for the oxigen dongle, exposed over a pseudo-terminal (Linux/POSIX only).
+
+The simulator answers the firmware request sent by ``Dongle.connect``, accepts the 11 bytes messages
+transmitted by the library and, once the free race (or any race state) is received, streams 13 bytes messages
+for up to 20 cars: lap increments, pit lane transitions, deslots, button presses and 24 bits timer progression.
+``Dongle.connect`` works against it unchanged::
+
+    with DongleSimulator(num_cars=20, rate_hz=500) as simulator:
+        o2.dongle.connect(simulator.port)
+        while True:
+            o2.dongle.check_data_waiting()
+"""
+import os
+import random
+import select
+import tty
+from collections import deque
+from threading import Thread
+from time import monotonic_ns
+from typing import Optional
+
+from . import constants as o2
+from .dongle_tx import encode_firmware_version_request
+
+__all__ = ['DongleSimulator', 'encode_rx_frame']
+
+# dongle timer: 24 bits counter in centiseconds
+_TIMER_MASK = 0xFFFFFF
+# lap time unit of the dongle, see read_dongle_pkg
+_LAP_TIME_SCALE = 99.25
+# race states in which the cars do not move
+_HALTED_STATES = (0x01, 0x04)
+# firmware byte: device flag / sub release / main release
+_CAR_FIRMWARE = o2.DEVICE_FW_MASK | (1 << 5) | 3
+_CONTROLLER_FIRMWARE = (2 << 5) | 3
+
+
+def encode_rx_frame(status: int, car_id: int, last_lap_time_s: float, lap_count: int, power: int,
+                    firmware: int, buttons: int, timer_cs: int, lap_time_delay: int = 0) -> bytes:
+    """
+    Build a 13 bytes race state message as sent by the dongle, the inverse of ``read_dongle_pkg``
+
+    :param status: status byte
+    :type status: int
+    :param car_id: identification number of the car
+    :type car_id: int
+    :param last_lap_time_s: last lap time in seconds
+    :type last_lap_time_s: float
+    :param lap_count: number of laps, 16 bits
+    :type lap_count: int
+    :param power: power byte
+    :type power: int
+    :param firmware: firmware byte
+    :type firmware: int
+    :param buttons: buttons byte
+    :type buttons: int
+    :param timer_cs: dongle timer when the message is sent in centiseconds, 24 bits
+    :type timer_cs: int
+    :param lap_time_delay: centiseconds elapsed since the lap event, 0-255
+    :type lap_time_delay: int
+
+    :return: message bytes
+    :rtype: bytes
+    """
+    lap_time = min(round(last_lap_time_s * _LAP_TIME_SCALE), 0xFFFF)
+    timer_cs &= _TIMER_MASK
+    return bytes((
+        status, car_id, lap_time >> 8, lap_time & 0xFF, lap_time_delay,
+        lap_count & 0xFF, (lap_count >> 8) & 0xFF, power, firmware, buttons,
+        timer_cs >> 16, (timer_cs >> 8) & 0xFF, timer_cs & 0xFF
+    ))
+
+
+class _SimulatedCar:
+    """state of one simulated car-controller pair"""
+    def __init__(self, car_id: int, now_cs: int, lap_time_cs: int, rng: random.Random):
+        self.id = car_id
+        self.rng = rng
+        self.base_lap_time_cs = lap_time_cs
+        self.lap_count = 0
+        self.last_lap_time_s = 0.0
+        self.last_crossing_cs = now_cs
+        self.next_crossing_cs = now_cs + self._lap_time_cs(255)
+        self.in_pit_lane = False
+        self.pit_leave_cs = 0
+        self.on_track = True
+        self.back_on_track_cs = 0
+        self.track_call = False
+        self.buttons = 0
+        self.buttons_release_cs = 0
+        self.firmware_toggle = False
+
+    def _lap_time_cs(self, max_speed: int) -> int:
+        # slower cars with lower system max speed, +-10% driver variance
+        speed_factor = 255 / max(max_speed, 25)
+        return int(self.base_lap_time_cs * speed_factor * self.rng.uniform(0.9, 1.1))
+
+    def step(self, now_cs: int, running: bool, max_speed: int, pit_probability: float,
+             deslot_probability: float, button_probability: float) -> int:
+        """advance the car state up to ``now_cs``, return the delay since the last lap event (0-255)"""
+        rng = self.rng
+        if not running:
+            # halted race: the lap in progress restarts when the race resumes
+            self.next_crossing_cs = now_cs + self._lap_time_cs(max_speed)
+            return 0
+        if not self.on_track:
+            if now_cs >= self.back_on_track_cs:
+                self.on_track = True
+                self.track_call = False
+            # a deslotted car loses time on its lap
+            self.next_crossing_cs += 1
+        elif rng.random() < deslot_probability:
+            self.on_track = False
+            self.back_on_track_cs = now_cs + rng.randint(100, 400)
+            self.track_call = rng.random() < 0.5
+        if self.in_pit_lane and now_cs >= self.pit_leave_cs:
+            self.in_pit_lane = False
+        if self.buttons and now_cs >= self.buttons_release_cs:
+            self.buttons = 0
+        elif rng.random() < button_probability:
+            self.buttons = rng.choice((o2.BTN_UP_MASK, o2.BTN_DOWN_MASK, o2.BTN_ROUND_MASK))
+            self.buttons_release_cs = now_cs + rng.randint(5, 30)
+
+        if now_cs < self.next_crossing_cs:
+            return 0
+        # lap event
+        crossing_cs = self.next_crossing_cs
+        self.lap_count += 1
+        self.last_lap_time_s = (crossing_cs - self.last_crossing_cs) / 100
+        self.last_crossing_cs = crossing_cs
+        self.next_crossing_cs = crossing_cs + self._lap_time_cs(max_speed)
+        if not self.in_pit_lane and rng.random() < pit_probability:
+            self.in_pit_lane = True
+            self.pit_leave_cs = now_cs + rng.randint(200, 600)
+        return min(now_cs - crossing_cs, 0xFF)
+
+    def frame(self, timer_cs: int, lap_time_delay: int, running: bool) -> bytes:
+        status = o2.CAR_ONLINE_MASK
+        if self.in_pit_lane:
+            status |= o2.CAR_IN_PIT_LANE_MASK
+        if self.on_track:
+            power = o2.CAR_ON_TRACK_MASK | (self.rng.randint(20, 127) if running else 0)
+        else:
+            power = 0
+        buttons = self.buttons
+        if self.track_call:
+            buttons |= o2.TRACK_CALL_MASK
+        # the dongle reports car and controller firmware in turns
+        self.firmware_toggle = not self.firmware_toggle
+        firmware = _CAR_FIRMWARE if self.firmware_toggle else _CONTROLLER_FIRMWARE
+        return encode_rx_frame(status, self.id, self.last_lap_time_s, self.lap_count, power, firmware, buttons,
+                               timer_cs, lap_time_delay)
+
+
+class DongleSimulator:
+    """
+    Simulated dongle served over a pseudo-terminal
+
+    :param num_cars: number of simulated cars, 1-20
+    :type num_cars: int
+    :param rate_hz: total number of race state messages per second, the cars report in turns
+    :type rate_hz: float
+    :param lap_time_s: average lap time in seconds at full speed
+    :type lap_time_s: float
+    :param pit_probability: probability that a car enters the pit lane at the end of a lap
+    :type pit_probability: float
+    :param deslot_probability: probability of a deslot for each message of a car
+    :type deslot_probability: float
+    :param button_probability: probability of a button press for each message of a car
+    :type button_probability: float
+    :param timer_start_cs: initial value of the 24 bits dongle timer, useful to test the timer overflow
+    :type timer_start_cs: int
+    :param seed: seed of the random generator, for repeatable runs
+    :type seed: int
+    :param keep_received: number of messages from the library kept in ``received``, the oldest are dropped
+    :type keep_received: int
+
+    :var received: latest messages received from the library
+    :var frames_sent: number of race messages streamed so far
+    :var frames_dropped: number of race messages dropped because nobody read the port
+    """
+    def __init__(self, num_cars: int = 4, rate_hz: float = 100.0, lap_time_s: float = 8.0,
+                 pit_probability: float = 0.05, deslot_probability: float = 0.0005,
+                 button_probability: float = 0.001, timer_start_cs: int = 0, seed: Optional[int] = None,
+                 keep_received: int = 1000):
+        if not 1 <= num_cars <= o2.MAX_CAR_ID:
+            raise ValueError(f"num_cars must be between 1 and {o2.MAX_CAR_ID}")
+        self._num_cars = num_cars
+        self._interval_ns = int(10**9 / rate_hz)
+        self._lap_time_cs = int(lap_time_s * 100)
+        self._pit_probability = pit_probability
+        self._deslot_probability = deslot_probability
+        self._button_probability = button_probability
+        self._timer_start_cs = timer_start_cs
+        self._rng = random.Random(seed)
+        self._master_fd: Optional[int] = None
+        self._slave_fd: Optional[int] = None
+        self._thread: Optional[Thread] = None
+        self._running = False
+        self._streaming = False
+        self._race_status = 0x0F
+        self._max_speed = 255
+        self.received: deque[bytes] = deque(maxlen=keep_received)
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        # tail of a message partially written to the pseudo-terminal
+        self._tx_pending = b''
+
+    @property
+    def port(self) -> str:
+        """path of the serial port to pass to ``Dongle.connect``"""
+        return os.ttyname(self._slave_fd)
+
+    @property
+    def race_status(self) -> int:
+        """race state bits of the last race state message received"""
+        return self._race_status
+
+    @property
+    def max_speed(self) -> int:
+        """system max speed of the last message received"""
+        return self._max_speed
+
+    def start(self) -> None:
+        """open the pseudo-terminal and start serving it"""
+        if self._running:
+            return
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._master_fd)
+        tty.setraw(self._slave_fd)
+        # like the dongle, drop the output when nobody reads the port instead of blocking
+        os.set_blocking(self._master_fd, False)
+        self._tx_pending = b''
+        self._running = True
+        self._thread = Thread(target=self._serve, name="oxigen-dongle-simulator", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """stop serving and close the pseudo-terminal"""
+        if not self._running:
+            return
+        self._running = False
+        self._thread.join()
+        os.close(self._master_fd)
+        os.close(self._slave_fd)
+
+    def __enter__(self) -> 'DongleSimulator':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _timer_cs(self, start_ns: int) -> int:
+        return self._timer_start_cs + (monotonic_ns() - start_ns) // 10**7
+
+    def _serve(self) -> None:
+        master = self._master_fd
+        firmware_request = encode_firmware_version_request()
+        rx_buffer = bytearray()
+        start_ns = monotonic_ns()
+        now_cs = self._timer_cs(start_ns)
+        cars = [_SimulatedCar(car_id, now_cs, self._lap_time_cs, self._rng)
+                for car_id in range(1, self._num_cars + 1)]
+        next_car = 0
+        next_frame_ns = monotonic_ns()
+
+        while self._running:
+            timeout = max(next_frame_ns - monotonic_ns(), 0) / 10**9 if self._streaming else 0.05
+            readable, _, _ = select.select([master], [], [], min(timeout, 0.05))
+            if readable:
+                try:
+                    rx_buffer += os.read(master, 1024)
+                except BlockingIOError:
+                    pass
+                while len(rx_buffer) >= 11:
+                    message = bytes(rx_buffer[:11])
+                    del rx_buffer[:11]
+                    self._handle_message(message, firmware_request)
+            if not self._streaming or monotonic_ns() < next_frame_ns:
+                continue
+
+            now_cs = self._timer_cs(start_ns)
+            running = (self._race_status & o2.STATUS_RACE_MASK) not in _HALTED_STATES
+            car = cars[next_car]
+            next_car = (next_car + 1) % len(cars)
+            delay = car.step(now_cs, running, self._max_speed, self._pit_probability,
+                             self._deslot_probability, self._button_probability)
+            if self._write(car.frame(now_cs, delay, running)):
+                self.frames_sent += 1
+            else:
+                self.frames_dropped += 1
+            next_frame_ns += self._interval_ns
+            if monotonic_ns() - next_frame_ns > 10**9:
+                # the reader is too slow: do not try to catch up more than a second
+                next_frame_ns = monotonic_ns()
+
+    def _write(self, data: bytes) -> bool:
+        """write a message to the pseudo-terminal without blocking, return False if it was dropped"""
+        try:
+            if self._tx_pending:
+                # complete the previous message first, the stream stays aligned
+                self._tx_pending = self._tx_pending[os.write(self._master_fd, self._tx_pending):]
+                if self._tx_pending:
+                    return False
+            written = os.write(self._master_fd, data)
+        except BlockingIOError:
+            return False
+        self._tx_pending = data[written:]
+        return True
+
+    def _handle_message(self, message: bytes, firmware_request: bytes) -> None:
+        self.received.append(message)
+        if message == firmware_request:
+            # firmware 4.06 / 3 unused bytes
+            self._write(bytes((4, 6, 0, 0, 0)))
+            return
+        if (message[0] & o2.STATUS_RACE_MASK) != 0x06:
+            # race state message
+            self._race_status = message[0] & o2.STATUS_RACE_MASK
+        self._max_speed = message[1]
+        self._streaming = True
@@ -0,0 +1,223 @@
+"""
+SmartRace Module
+----------------
+File: ``smartrace.py``
+
+Bridge forwarding laps and pit lane events to SmartRace over its websocket interface.
+
+The event slots only queue the event, the messages are formatted and sent by a background thread.
+A slow or lost SmartRace connection therefore never delays the reads of the dongle: the bridge reconnects
+with an increasing delay and sends the queued events once connected again::
+
+    bridge = SmartRaceBridge("192.168.16.24", 50860)
+    bridge.start()
+    ...
+    print(bridge.stats())
+    bridge.stop()
+"""
+import queue
+from threading import Event, Thread
+from time import monotonic_ns
+from typing import Optional
+
+from pydantic import BaseModel
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+from websockets.sync.client import connect
+
+from .events import Events, oxigen_events
+
+__all__ = ['SmartRaceBridge', 'SmartRaceStats']
+
+# message kinds in the queue
+_LAP = 0
+_PIT_ENTER = 1
+_PIT_LEAVE = 2
+
+# SmartRace messages, oxigen timestamps are in cs, SmartRace expects ms
+_MESSAGES = {
+    _LAP: '{"type":"analog_lap","data":{"timestamp":%d,"controller_id":%d}}',
+    _PIT_ENTER: '{"type":"analog_pit_enter","data":{"controller_id":%d}}',
+    _PIT_LEAVE: '{"type":"analog_pit_leave","data":{"controller_id":%d}}',
+}
+_API_VERSION = '{"type":"api_version"}'
+_CONTROLLER_SET = '{"type": "controller_set", "data": {"controller_id": "%s"}}'
+# replies of SmartRace to the api version request
+_HANDSHAKE_REPLIES = 3
+
+
+class SmartRaceStats(BaseModel):
+    """
+    Counters of the SmartRace bridge
+
+    :param connected: True if the websocket is connected
+    :type connected: bool
+    :param queued: events waiting to be sent
+    :type queued: int
+    :param sent: messages sent
+    :type sent: int
+    :param dropped: events lost because the queue was full
+    :type dropped: int
+    :param reconnects: connection attempts after the first one
+    :type reconnects: int
+    :param mean_latency_ms: average delay between the event and the message sent to SmartRace [ms]
+    :type mean_latency_ms: float
+    :param max_latency_ms: maximum delay between the event and the message sent to SmartRace [ms]
+    :type max_latency_ms: float
+    """
+    connected: bool
+    queued: int
+    sent: int
+    dropped: int
+    reconnects: int
+    mean_latency_ms: float
+    max_latency_ms: float
+
+
+class SmartRaceBridge:
+    """
+    Send the laps and pit lane events of an events bus to SmartRace
+
+    :param host: address of the SmartRace server
+    :type host: str
+    :param port: websocket port of the SmartRace server
+    :type port: int
+    :param bus: events bus to follow, the events of the library by default
+    :type bus: Events
+    :param controller_id: controller identifier announced to SmartRace
+    :type controller_id: str
+    :param max_queue: maximum number of events waiting to be sent
+    :type max_queue: int
+    :param reconnect_delay: delay before the first reconnection attempt [s], doubled at each failure
+    :type reconnect_delay: float
+    :param max_reconnect_delay: maximum delay between reconnection attempts [s]
+    :type max_reconnect_delay: float
+    """
+    def __init__(self, host: str, port: int, bus: Events = oxigen_events, controller_id: str = "Z",
+                 max_queue: int = 1024, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self._uri = f"ws://{host}:{port}"
+        self._bus = bus
+        self._controller_set = _CONTROLLER_SET % controller_id
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+        self._socket = None
+        self._sent = 0
+        self._dropped = 0
+        self._reconnects = 0
+        self._latency_sum_ns = 0
+        self._latency_max_ns = 0
+
+    def start(self) -> None:
+        """connect the event slots and start the sending thread"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._bus.new_lap_event.connect(self.on_new_lap)
+        self._bus.pit_lane_enter_event.connect(self.on_pit_lane_enter)
+        self._bus.pit_lane_leave_event.connect(self.on_pit_lane_leave)
+        self._thread = Thread(target=self._send_loop, name="oxigen-smartrace", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        """disconnect the event slots, send the queued events if connected and stop the thread"""
+        if self._thread is None:
+            return
+        self._bus.new_lap_event.disconnect(self.on_new_lap, missing_ok=True)
+        self._bus.pit_lane_enter_event.disconnect(self.on_pit_lane_enter, missing_ok=True)
+        self._bus.pit_lane_leave_event.disconnect(self.on_pit_lane_leave, missing_ok=True)
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _put(self, item: tuple) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._dropped += 1
+
+    def on_new_lap(self, car_id: int, lap_count: int, timestamp: int, lap_time: float = 0.0,
+                   info_flag: bool = False) -> None:
+        """slot for ``new_lap_event``, never blocks"""
+        self._put((_LAP, monotonic_ns(), (timestamp * 10, car_id)))
+
+    def on_pit_lane_enter(self, car_id: int, timestamp: int) -> None:
+        """slot for ``pit_lane_enter_event``, never blocks"""
+        self._put((_PIT_ENTER, monotonic_ns(), car_id))
+
+    def on_pit_lane_leave(self, car_id: int, timestamp: int) -> None:
+        """slot for ``pit_lane_leave_event``, never blocks"""
+        self._put((_PIT_LEAVE, monotonic_ns(), car_id))
+
+    def _connect(self) -> bool:
+        try:
+            socket = connect(self._uri, open_timeout=5)
+        except (OSError, TimeoutError, InvalidHandshake):
+            return False
+        try:
+            socket.send(_API_VERSION)
+            for _ in range(_HANDSHAKE_REPLIES):
+                socket.recv(timeout=1)
+            socket.send(self._controller_set)
+        except (OSError, TimeoutError, ConnectionClosed):
+            socket.close()
+            return False
+        self._socket = socket
+        return True
+
+    def _close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _send_loop(self) -> None:
+        delay = self._reconnect_delay
+        pending = None
+        first_attempt = True
+        while True:
+            if self._socket is None:
+                if self._stopping.is_set():
+                    break
+                if not first_attempt:
+                    self._reconnects += 1
+                first_attempt = False
+                if not self._connect():
+                    # wait before the next attempt, waking up on stop
+                    self._stopping.wait(delay)
+                    delay = min(delay * 2, self._max_reconnect_delay)
+                    continue
+                delay = self._reconnect_delay
+            if pending is None:
+                try:
+                    pending = self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self._stopping.is_set():
+                        break
+                    continue
+            kind, event_ns, args = pending
+            try:
+                self._socket.send(_MESSAGES[kind] % args)
+            except (OSError, ConnectionClosed):
+                # keep the message for the next connection
+                self._close()
+                continue
+            latency_ns = monotonic_ns() - event_ns
+            self._latency_sum_ns += latency_ns
+            self._latency_max_ns = max(self._latency_max_ns, latency_ns)
+            self._sent += 1
+            pending = None
+        self._close()
+
+    def stats(self) -> SmartRaceStats:
+        """counters and latency of the bridge"""
+        sent = self._sent
+        return SmartRaceStats(
+            connected=self._socket is not None,
+            queued=self._queue.qsize(),
+            sent=sent,
+            dropped=self._dropped,
+            reconnects=self._reconnects,
+            mean_latency_ms=self._latency_sum_ns / sent / 10**6 if sent else 0.0,
+            max_latency_ms=self._latency_max_ns / 10**6
+        )
@@ -0,0 +1,163 @@
+"""
+Snapshot Module
+---------------
+File: ``snapshot.py``
+
+Compact binary encoding of the players of ``Racers``, to share the race state with other processes.
+
+A frame is a header followed by fixed-size car records::
+
+    header: magic b'OX' / kind (0 full, 1 delta) / number of cars (uint8) / sequence number (uint32)
+    car:    id (uint8) / flags (uint16) / lap count (uint16) / last lap time [s] (float64) /
+            power mean value (float64) / timestamp [cs] (int64) / car firmware (8 bytes) / controller firmware (8 bytes)
+
+A full frame holds every car, a delta frame only the cars that changed since the previous frame.
+Floats are kept as float64, so decoded players compare equal to the encoded ones::
+
+    encoder = SnapshotEncoder()
+    frame = encoder.encode(oxigen_racers.players)   # full frame first, then deltas
+
+    decoder = SnapshotDecoder()
+    players = decoder.decode(frame)                  # dict[int, CarController]
+"""
+from struct import Struct
+
+from .carcontroller import CarController
+
+__all__ = ['SnapshotEncoder', 'SnapshotDecoder', 'SnapshotFormatError', 'FULL', 'DELTA']
+
+# kind of frame
+FULL = 0
+DELTA = 1
+
+_MAGIC = b'OX'
+_HEADER = Struct('<2sBBI')
+_CAR = Struct('<BHHddq8s8s')
+_FIRMWARE_LENGTH = 8
+# boolean fields of CarController packed in the flags, bit 0 first
+_FLAGS = ('car_reset', 'car_controller_link', 'car_in_pit_lane', 'car_on_track', 'controller_batt_low',
+          'track_call_check', 'lap_time_info', 'arrow_up_btn', 'arrow_down_btn', 'round_btn')
+_SEQUENCE_MASK = 0xFFFFFFFF
+
+
+class SnapshotFormatError(Exception):
+    pass
+
+
+def _pack_car(player) -> bytes:
+    flags = 0
+    for bit, name in enumerate(_FLAGS):
+        if getattr(player, name):
+            flags |= 1 << bit
+    car_firmware = player.car_firmware.encode()
+    controller_firmware = player.controller_firmware.encode()
+    if len(car_firmware) > _FIRMWARE_LENGTH or len(controller_firmware) > _FIRMWARE_LENGTH:
+        raise ValueError(f"firmware of car {player.id} longer than {_FIRMWARE_LENGTH} bytes")
+    return _CAR.pack(player.id, flags, player.lap_count, player.last_lap_time_s, player.power_mean_value,
+                     player.timestamp_msg_cs, car_firmware, controller_firmware)
+
+
+def _unpack_car(record) -> CarController:
+    car_id, flags, lap_count, last_lap_time_s, power_mean_value, timestamp_msg_cs, car_firmware, \
+        controller_firmware = _CAR.unpack(record)
+    fields = {name: bool(flags >> bit & 1) for bit, name in enumerate(_FLAGS)}
+    # the record carries already validated values
+    return CarController.model_construct(
+        id=car_id,
+        lap_count=lap_count,
+        last_lap_time_s=last_lap_time_s,
+        power_mean_value=power_mean_value,
+        timestamp_msg_cs=timestamp_msg_cs,
+        car_firmware=car_firmware.rstrip(b'\x00').decode(),
+        controller_firmware=controller_firmware.rstrip(b'\x00').decode(),
+        **fields
+    )
+
+
+class SnapshotEncoder:
+    """
+    Encode the players into full and delta frames, keeping the records of the previous frame
+    """
+    def __init__(self):
+        self._records: dict[int, bytes] = {}
+        # players of the previous frame: Racers replaces the player of a car at each update,
+        # so a player that is still the same object does not need to be packed again
+        self._players: dict[int, CarController] = {}
+        self._sequence = 0
+
+    def encode(self, players: dict[int, CarController], full: bool = False) -> bytes:
+        """
+        encode the players, as a delta frame if possible
+
+        :param players: players indexed by car id, ``Racers.players``
+        :type players: dict[int, CarController]
+        :param full: force a full frame, for example for a new subscriber
+        :type full: bool
+
+        :return: encoded frame
+        """
+        previous = self._records
+        previous_players = self._players
+        players = dict(players)
+        records = {
+            car_id: previous[car_id] if previous_players.get(car_id) is player else _pack_car(player)
+            for car_id, player in players.items()
+        }
+        self._records = records
+        self._players = players
+        # a delta cannot remove cars: send everything
+        if full or not previous or not previous.keys() <= records.keys():
+            kind = FULL
+            changed = list(records.values())
+        else:
+            kind = DELTA
+            changed = [record for car_id, record in records.items() if previous.get(car_id) != record]
+        sequence = self._sequence
+        self._sequence = (sequence + 1) & _SEQUENCE_MASK
+        return _HEADER.pack(_MAGIC, kind, len(changed), sequence) + b''.join(changed)
+
+    def reset(self) -> None:
+        """forget the previous frame, the next frame is a full one"""
+        self._records.clear()
+        self._players.clear()
+
+
+class SnapshotDecoder:
+    """
+    Rebuild the players from a stream of frames
+
+    :var players: players decoded so far, indexed by car id
+    """
+    def __init__(self):
+        self.players: dict[int, CarController] = {}
+        self._next_sequence = None
+
+    def decode(self, frame: bytes) -> dict[int, CarController]:
+        """
+        apply a frame
+
+        :param frame: frame created by ``SnapshotEncoder``
+        :type frame: bytes
+
+        :return: the players after the frame
+        """
+        if len(frame) < _HEADER.size:
+            raise SnapshotFormatError("frame shorter than the header")
+        magic, kind, count, sequence = _HEADER.unpack_from(frame)
+        if magic != _MAGIC or kind not in (FULL, DELTA):
+            raise SnapshotFormatError("not a snapshot frame")
+        if len(frame) != _HEADER.size + count * _CAR.size:
+            raise SnapshotFormatError(f"frame of {len(frame)} bytes does not hold {count} cars")
+        if kind == DELTA and sequence != self._next_sequence:
+            raise SnapshotFormatError(f"delta frame {sequence} received, expected {self._next_sequence}")
+        cars = {}
+        view = memoryview(frame)
+        for offset in range(_HEADER.size, len(frame), _CAR.size):
+            player = _unpack_car(view[offset:offset + _CAR.size])
+            cars[player.id] = player
+        if kind == FULL:
+            self.players = cars
+        else:
+            self.players.update(cars)
+        self._next_sequence = (sequence + 1) & _SEQUENCE_MASK
+        return self.players
@@ -0,0 +1,186 @@
+"""
+Standings Module
+----------------
+File: ``standings.py``
+
+Live race standings, maintained incrementally from ``new_lap_event``.
+
+Cars are kept in a sorted container by laps and crossing time: a lap moves only the car that crossed the line,
+removed and inserted again in O(log n). Gap to the leader and interval to the car ahead come from the crossing time
+of the leader at each lap, without recomputing the whole order. ``position_change_event`` is raised only when the order changes.
+Each instance is independent, so several heats can run side by side on different event buses::
+
+    standings = Standings()
+    standings.attach()
+    ...
+    for row in standings.standings():
+        print(row.position, row.car_id, row.laps, row.gap_cs, row.interval_cs)
+"""
+from typing import Optional
+
+from pydantic import BaseModel
+from sortedcontainers import SortedList
+
+from .events import Events, oxigen_events
+
+__all__ = ['Standings', 'Standing']
+
+
+class Standing(BaseModel):
+    """
+    Position of a car in the standings
+
+    :param position: position in the race, starting from 1
+    :type position: int
+    :param car_id: identification number of the car
+    :type car_id: int
+    :param laps: number of laps completed
+    :type laps: int
+    :param crossing_cs: timestamp of the last crossing of the finish line [cs]
+    :type crossing_cs: int
+    :param laps_down: laps behind the leader
+    :type laps_down: int
+    :param gap_cs: time behind the leader when crossing the line at the same lap [cs]
+    :type gap_cs: int
+    :param interval_laps: laps behind the car ahead, 0 for the leader
+    :type interval_laps: int
+    :param interval_cs: time behind the car ahead [cs], 0 for the leader, None if the car ahead is laps ahead
+    :type interval_cs: Optional[int]
+    """
+    position: int
+    car_id: int
+    laps: int
+    crossing_cs: int
+    laps_down: int
+    gap_cs: int
+    interval_laps: int
+    interval_cs: Optional[int]
+
+
+class Standings:
+    """
+    Incrementally ordered standings of one race
+    """
+    def __init__(self):
+        self._events = oxigen_events
+        # ordered keys (-laps, crossing timestamp, car id): leader first
+        self._order: SortedList = SortedList()
+        self._keys: dict[int, tuple[int, int, int]] = {}
+        # lap -> timestamp of the first car completing it, which was leading at that moment
+        self._leader_crossing: dict[int, int] = {}
+        self._oldest_lap = 0
+        self._bus: Optional[Events] = None
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def on_new_lap(self, car_id: int, lap_count: int, timestamp: int, lap_time: float = 0.0,
+                   info_flag: bool = False) -> None:
+        """slot for ``new_lap_event``: move the car to its new position"""
+        order = self._order
+        new_key = (-lap_count, timestamp, car_id)
+        old_key = self._keys.get(car_id)
+        old_position = None
+        if old_key is not None:
+            old_position = order.bisect_left(old_key)
+            order.remove(old_key)
+        new_position = order.bisect_left(new_key)
+        order.add(new_key)
+        self._keys[car_id] = new_key
+
+        if lap_count not in self._leader_crossing:
+            self._leader_crossing[lap_count] = timestamp
+        # laps completed by every car are not needed anymore
+        last_lap = -order[-1][0]
+        while self._oldest_lap < last_lap:
+            self._leader_crossing.pop(self._oldest_lap, None)
+            self._oldest_lap += 1
+
+        if old_position != new_position:
+            first = new_position if old_position is None else min(old_position, new_position)
+            last = len(order) - 1 if old_position is None else max(old_position, new_position)
+            self._events.position_change_event.emit(
+                [key[2] for key in order],
+                [key[2] for key in order[first:last + 1]]
+            )
+
+    def position(self, car_id: int) -> Optional[int]:
+        """return the position of a car, starting from 1, None if the car did not cross the line yet"""
+        key = self._keys.get(car_id)
+        if key is None:
+            return None
+        return self._order.bisect_left(key) + 1
+
+    def leader(self) -> Optional[int]:
+        """return the id of the leading car"""
+        return self._order[0][2] if self._order else None
+
+    def gap_to_leader(self, car_id: int) -> Optional[int]:
+        """return the time behind the leader at the same lap [cs]"""
+        key = self._keys.get(car_id)
+        if key is None:
+            return None
+        return self._gap(key)
+
+    def interval(self, car_id: int) -> Optional[int]:
+        """return the time behind the car ahead [cs], 0 for the leader, None if the car ahead is laps ahead"""
+        key = self._keys.get(car_id)
+        if key is None:
+            return None
+        position = self._order.bisect_left(key)
+        if position == 0:
+            return 0
+        return self._interval(self._order[position - 1], key)
+
+    @staticmethod
+    def _interval(ahead: tuple[int, int, int], key: tuple[int, int, int]) -> Optional[int]:
+        # crossing times of different laps cannot be compared
+        if ahead[0] != key[0]:
+            return None
+        return key[1] - ahead[1]
+
+    def _gap(self, key: tuple[int, int, int]) -> int:
+        laps = -key[0]
+        return key[1] - self._leader_crossing.get(laps, key[1])
+
+    def standings(self) -> list[Standing]:
+        """return the full standings, leader first"""
+        order = self._order
+        if not order:
+            return []
+        leader_laps = -order[0][0]
+        rows = []
+        ahead = order[0]
+        for position, key in enumerate(order, start=1):
+            rows.append(Standing(
+                position=position,
+                car_id=key[2],
+                laps=-key[0],
+                crossing_cs=key[1],
+                laps_down=leader_laps + key[0],
+                gap_cs=self._gap(key),
+                interval_laps=key[0] - ahead[0],
+                interval_cs=self._interval(ahead, key)
+            ))
+            ahead = key
+        return rows
+
+    def reset(self) -> None:
+        """clear the standings, for a new heat"""
+        self._order.clear()
+        self._keys.clear()
+        self._leader_crossing.clear()
+        self._oldest_lap = 0
+
+    def attach(self, bus: Events = oxigen_events) -> None:
+        """start following ``new_lap_event`` of the events bus, ``position_change_event`` is raised on the same bus"""
+        self.detach()
+        bus.new_lap_event.connect(self.on_new_lap)
+        self._bus = bus
+        self._events = bus
+
+    def detach(self) -> None:
+        """stop following ``new_lap_event``"""
+        if self._bus is not None:
+            self._bus.new_lap_event.disconnect(self.on_new_lap, missing_ok=True)
+            self._bus = None
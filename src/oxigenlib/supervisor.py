@@ -0,0 +1,395 @@
+"""
+Supervisor Module
+-----------------
+File: ``supervisor.py``
+
+Run the dongle of each track in its own worker process. Every worker owns an ``OxigenSession``: reading, decoding
+and ``Racers`` updates are spread over the cores and a hung serial port does not stop the other tracks.
+
+The race events of each worker come back to the parent over its own pipe and are raised again on one events bus
+per track, so the slots written for a single track keep working. A hung worker is terminated with its pipe, the
+channels of the other tracks are not affected. Commands sent on the bus of a track are forwarded
+to its worker. Crashed, hung or disconnected workers are restarted with an increasing delay::
+
+    supervisor = TrackSupervisor()
+    track_a = supervisor.add_track("A", "/dev/ttyACM0")
+    track_b = supervisor.add_track("B", "/dev/ttyACM1")
+    track_a.new_lap_event.connect(on_lap_track_a)
+    supervisor.start()
+    o2.set_race_state(o2.RaceState.RUNNING, system_a, timer_a, bus=track_a)
+    while True:
+        supervisor.dispatch(timeout=0.1)
+
+Only the race events are forwarded (laps, pit lane, track call, cars on track and connection state),
+the frames received from the dongle stay in the worker.
+"""
+import multiprocessing
+import multiprocessing.connection
+import queue
+from time import monotonic, monotonic_ns, sleep
+from typing import Optional
+
+from pydantic import BaseModel
+
+from .events import Events
+
+__all__ = ['TrackSupervisor', 'WorkerStats']
+
+# events forwarded from the workers, the index is the message kind on the channel
+_FORWARDED_EVENTS = (
+    'dongle_connected_event',
+    'new_lap_event',
+    'pit_lane_enter_event',
+    'pit_lane_leave_event',
+    'track_call_event',
+    'all_cars_on_track_event',
+)
+_CONNECTED = _FORWARDED_EVENTS.index('dongle_connected_event')
+# message kind of the periodic worker report
+_HEARTBEAT = -1
+
+
+class WorkerStats(BaseModel):
+    """
+    State and counters of a track worker
+
+    :param name: name of the track
+    :type name: str
+    :param port: serial port of the dongle
+    :type port: str
+    :param pid: process id of the worker, None if not running
+    :type pid: int
+    :param alive: True if the worker process is running
+    :type alive: bool
+    :param connected: True if the worker reported a connected dongle
+    :type connected: bool
+    :param restarts: number of times the worker was restarted
+    :type restarts: int
+    :param frames: frames received by the current worker process
+    :type frames: int
+    :param frames_per_s: frames received per second over the last report interval
+    :type frames_per_s: float
+    :param events: events forwarded to the parent since the start
+    :type events: int
+    :param lag_ms: delay between the worker raising an event and the parent dispatching it, last value [ms]
+    :type lag_ms: float
+    :param max_lag_ms: maximum delay measured [ms]
+    :type max_lag_ms: float
+    """
+    name: str
+    port: str
+    pid: Optional[int]
+    alive: bool
+    connected: bool
+    restarts: int
+    frames: int
+    frames_per_s: float
+    events: int
+    lag_ms: float
+    max_lag_ms: float
+
+
+def _worker_main(port: str, channel, commands, heartbeat_interval: float) -> None:
+    """body of a worker process: drive one dongle and forward its events on the channel"""
+    from .session import OxigenSession
+
+    session = OxigenSession()
+    bus = session.events
+    connected = []
+
+    def forward(kind: int):
+        def slot(*args):
+            channel.send((kind, monotonic_ns(), args))
+        return slot
+
+    for kind, event_name in enumerate(_FORWARDED_EVENTS):
+        getattr(bus, event_name).connect(forward(kind))
+    bus.dongle_connected_event.connect(connected.append)
+
+    session.dongle.connect(port)
+    if not connected or not connected[-1]:
+        # the supervisor restarts the worker later
+        return
+    session.dongle.start_reader()
+
+    frames = 0
+    next_heartbeat = monotonic()
+    try:
+        while True:
+            frames += session.dongle.dispatch_pending(timeout=0.05)
+            if not connected[-1]:
+                return
+            # commands sent by the parent on the bus of the track
+            try:
+                while True:
+                    data = commands.get_nowait()
+                    if data is None:
+                        return
+                    session.dongle.send(data)
+            except queue.Empty:
+                pass
+            now = monotonic()
+            if now >= next_heartbeat:
+                channel.send((_HEARTBEAT, monotonic_ns(), (frames,)))
+                next_heartbeat = now + heartbeat_interval
+    finally:
+        session.close()
+
+
+def _terminate(process: multiprocessing.Process, timeout: float) -> None:
+    """stop a worker process, killed if it does not end within ``timeout`` seconds"""
+    process.terminate()
+    process.join(timeout)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+class _Worker:
+    """parent side state of a track worker"""
+    def __init__(self, name: str, port: str, bus: Events):
+        self.name = name
+        self.port = port
+        self.bus = bus
+        self.process: Optional[multiprocessing.Process] = None
+        # receiving end of the events pipe and commands queue of the current process
+        self.channel = None
+        self.commands = None
+        self.connected = False
+        self.restarts = 0
+        self.restart_delay = 0.0
+        self.restart_at = 0.0
+        self.started_at = 0.0
+        self.last_heartbeat = 0.0
+        self.frames = 0
+        self.frames_per_s = 0.0
+        self.last_frames_report = (0.0, 0)
+        self.events = 0
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def send(self, data: bytes) -> None:
+        # slot of transmit_command_event on the bus of the track
+        if self.commands is not None:
+            self.commands.put(data)
+
+
+class TrackSupervisor:
+    """
+    Start, watch and restart one worker process per track
+
+    :param heartbeat_interval: seconds between two reports of a worker
+    :type heartbeat_interval: float
+    :param hang_timeout: seconds without reports after which a worker is considered hung and restarted
+    :type hang_timeout: float
+    :param restart_delay: delay before the first restart of a worker [s], doubled at each failed restart
+    :type restart_delay: float
+    :param max_restart_delay: maximum delay between restarts [s]
+    :type max_restart_delay: float
+    :param start_method: multiprocessing start method, the platform default if not given
+    :type start_method: str
+    """
+    def __init__(self, heartbeat_interval: float = 1.0, hang_timeout: float = 5.0, restart_delay: float = 1.0,
+                 max_restart_delay: float = 30.0, start_method: Optional[str] = None):
+        self._heartbeat_interval = heartbeat_interval
+        self._hang_timeout = hang_timeout
+        self._restart_delay = restart_delay
+        self._max_restart_delay = max_restart_delay
+        self._context = multiprocessing.get_context(start_method)
+        self._workers: dict[str, _Worker] = {}
+        self._running = False
+
+    def add_track(self, name: str, port: str, bus: Optional[Events] = None) -> Events:
+        """
+        add a track driven by the dongle on ``port``
+
+        :param name: unique name of the track
+        :type name: str
+        :param port: serial port of the dongle
+        :type port: str
+        :param bus: events bus on which the events of the track are raised, a new one by default
+        :type bus: Events
+
+        :return: the events bus of the track
+        """
+        if name in self._workers:
+            raise ValueError(f"track {name} already exists")
+        bus = bus if bus is not None else Events()
+        worker = self._workers[name] = _Worker(name, port, bus)
+        bus.transmit_command_event.connect(worker.send)
+        if self._running:
+            self._spawn(worker)
+        return bus
+
+    def events(self, name: str) -> Events:
+        """return the events bus of a track"""
+        return self._workers[name].bus
+
+    def start(self) -> None:
+        """start the workers of all tracks"""
+        self._running = True
+        for worker in self._workers.values():
+            if worker.process is None:
+                self._spawn(worker)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """ask all workers to close their dongle and wait for them, workers still running are terminated"""
+        self._running = False
+        for worker in self._workers.values():
+            if worker.commands is not None:
+                worker.commands.put(None)
+        for worker in self._workers.values():
+            process = worker.process
+            if process is not None:
+                process.join(timeout)
+                if process.is_alive():
+                    _terminate(process, timeout)
+            self._close_channel(worker)
+            worker.process = None
+            worker.commands = None
+            worker.connected = False
+
+    def _spawn(self, worker: _Worker) -> None:
+        # a new channel for every process: a terminated worker may leave a message half written
+        worker.channel, channel = self._context.Pipe(duplex=False)
+        worker.commands = self._context.Queue()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.port, channel, worker.commands, self._heartbeat_interval),
+            name=f"oxigen-track-{worker.name}",
+            daemon=True
+        )
+        worker.process.start()
+        # the worker owns the sending end, the receiving end reports the end of the worker
+        channel.close()
+        worker.started_at = worker.last_heartbeat = monotonic()
+        worker.frames = 0
+        worker.last_frames_report = (worker.started_at, 0)
+
+    @staticmethod
+    def _close_channel(worker: _Worker) -> None:
+        if worker.channel is not None:
+            worker.channel.close()
+            worker.channel = None
+
+    def _supervise(self) -> int:
+        """restart the workers that exited or stopped reporting, return the number of events raised meanwhile"""
+        dispatched = 0
+        now = monotonic()
+        for worker in self._workers.values():
+            process = worker.process
+            if process is None:
+                if now >= worker.restart_at:
+                    worker.restarts += 1
+                    self._spawn(worker)
+                continue
+            if process.is_alive() and now - worker.last_heartbeat < self._hang_timeout:
+                continue
+            # crashed, lost its dongle or hung: restart later, waiting longer if it failed quickly
+            if process.is_alive():
+                _terminate(process, self._heartbeat_interval)
+            else:
+                # the last events of a worker that ended by itself are complete
+                dispatched += self._receive(worker)
+                process.join()
+            self._close_channel(worker)
+            worker.process = None
+            worker.commands = None
+            if worker.connected:
+                worker.connected = False
+                worker.bus.dongle_connected_event.emit(False)
+            if now - worker.started_at > self._max_restart_delay:
+                worker.restart_delay = self._restart_delay
+            else:
+                worker.restart_delay = min(max(worker.restart_delay * 2, self._restart_delay),
+                                           self._max_restart_delay)
+            worker.restart_at = now + worker.restart_delay
+        return dispatched
+
+    def _receive(self, worker: _Worker) -> int:
+        """raise the events waiting on the channel of a worker"""
+        dispatched = 0
+        channel = worker.channel
+        try:
+            while channel is not None and channel.poll():
+                dispatched += self._dispatch_message(worker, *channel.recv())
+        except (EOFError, OSError):
+            # the worker ended, ``_supervise`` restarts it
+            self._close_channel(worker)
+        return dispatched
+
+    def dispatch(self, timeout: Optional[float] = None) -> int:
+        """
+        Raise the events received from the workers on the bus of their track and restart failed workers.
+        To be called periodically by the thread owning the slots.
+
+        :param timeout: seconds to wait for the first message, 0 does not wait. The wait is capped at the heartbeat
+            interval, so that the health checks run even if no worker reports: None waits the heartbeat interval
+        :type timeout: float
+
+        :return: number of raised events
+        """
+        # the pending events first: a worker blocked on a full pipe is not hung
+        dispatched = sum(self._receive(worker) for worker in self._workers.values())
+        if self._running:
+            dispatched += self._supervise()
+        if dispatched:
+            return dispatched
+        wait = self._heartbeat_interval if timeout is None else min(timeout, self._heartbeat_interval)
+        workers = {worker.channel: worker for worker in self._workers.values() if worker.channel is not None}
+        if not workers:
+            sleep(max(wait, 0))
+            return 0
+        for channel in multiprocessing.connection.wait(list(workers), max(wait, 0)):
+            dispatched += self._receive(workers[channel])
+        return dispatched
+
+    def _dispatch_message(self, worker: _Worker, kind: int, timestamp_ns: int, args: tuple) -> int:
+        now = monotonic()
+        lag_ms = (monotonic_ns() - timestamp_ns) / 10**6
+        worker.lag_ms = lag_ms
+        worker.max_lag_ms = max(worker.max_lag_ms, lag_ms)
+        worker.last_heartbeat = now
+        if kind == _HEARTBEAT:
+            frames = args[0]
+            last_time, last_frames = worker.last_frames_report
+            if now > last_time:
+                worker.frames_per_s = (frames - last_frames) / (now - last_time)
+            worker.frames = frames
+            worker.last_frames_report = (now, frames)
+            return 0
+        if kind == _CONNECTED:
+            if worker.connected == args[0]:
+                return 0
+            worker.connected = args[0]
+            if worker.connected:
+                worker.restart_delay = 0.0
+        worker.events += 1
+        getattr(worker.bus, _FORWARDED_EVENTS[kind]).emit(*args)
+        return 1
+
+    def stats(self) -> dict[str, WorkerStats]:
+        """state and counters of each worker, indexed by track name"""
+        return {
+            name: WorkerStats(
+                name=name,
+                port=worker.port,
+                pid=worker.process.pid if worker.process is not None else None,
+                alive=worker.process is not None and worker.process.is_alive(),
+                connected=worker.connected,
+                restarts=worker.restarts,
+                frames=worker.frames,
+                frames_per_s=worker.frames_per_s,
+                events=worker.events,
+                lag_ms=worker.lag_ms,
+                max_lag_ms=worker.max_lag_ms
+            )
+            for name, worker in self._workers.items()
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
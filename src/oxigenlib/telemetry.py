@@ -0,0 +1,251 @@
+"""
+Telemetry Module
+----------------
+File: ``telemetry.py``
+
+Bounded per-car history of the data received from the dongle, meant for long endurance races.
+
+Each car owns fixed-size ring buffers (one column each for timestamp, power, lap count and flags),
+so memory stays constant whatever the race length. The buffers are plain memory or, optionally,
+a memory-mapped file that survives the process. Appending is O(1) and reading returns zero-copy
+``memoryview`` slices::
+
+    store = TelemetryStore(capacity=36000)
+    store.attach()
+    ...
+    older, newer = store[3].view('power')
+"""
+import mmap
+import os
+from struct import Struct
+from typing import Optional
+
+from . import constants as o2
+from .dongle_rx import DongleRxData
+from .events import Events, oxigen_events
+
+__all__ = ['TelemetryStore', 'CarTelemetry',
+           'FLAG_ON_TRACK', 'FLAG_IN_PIT_LANE', 'FLAG_LINK', 'FLAG_TRACK_CALL', 'FLAG_BATT_LOW',
+           'FLAG_BTN_UP', 'FLAG_BTN_DOWN', 'FLAG_BTN_ROUND']
+
+# bits of the flags column
+FLAG_ON_TRACK = 0x01
+FLAG_IN_PIT_LANE = 0x02
+FLAG_LINK = 0x04
+FLAG_TRACK_CALL = 0x08
+FLAG_BATT_LOW = 0x10
+FLAG_BTN_UP = 0x20
+FLAG_BTN_DOWN = 0x40
+FLAG_BTN_ROUND = 0x80
+
+# column name -> memoryview format, largest items first to keep the columns aligned
+_COLUMNS = (('timestamp_cs', 'q'), ('power', 'f'), ('lap_count', 'I'), ('flags', 'B'))
+_ROW_SIZE = 8 + 4 + 4 + 1
+# per car header of the mapped file: write position / number of stored rows
+_HEADER = Struct('<QQ')
+_FILE_MAGIC = b'OXTLM\x00\x01\x00'
+
+
+def _raw_flags(data: DongleRxData) -> int:
+    status = data.status
+    buttons = data.buttons
+    flags = FLAG_ON_TRACK if data.power & o2.CAR_ON_TRACK_MASK else 0
+    if status & o2.CAR_IN_PIT_LANE_MASK:
+        flags |= FLAG_IN_PIT_LANE
+    if status & o2.CAR_ONLINE_MASK:
+        flags |= FLAG_LINK
+    if buttons & o2.TRACK_CALL_MASK:
+        flags |= FLAG_TRACK_CALL
+    if buttons & o2.BATT_LOW_MASK:
+        flags |= FLAG_BATT_LOW
+    # the three buttons share the same bit position in both bytes
+    return flags | (buttons & (o2.BTN_UP_MASK | o2.BTN_DOWN_MASK | o2.BTN_ROUND_MASK))
+
+
+class CarTelemetry:
+    """
+    Ring buffers of one car
+
+    :param capacity: number of rows kept, the oldest rows are overwritten
+    :type capacity: int
+    :param buffer: writable buffer of ``capacity * 17`` bytes backing the columns, allocated if not given
+    :param header: writable buffer of 16 bytes keeping the write position, used with memory-mapped files
+    """
+    def __init__(self, capacity: int, buffer=None, header=None):
+        self.capacity = capacity
+        if buffer is None:
+            buffer = bytearray(capacity * _ROW_SIZE)
+        memory = memoryview(buffer)
+        self._columns = {}
+        offset = 0
+        for name, fmt in _COLUMNS:
+            size = capacity * Struct(fmt).size
+            self._columns[name] = memory[offset:offset + size].cast(fmt)
+            offset += size
+        self._timestamp = self._columns['timestamp_cs']
+        self._power = self._columns['power']
+        self._lap_count = self._columns['lap_count']
+        self._flags = self._columns['flags']
+        self._header = header
+        if header is not None:
+            self._head, self._count = _HEADER.unpack_from(header)
+        else:
+            self._head, self._count = 0, 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp_cs: int, power: float, lap_count: int, flags: int) -> None:
+        """store a new row, overwriting the oldest one when full"""
+        head = self._head
+        self._timestamp[head] = timestamp_cs
+        self._power[head] = power
+        self._lap_count[head] = lap_count
+        self._flags[head] = flags
+        head += 1
+        self._head = 0 if head == self.capacity else head
+        if self._count < self.capacity:
+            self._count += 1
+        if self._header is not None:
+            _HEADER.pack_into(self._header, 0, self._head, self._count)
+
+    def view(self, column: str, last: Optional[int] = None) -> tuple[memoryview, memoryview]:
+        """
+        return the stored values of a column, oldest first, without copying
+
+        :param column: one of ``timestamp_cs``, ``power``, ``lap_count``, ``flags``
+        :type column: str
+        :param last: number of most recent rows, all stored rows by default
+        :type last: int
+
+        :return: two memoryview slices to read in sequence, the second one is empty if the data do not wrap
+        """
+        data = self._columns[column]
+        count = self._count if last is None else min(last, self._count)
+        start = self._head - count
+        if start >= 0:
+            return data[start:self._head], data[0:0]
+        return data[start + self.capacity:], data[:self._head]
+
+    def values(self, column: str, last: Optional[int] = None) -> list:
+        """return a copy of the stored values of a column, oldest first"""
+        older, newer = self.view(column, last)
+        return older.tolist() + newer.tolist()
+
+    def release(self) -> None:
+        """release the views on the backing buffer, the instance cannot be used anymore"""
+        for column in self._columns.values():
+            column.release()
+        if self._header is not None:
+            self._header.release()
+
+    def latest(self) -> Optional[tuple[int, float, int, int]]:
+        """return the most recent row as timestamp / power / lap count / flags, None if empty"""
+        if not self._count:
+            return None
+        index = self._head - 1
+        return self._timestamp[index], self._power[index], self._lap_count[index], self._flags[index]
+
+
+class TelemetryStore:
+    """
+    Per-car telemetry fed by the frames received from the dongle
+
+    :param capacity: number of rows kept for each car
+    :type capacity: int
+    :param path: optional file backing the buffers as memory map, reopened files keep the stored history
+    :type path: str
+    """
+    def __init__(self, capacity: int = 36000, path: Optional[str] = None):
+        self.capacity = capacity
+        self._cars: dict[int, CarTelemetry] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._memory: Optional[memoryview] = None
+        self._bus: Optional[Events] = None
+        if path is not None:
+            self._open_map(path)
+
+    def _open_map(self, path: str) -> None:
+        slots = o2.MAX_CAR_ID + 1
+        # keep every car aligned to 8 bytes
+        car_size = _HEADER.size + (self.capacity * _ROW_SIZE + 7) // 8 * 8
+        size = len(_FILE_MAGIC) + _HEADER.size + slots * car_size
+        new_file = not os.path.exists(path) or os.path.getsize(path) != size
+        with open(path, 'a+b') as file:
+            if new_file:
+                file.truncate(0)
+                file.truncate(size)
+            self._mmap = mmap.mmap(file.fileno(), size)
+        memory = self._memory = memoryview(self._mmap)
+        if new_file:
+            memory[:len(_FILE_MAGIC)] = _FILE_MAGIC
+            _HEADER.pack_into(memory, len(_FILE_MAGIC), self.capacity, slots)
+        offset = len(_FILE_MAGIC) + _HEADER.size
+        for car_id in range(slots):
+            header = memory[offset:offset + _HEADER.size]
+            rows = memory[offset + _HEADER.size:offset + _HEADER.size + self.capacity * _ROW_SIZE]
+            self._cars[car_id] = CarTelemetry(self.capacity, rows, header)
+            offset += car_size
+
+    def __getitem__(self, car_id: int) -> CarTelemetry:
+        car = self._cars.get(car_id)
+        if car is None:
+            car = self._cars[car_id] = CarTelemetry(self.capacity)
+        return car
+
+    def __contains__(self, car_id: int) -> bool:
+        return car_id in self._cars and len(self._cars[car_id]) > 0
+
+    def car_ids(self) -> list[int]:
+        """return the ids of the cars with stored data"""
+        return [car_id for car_id, car in self._cars.items() if len(car)]
+
+    def update(self, data: DongleRxData) -> None:
+        """store a frame received from the dongle"""
+        self[data.id].append(
+            data.timestamp_msg_cs,
+            (data.power & o2.POWER_MEAN_VALUE_MASK) / 127 * 10,
+            data.lap_count,
+            _raw_flags(data)
+        )
+
+    def update_power(self, car_id: int, power: int, timestamp_cs: int) -> None:
+        """store a power change of a frame dropped by the duplicate filter, other columns repeat the latest row"""
+        car = self[car_id]
+        latest = car.latest()
+        if latest is None:
+            return
+        _, _, lap_count, flags = latest
+        flags = flags | FLAG_ON_TRACK if power & o2.CAR_ON_TRACK_MASK else flags & ~FLAG_ON_TRACK
+        car.append(timestamp_cs, (power & o2.POWER_MEAN_VALUE_MASK) / 127 * 10, lap_count, flags)
+
+    def attach(self, bus: Events = oxigen_events) -> None:
+        """start recording the frames received on the events bus"""
+        self.detach()
+        bus.dongle_new_data_available_event.connect(self.update)
+        bus.dongle_power_event.connect(self.update_power)
+        self._bus = bus
+
+    def detach(self) -> None:
+        """stop recording"""
+        if self._bus is not None:
+            self._bus.dongle_new_data_available_event.disconnect(self.update, missing_ok=True)
+            self._bus.dongle_power_event.disconnect(self.update_power, missing_ok=True)
+            self._bus = None
+
+    def flush(self) -> None:
+        """write the memory-mapped buffers to disk"""
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        """detach and release the memory-mapped file"""
+        self.detach()
+        if self._mmap is not None:
+            for car in self._cars.values():
+                car.release()
+            self._cars.clear()
+            self._memory.release()
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
@@ -0,0 +1,181 @@
+"""
+TX Scheduler Module
+-------------------
+File: ``tx_scheduler.py``
+
+Priority queue and pacing for the messages transmitted to the dongle.
+
+Messages are classified by their content: race state messages (including the system max speed) first,
+then global commands, then car specific commands. A newer message replaces a pending one with the same target,
+so only the latest race state or the latest value of a command for a car is transmitted.
+Writes are paced to ``rate_hz`` messages per second.
+
+Every message also carries the system max speed and the pit lane configuration: queued commands are updated
+with the values of the latest race state message, so a delayed command never restores an outdated max speed.
+"""
+from collections import deque
+from enum import IntEnum
+from threading import Lock
+from time import monotonic_ns
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+
+from .constants import STATUS_RACE_MASK
+
+__all__ = ['TxPriority', 'TxPriorityStats', 'TxScheduler', 'classify_message']
+
+# race status bits used by command messages
+_COMMAND_STATUS = 0x06
+
+
+class TxPriority(IntEnum):
+    RACE_STATE = 0
+    GLOBAL_COMMAND = 1
+    CAR_COMMAND = 2
+
+
+class TxPriorityStats(BaseModel):
+    """
+    Transmission counters of one priority class
+
+    :param sent: messages written to the dongle
+    :type sent: int
+    :param replaced: pending messages replaced by a newer one with the same target
+    :type replaced: int
+    :param pending: messages waiting for transmission
+    :type pending: int
+    :param mean_latency_ms: average time spent in the queue [ms]
+    :type mean_latency_ms: float
+    :param max_latency_ms: maximum time spent in the queue [ms]
+    :type max_latency_ms: float
+    """
+    sent: int
+    replaced: int
+    pending: int
+    mean_latency_ms: float
+    max_latency_ms: float
+
+
+def classify_message(bytes_data: bytes) -> tuple[TxPriority, tuple]:
+    """
+    return priority and target of a message, messages with the same target supersede each other
+
+    :param bytes_data: 11 bytes message for the dongle
+    :type bytes_data: bytes
+
+    :return: priority class and target key
+    """
+    if (bytes_data[0] & STATUS_RACE_MASK) != _COMMAND_STATUS:
+        return TxPriority.RACE_STATE, (TxPriority.RACE_STATE,)
+    if bytes_data[2] == 0:
+        # global command code
+        return TxPriority.GLOBAL_COMMAND, (TxPriority.GLOBAL_COMMAND, bytes_data[3])
+    # car id / car command code
+    return TxPriority.CAR_COMMAND, (TxPriority.CAR_COMMAND, bytes_data[2], bytes_data[5])
+
+
+class TxScheduler:
+    """
+    Thread safe priority scheduler for outgoing messages
+
+    :param rate_hz: maximum number of messages per second written to the dongle
+    :type rate_hz: float
+    """
+    def __init__(self, rate_hz: float = 50.0):
+        self._interval_ns = int(10**9 / rate_hz)
+        self._last_write_ns = 0
+        self._queues = {priority: deque() for priority in TxPriority}
+        # target key -> pending entry [data, submit time, target key]
+        self._pending: dict[tuple, list] = {}
+        self._lock = Lock()
+        # status configuration bits and max speed of the latest race state message
+        self._race_header: Optional[bytes] = None
+        self._sent = dict.fromkeys(TxPriority, 0)
+        self._replaced = dict.fromkeys(TxPriority, 0)
+        self._latency_sum_ns = dict.fromkeys(TxPriority, 0)
+        self._latency_max_ns = dict.fromkeys(TxPriority, 0)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, bytes_data: bytes) -> None:
+        """queue a message, replacing a pending one with the same target"""
+        priority, key = classify_message(bytes_data)
+        with self._lock:
+            if priority is TxPriority.RACE_STATE:
+                self._race_header = bytes((bytes_data[0] & ~STATUS_RACE_MASK & 0xFF, bytes_data[1]))
+            entry = self._pending.get(key)
+            if entry is not None:
+                # keep queue position and submit time, so latency covers the whole wait
+                entry[0] = bytes_data
+                self._replaced[priority] += 1
+            else:
+                entry = [bytes_data, monotonic_ns(), key]
+                self._pending[key] = entry
+                self._queues[priority].append(entry)
+
+    def pump(self, write: Callable[[bytes], object]) -> int:
+        """
+        write the next message if the pacing interval elapsed
+
+        :param write: function writing the bytes to the dongle
+        :type write: Callable
+
+        :return: number of written messages (0 or 1)
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            now = monotonic_ns()
+            if now - self._last_write_ns < self._interval_ns:
+                return 0
+            self._write_next(write, now)
+            return 1
+
+    def drain(self, write: Callable[[bytes], object]) -> int:
+        """write all pending messages in priority order, ignoring the pacing"""
+        with self._lock:
+            written = len(self._pending)
+            while self._pending:
+                self._write_next(write, monotonic_ns())
+            return written
+
+    def _write_next(self, write: Callable[[bytes], object], now: int) -> None:
+        for priority, queue in self._queues.items():
+            if queue:
+                break
+        bytes_data, submit_ns, key = queue.popleft()
+        del self._pending[key]
+        if priority is not TxPriority.RACE_STATE and self._race_header is not None:
+            header = self._race_header
+            bytes_data = bytes((_COMMAND_STATUS | header[0], header[1])) + bytes_data[2:]
+        write(bytes_data)
+        self._last_write_ns = now
+        latency = now - submit_ns
+        self._sent[priority] += 1
+        self._latency_sum_ns[priority] += latency
+        if latency > self._latency_max_ns[priority]:
+            self._latency_max_ns[priority] = latency
+
+    def next_due_in(self) -> Optional[float]:
+        """return the seconds until the next message can be written, None if nothing is pending"""
+        if not self._pending:
+            return None
+        remaining_ns = self._last_write_ns + self._interval_ns - monotonic_ns()
+        return max(remaining_ns, 0) / 10**9
+
+    def stats(self) -> dict[TxPriority, TxPriorityStats]:
+        """return the transmission counters for each priority class"""
+        with self._lock:
+            return {
+                priority: TxPriorityStats(
+                    sent=self._sent[priority],
+                    replaced=self._replaced[priority],
+                    pending=len(self._queues[priority]),
+                    mean_latency_ms=self._latency_sum_ns[priority] / self._sent[priority] / 10**6
+                    if self._sent[priority] else 0.0,
+                    max_latency_ms=self._latency_max_ns[priority] / 10**6
+                )
+                for priority in TxPriority
+            }
@@ -9,8 +9,10 @@ from .config import O2Command, O2RaceStatus, O2Config, OxigenSystem
 from .config import PitLaneTrigger, PitLaneCount, PowerMeanValue
 from .config import RaceState, Command
 from .racetimer import RaceTimer
-from .dongle_tx import encode_race_status, encode_command
-from .events import oxigen_events as events
+from .dongle_tx import get_frame_encoder
+from .events import Events, oxigen_events as events
+# the singleton dongle writes the commands raised on the library events
+from . import dongle as _dongle  # noqa: F401
 __all__ = [
     'set_start_config',
     'set_system_max_speed',
@@ -59,7 +61,7 @@ def set_start_config(
     )
 
 
-def set_system_max_speed(max_speed: int, sys: OxigenSystem, timer: RaceTimer) -> None:
+def set_system_max_speed(max_speed: int, sys: OxigenSystem, timer: RaceTimer, bus: Events = events) -> None:
     """
     Set the maximum speed allowed.
     NOTE: this function controls the maximum speed allowed on the track,
@@ -71,15 +73,17 @@ def set_system_max_speed(max_speed: int, sys: OxigenSystem, timer: RaceTimer) ->
     :type sys: OxigenSystem
     :param timer: class providing system timer
     :type timer: RaceTimer
+    :param bus: events bus of the dongle receiving the command, the events of the library by default
+    :type bus: Events
 
     :return: None
     """
     sys.race_state.max_speed = max_speed
-    data = encode_race_status(race=sys.race_state, cfg=sys.config, ts=timer)
-    events.transmit_command_event.emit(data)
+    data = get_frame_encoder(sys).encode_race_status(timer)
+    bus.transmit_command_event.emit(data)
 
 
-def set_race_state(new_state: RaceState, sys: OxigenSystem, timer: RaceTimer) -> None:
+def set_race_state(new_state: RaceState, sys: OxigenSystem, timer: RaceTimer, bus: Events = events) -> None:
     """
     Set the race state.
 
@@ -89,15 +93,18 @@ def set_race_state(new_state: RaceState, sys: OxigenSystem, timer: RaceTimer) ->
     :type sys: OxigenSystem
     :param timer: class providing system timer
     :type timer: RaceTimer
+    :param bus: events bus of the dongle receiving the command, the events of the library by default
+    :type bus: Events
 
     :return: None
     """
     sys.race_state.race_status =new_state
-    data = encode_race_status(race=sys.race_state, cfg=sys.config, ts=timer)
-    events.transmit_command_event.emit(data)
+    data = get_frame_encoder(sys).encode_race_status(timer)
+    bus.transmit_command_event.emit(data)
 
 
-def set_pit_stop_speed_limit(pit_speed: int, car_id: int, sys: OxigenSystem, timer: RaceTimer) -> None:
+def set_pit_stop_speed_limit(pit_speed: int, car_id: int, sys: OxigenSystem, timer: RaceTimer,
+                             bus: Events = events) -> None:
     """
     Limit the maximum speed in pit lanes.
 
@@ -109,6 +116,8 @@ def set_pit_stop_speed_limit(pit_speed: int, car_id: int, sys: OxigenSystem, tim
     :type sys: OxigenSystem
     :param timer: class providing system timer
     :type timer: RaceTimer
+    :param bus: events bus of the dongle receiving the command, the events of the library by default
+    :type bus: Events
 
     :return: None
     """
@@ -118,10 +127,10 @@ def set_pit_stop_speed_limit(pit_speed: int, car_id: int, sys: OxigenSystem, tim
         command_arg=pit_speed
     )
 
-    data = encode_command(race=sys.race_state, cfg=sys.config, cmd=cmd, ts=timer)
-    events.transmit_command_event.emit(data)
+    data = get_frame_encoder(sys).encode_command(cmd, timer)
+    bus.transmit_command_event.emit(data)
 
-def set_car_max_speed(max_speed: int, car_id: int, sys: OxigenSystem, timer: RaceTimer) -> None:
+def set_car_max_speed(max_speed: int, car_id: int, sys: OxigenSystem, timer: RaceTimer, bus: Events = events) -> None:
     """
     Limit the maximum speed of a car.
 
@@ -133,6 +142,8 @@ def set_car_max_speed(max_speed: int, car_id: int, sys: OxigenSystem, timer: Rac
     :type sys: OxigenSystem
     :param timer: class providing system timer
     :type timer: RaceTimer
+    :param bus: events bus of the dongle receiving the command, the events of the library by default
+    :type bus: Events
 
     :return: None
     """
@@ -142,11 +153,11 @@ def set_car_max_speed(max_speed: int, car_id: int, sys: OxigenSystem, timer: Rac
         command_arg=max_speed
     )
 
-    data = encode_command(race=sys.race_state, cfg=sys.config, cmd=cmd, ts=timer)
-    events.transmit_command_event.emit(data)
+    data = get_frame_encoder(sys).encode_command(cmd, timer)
+    bus.transmit_command_event.emit(data)
 
 
-def set_car_min_speed(min_speed: int, car_id: int, sys: OxigenSystem, timer: RaceTimer) -> None:
+def set_car_min_speed(min_speed: int, car_id: int, sys: OxigenSystem, timer: RaceTimer, bus: Events = events) -> None:
     """
     Limit the minimum speed of a car.
 
@@ -158,6 +169,8 @@ def set_car_min_speed(min_speed: int, car_id: int, sys: OxigenSystem, timer: Rac
     :type sys: OxigenSystem
     :param timer: class providing system timer
     :type timer: RaceTimer
+    :param bus: events bus of the dongle receiving the command, the events of the library by default
+    :type bus: Events
 
     :return: None
     """
@@ -167,10 +180,10 @@ def set_car_min_speed(min_speed: int, car_id: int, sys: OxigenSystem, timer: Rac
         command_arg=min_speed
     )
 
-    data = encode_command(race=sys.race_state, cfg=sys.config, cmd=cmd, ts=timer)
-    events.transmit_command_event.emit(data)
+    data = get_frame_encoder(sys).encode_command(cmd, timer)
+    bus.transmit_command_event.emit(data)
 
-def set_car_max_brake(max_brake: int, car_id: int, sys: OxigenSystem, timer: RaceTimer) -> None:
+def set_car_max_brake(max_brake: int, car_id: int, sys: OxigenSystem, timer: RaceTimer, bus: Events = events) -> None:
     """
     Limit the brake force of a car.
 
@@ -182,6 +195,8 @@ def set_car_max_brake(max_brake: int, car_id: int, sys: OxigenSystem, timer: Rac
     :type sys: OxigenSystem
     :param timer: class providing system timer
     :type timer: RaceTimer
+    :param bus: events bus of the dongle receiving the command, the events of the library by default
+    :type bus: Events
 
     :return: None
     """
@@ -191,5 +206,5 @@ def set_car_max_brake(max_brake: int, car_id: int, sys: OxigenSystem, timer: Rac
         command_arg=max_brake
     )
 
-    data = encode_command(race=sys.race_state, cfg=sys.config, cmd=cmd, ts=timer)
-    events.transmit_command_event.emit(data)
+    data = get_frame_encoder(sys).encode_command(cmd, timer)
+    bus.transmit_command_event.emit(data)
@@ -0,0 +1,53 @@
+import sys
+import time
+
+import pytest
+
+from oxigenlib.dongle import Dongle
+from oxigenlib.events import Events
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="the simulator needs a pseudo-terminal")
+
+
+def test_reader_reports_unplugged_dongle():
+    from oxigenlib.simulator import DongleSimulator
+
+    bus = Events()
+    connected = []
+    bus.dongle_connected_event.connect(connected.append)
+    dongle = Dongle(bus)
+    simulator = DongleSimulator(num_cars=2, rate_hz=200, seed=1)
+    simulator.start()
+    try:
+        dongle.connect(simulator.port)
+        dongle.start_reader()
+        deadline = time.monotonic() + 2
+        while not dongle.dispatch_pending(timeout=0.1) and time.monotonic() < deadline:
+            pass
+    finally:
+        # unplug
+        simulator.stop()
+    deadline = time.monotonic() + 2
+    while connected[-1] and time.monotonic() < deadline:
+        dongle.dispatch_pending(timeout=0.1)
+    assert connected == [True, False]
+    # closing the session of the lost dongle does not touch the port again
+    dongle.stop_reader()
+    assert connected == [True, False]
+
+
+def test_stop_reader_after_unplug():
+    from oxigenlib.simulator import DongleSimulator
+
+    bus = Events()
+    connected = []
+    bus.dongle_connected_event.connect(connected.append)
+    dongle = Dongle(bus)
+    with DongleSimulator(num_cars=2, rate_hz=200, seed=1) as simulator:
+        dongle.connect(simulator.port)
+        dongle.start_reader()
+        time.sleep(0.1)
+    # let the reader hit the closed port
+    time.sleep(0.3)
+    dongle.stop_reader()
+    assert connected == [True, False]
@@ -0,0 +1,49 @@
+from oxigenlib import constants
+from oxigenlib.dongle_reader import FrameQueue, OverflowPolicy
+from oxigenlib.dongle_rx import DongleRxDuplicateFilter, DongleRxPower, read_dongle_pkg
+from oxigenlib.simulator import encode_rx_frame
+
+
+def frame(car_id: int, lap_count: int, power: int, timer_cs: int) -> bytes:
+    return encode_rx_frame(constants.CAR_ONLINE_MASK, car_id, 8.0 if lap_count else 0.0, lap_count,
+                           constants.CAR_ON_TRACK_MASK | power, 0x43, 0, timer_cs)
+
+
+def test_coalesce_keeps_frames_over_power_changes():
+    dropped = []
+    queue = FrameQueue(2, OverflowPolicy.COALESCE, dropped.append)
+    lap = read_dongle_pkg(frame(1, 1, 50, 100))
+    queue.put(lap)
+    queue.put(DongleRxPower(2, 60, 101))
+    queue.put(DongleRxPower(1, 70, 102))
+    # the power change of car 1 has nothing to replace, it is dropped instead of the lap frame
+    assert queue.get_all(0) == [lap, DongleRxPower(2, 60, 101)]
+    assert dropped == [1]
+
+
+def test_coalesce_same_type_only():
+    queue = FrameQueue(3, OverflowPolicy.COALESCE)
+    lap = read_dongle_pkg(frame(1, 1, 50, 100))
+    queue.put(lap)
+    queue.put(DongleRxPower(1, 60, 101))
+    queue.put(DongleRxPower(2, 60, 101))
+    # replaces the power change of car 1, the lap frame stays
+    queue.put(DongleRxPower(1, 70, 102))
+    assert queue.get_all(0) == [lap, DongleRxPower(1, 70, 102), DongleRxPower(2, 60, 101)]
+    assert queue.coalesced == 1 and queue.dropped == 0
+
+
+def test_dropped_frame_goes_through_the_filter_again():
+    duplicate_filter = DongleRxDuplicateFilter()
+    queue = FrameQueue(1, OverflowPolicy.DROP_OLDEST, duplicate_filter.forget)
+    lap = frame(1, 1, 50, 100)
+    kept, _ = duplicate_filter.filter(lap + frame(1, 1, 50, 101))
+    assert kept == lap
+    queue.put(read_dongle_pkg(kept))
+    # the queue is full, the lap frame is dropped
+    queue.put(read_dongle_pkg(frame(2, 0, 50, 102)))
+    assert queue.dropped == 1
+    # the car repeats its state, the filter lets the repetition through
+    repeated = frame(1, 1, 50, 103)
+    kept, _ = duplicate_filter.filter(repeated)
+    assert kept == repeated
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from oxigenlib import constants
+from oxigenlib.dongle_rx import DongleRxFramer, RX_FRAME_LENGTH
+from oxigenlib.simulator import encode_rx_frame
+
+
+def race_frames(num_cars: int, num_frames: int, seed: int, frames_per_cs: int = 1, timer_cs: int = 1000,
+                lap_time_cs: int = 200) -> list[bytes]:
+    """race messages of cars reporting in turns, with laps of slightly different times"""
+    rng = random.Random(seed)
+    laps = [0] * (num_cars + 1)
+    lap_times = [0.0] * (num_cars + 1)
+    next_lap = [timer_cs + rng.randint(lap_time_cs // 2, lap_time_cs) for _ in range(num_cars + 1)]
+    frames = []
+    for index in range(num_frames):
+        car_id = index % num_cars + 1
+        now = timer_cs + index // frames_per_cs
+        if now >= next_lap[car_id]:
+            laps[car_id] += 1
+            lap_times[car_id] = rng.randint(lap_time_cs * 9 // 10, lap_time_cs * 11 // 10) / 100
+            next_lap[car_id] = now + round(lap_times[car_id] * 100)
+        firmware = constants.DEVICE_FW_MASK | 0x23 if index // num_cars % 2 else 0x43
+        frames.append(encode_rx_frame(constants.CAR_ONLINE_MASK, car_id, lap_times[car_id], laps[car_id],
+                                      constants.CAR_ON_TRACK_MASK | rng.randint(20, 127), firmware, 0, now))
+    return frames
+
+
+def feed(data: bytes, seed: int, max_chunk: int = 64) -> list[bytes]:
+    """feed the framer in random chunks, return the frames found"""
+    rng = random.Random(seed)
+    framer = DongleRxFramer()
+    out = bytearray()
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(1, max_chunk)
+        out += framer.feed(data[pos:pos + size])
+        pos += size
+    return [bytes(out[i:i + RX_FRAME_LENGTH]) for i in range(0, len(out), RX_FRAME_LENGTH)]
+
+
+def test_clean_stream():
+    frames = race_frames(4, 300, seed=1)
+    assert feed(b''.join(frames), seed=1) == frames
+
+
+def test_timer_wrap():
+    frames = race_frames(4, 300, seed=2, timer_cs=constants.TIMER_WRAP_CS - 150)
+    assert feed(b''.join(frames), seed=2) == frames
+
+
+@pytest.mark.parametrize('num_cars', (1, 2, 20))
+@pytest.mark.parametrize('frames_per_cs', (1, 5, 10))
+@pytest.mark.parametrize('shift', range(1, RX_FRAME_LENGTH))
+def test_shifted_start(num_cars, frames_per_cs, shift):
+    frames = race_frames(num_cars, 300, seed=shift, frames_per_cs=frames_per_cs)
+    found = feed(b''.join(frames)[shift:], seed=shift)
+    # the first frame is cut, the framer starts on the second one
+    assert found == frames[1:]
+
+
+@pytest.mark.parametrize('num_cars', (1, 2, 20))
+@pytest.mark.parametrize('frames_per_cs', (1, 5))
+@pytest.mark.parametrize('corruption', ('insert', 'drop', 'flip'))
+def test_corrupted_byte(num_cars, frames_per_cs, corruption):
+    for seed in range(40):
+        rng = random.Random(seed)
+        frames = race_frames(num_cars, 300, seed=seed, frames_per_cs=frames_per_cs)
+        data = bytearray(b''.join(frames))
+        pos = rng.randrange(20 * RX_FRAME_LENGTH, len(data) - 20 * RX_FRAME_LENGTH)
+        if corruption == 'insert':
+            data.insert(pos, rng.randrange(256))
+        elif corruption == 'drop':
+            del data[pos]
+        else:
+            data[pos] ^= 1 << rng.randrange(8)
+        found = feed(bytes(data), seed=seed)
+        garbage = [frame for frame in found if frame not in frames]
+        # at most the corrupted frame itself goes through, a couple of frames are lost
+        assert len(garbage) <= 1
+        assert len(found) >= len(frames) - 3
+        # the frames found keep the stream order
+        remaining = iter(frames)
+        assert all(frame in remaining for frame in found if frame not in garbage)
@@ -0,0 +1,64 @@
+from threading import Thread
+
+import pytest
+
+from oxigenlib.config import O2Command, O2Config, O2RaceStatus, OxigenSystem
+from oxigenlib.dongle_tx import FrameEncoder, encode_command, encode_race_status
+from oxigenlib.enums import Command, PitLaneCount, PitLaneTrigger, PowerMeanValue, RaceState
+
+
+class Timer:
+    def __init__(self, value_cs: int):
+        self._value_cs = value_cs
+
+    def value_cs(self) -> int:
+        return self._value_cs
+
+
+@pytest.fixture
+def system():
+    return OxigenSystem(race_state=O2RaceStatus(race_status=RaceState.RUNNING, max_speed=200),
+                        config=O2Config(pit_lane_count=PitLaneCount.YES, pit_lane_trigger=PitLaneTrigger.LEAVE,
+                                        power_mean_value=PowerMeanValue.PWM))
+
+
+def test_same_bytes_as_encode(system):
+    encoder = FrameEncoder(system)
+    timer = Timer(0x123456)
+    race, cfg = system.race_state, system.config
+    assert encoder.encode_race_status(timer) == encode_race_status(race, cfg, timer)
+    for car_id in (0, 1, 20):
+        for command in Command:
+            cmd = O2Command(id=car_id, command=command, command_arg=77)
+            assert encoder.encode_command(cmd, timer) == encode_command(race, cfg, cmd, timer)
+    race.max_speed = 100
+    assert encoder.encode_race_status(timer) == encode_race_status(race, cfg, timer)
+
+
+def test_car_id_out_of_range(system):
+    cmd = O2Command.model_construct(id=21, command=Command.SET_MAX_SPEED, command_arg=100)
+    with pytest.raises(ValueError):
+        encode_command(system.race_state, system.config, cmd, Timer(0))
+    with pytest.raises(ValueError):
+        FrameEncoder(system).encode_command(cmd, Timer(0))
+
+
+def test_shared_between_threads(system):
+    encoder = FrameEncoder(system)
+    errors = []
+
+    def encode(car_id: int):
+        cmd = O2Command(id=car_id, command=Command.SET_MAX_SPEED, command_arg=car_id)
+        timer = Timer(car_id)
+        expected = encode_command(system.race_state, system.config, cmd, timer)
+        for _ in range(20000):
+            data = encoder.encode_command(cmd, timer)
+            if data != expected:
+                errors.append(data)
+
+    threads = [Thread(target=encode, args=(car_id,)) for car_id in (0, 3, 7)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
@@ -0,0 +1,31 @@
+import json
+import warnings
+
+import pytest
+
+from oxigenlib import constants, fastpath
+from oxigenlib.dongle_rx import read_dongle_pkg
+from oxigenlib.events import Events
+from oxigenlib.racers import Racers
+from oxigenlib.simulator import encode_rx_frame
+
+
+@pytest.fixture(params=(False, True), ids=('validated', 'fast_path'))
+def fast_path(request):
+    fastpath.set_fast_path(request.param)
+    yield request.param
+    fastpath.set_fast_path(False)
+
+
+def test_dump_racers(fast_path):
+    racers = Racers(bus=Events(), players={})
+    for car_id in (1, 2):
+        racers.update(read_dongle_pkg(encode_rx_frame(constants.CAR_ONLINE_MASK, car_id, 8.5, 3,
+                                                      constants.CAR_ON_TRACK_MASK | 100, 0x43, 0, 1000)))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        dump = racers.model_dump()
+        dump_json = json.loads(racers.model_dump_json())
+    assert set(dump['players']) == {1, 2}
+    assert dump['players'][2] == racers.get_player_data(2).model_dump()
+    assert dump_json['players']['1']['lap_count'] == 3
@@ -0,0 +1,27 @@
+import os
+import sys
+import time
+
+import pytest
+
+from oxigenlib.dongle_tx import encode_free_race
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="the simulator needs a pseudo-terminal")
+
+
+def test_stop_with_nobody_reading():
+    from oxigenlib.simulator import DongleSimulator
+
+    simulator = DongleSimulator(num_cars=20, rate_hz=20000)
+    simulator.start()
+    port = os.open(simulator.port, os.O_RDWR | os.O_NOCTTY)
+    try:
+        os.write(port, encode_free_race())
+        # the pseudo-terminal buffer fills up
+        time.sleep(0.5)
+        start = time.monotonic()
+        simulator.stop()
+        assert time.monotonic() - start < 1
+        assert simulator.frames_dropped
+    finally:
+        os.close(port)